@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Crew, CrewMembership, CrewInvitation, CrewActivity
+from .models import Crew, CrewMembership, CrewInvitation, CrewActivity, PermissionAuditEntry
 
 
 @admin.register(Crew)
@@ -91,3 +91,12 @@ class CrewActivityAdmin(admin.ModelAdmin):
     search_fields = ['crew__name', 'user__username', 'description']
     raw_id_fields = ['crew', 'user', 'target_user']
     readonly_fields = ['created_at']
+
+
+@admin.register(PermissionAuditEntry)
+class PermissionAuditEntryAdmin(admin.ModelAdmin):
+    list_display = ['crew', 'actor', 'target', 'permissions_before', 'permissions_after', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['crew__name', 'actor__username', 'target__username']
+    raw_id_fields = ['crew', 'actor', 'target']
+    readonly_fields = ['created_at']
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CrewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crews'
+
+    def ready(self):
+        # Register signal handlers
+        import crews.signals  # noqa
+        post_migrate.connect(crews.signals.resolve_permission_masks_after_migrate, sender=self)
@@ -0,0 +1,199 @@
+"""
+Permission audit log.
+
+Every change to a member's effective crew permissions is recorded as one
+``PermissionAuditEntry``: who changed whose permissions, and their
+``permission_mask`` before and after. ``CrewMembership.save()`` records
+joins, role changes, deactivations and explicit grants, the membership
+delete signal records removals, and queryset updates record their own.
+The actor is whoever ``acting_as`` names, which the middleware sets to the
+request's user. Entries are only kept once the write that
+changed the permissions commits: each batch is handed over from a
+``transaction.on_commit`` callback, so rolled-back changes are never
+logged. During a request, committed entries are collected in a buffer
+opened by ``CrewPermissionMiddleware`` and written with one
+``bulk_create`` when the response is ready, so a bulk change to fifty
+members is one INSERT. Outside a request (shell, management commands)
+entries are written as soon as their change commits.
+
+``permission_holders_at`` answers "who could publish on date X" from the
+``(crew, target, created_at)`` index: the latest entry per member at that
+time holds their permissions. Memberships that predate the log are given
+a starting entry by ``seed_permission_audit`` after migrate.
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import DatabaseError, transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import CrewMembership, PermissionAuditEntry
+
+logger = logging.getLogger(__name__)
+
+_pending_entries = ContextVar('pending_permission_audit', default=None)
+_actor = ContextVar('permission_audit_actor', default=None)
+
+
+def _user_id(user):
+    return getattr(user, 'pk', user)
+
+
+@contextmanager
+def acting_as(actor):
+    """
+    Record permission changes made inside the block as made by ``actor``.
+
+    ``None`` keeps the current actor.
+    """
+    if actor is None:
+        yield
+        return
+    token = _actor.set(actor)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+def record_permission_change(crew_id, actor, target, before, after):
+    """
+    Record a change to a member's permissions.
+
+    Args:
+        crew_id (int): The member's crew
+        actor (User or int): User who made the change, or None for the
+            current ``acting_as`` actor
+        target (User or int): User whose permissions changed
+        before (int): Permission bitmask before the change
+        after (int): Permission bitmask after the change
+    """
+    record_permission_changes(crew_id, actor, [(target, before, after)])
+
+
+def record_permission_changes(crew_id, actor, changes):
+    """
+    Record changes to several members' permissions made by one write.
+
+    The entries are kept once the current transaction commits and dropped
+    if it rolls back.
+
+    Args:
+        crew_id (int): The members' crew
+        actor (User or int): User who made the changes, or None for the
+            current ``acting_as`` actor
+        changes (iterable): ``(target, before, after)`` permission mask tuples
+    """
+    if actor is None:
+        actor = _actor.get()
+    now = timezone.now()
+    entries = [
+        PermissionAuditEntry(
+            crew_id=crew_id,
+            actor_id=_user_id(actor),
+            target_id=_user_id(target),
+            permissions_before=before,
+            permissions_after=after,
+            created_at=now,
+        )
+        for target, before, after in changes
+        if before != after
+    ]
+    if entries:
+        transaction.on_commit(lambda: _committed(entries), robust=True)
+
+
+def _committed(entries):
+    pending = _pending_entries.get()
+    if pending is None:
+        PermissionAuditEntry.objects.bulk_create(entries)
+    else:
+        pending.extend(entries)
+
+
+def flush_permission_audit():
+    """Write the buffered entries, returning how many were written."""
+    pending = _pending_entries.get()
+    if not pending:
+        return 0
+    count = len(pending)
+    try:
+        PermissionAuditEntry.objects.bulk_create(pending)
+    except DatabaseError:
+        # The changes themselves are saved; losing their audit rows must
+        # not turn the response into an error
+        logger.exception("Could not write %d permission audit entries", count)
+        count = 0
+    pending.clear()
+    return count
+
+
+@contextmanager
+def buffered_permission_audit():
+    """Collect committed audit entries and write them together on success."""
+    token = _pending_entries.set([])
+    try:
+        yield
+        flush_permission_audit()
+    finally:
+        _pending_entries.reset(token)
+
+
+def seed_permission_audit():
+    """
+    Give every membership without audit entries a starting entry.
+
+    The entry records the member's current permissions as of now, so
+    point-in-time queries are complete from the moment the log starts.
+
+    Returns:
+        int: How many entries were written
+    """
+    audited = PermissionAuditEntry.objects.filter(crew=OuterRef('crew'), target=OuterRef('user'))
+    now = timezone.now()
+    entries = [
+        PermissionAuditEntry(
+            crew_id=crew_id,
+            target_id=user_id,
+            permissions_before=0,
+            permissions_after=mask,
+            created_at=now,
+        )
+        for crew_id, user_id, mask in CrewMembership.objects.filter(
+            permission_mask__gt=0
+        ).exclude(Exists(audited)).values_list('crew_id', 'user_id', 'permission_mask')
+    ]
+    PermissionAuditEntry.objects.bulk_create(entries)
+    return len(entries)
+
+
+def permission_holders_at(crew, permission_type, when):
+    """
+    Users who held a permission in a crew at a point in time.
+
+    Permissions held by role count as well as explicit grants, and removed
+    or deactivated members stop holding them. Times before the log started
+    have no entries and return no one.
+
+    Args:
+        crew (Crew): The crew to check
+        permission_type (str): 'create', 'edit', 'publish', or 'delegate'
+        when (datetime): The point in time
+
+    Returns:
+        set: IDs of the users holding the permission
+    """
+    bit = CrewMembership.PERMISSION_BITS[permission_type]
+    latest = PermissionAuditEntry.objects.filter(
+        crew=crew, target=OuterRef('target'), created_at__lte=when
+    ).order_by('-created_at', '-pk').values('pk')[:1]
+    return set(
+        PermissionAuditEntry.objects.filter(
+            crew=crew, created_at__lte=when, pk=Subquery(latest)
+        ).annotate(
+            held=F('permissions_after').bitand(bit)
+        ).filter(held=bit).values_list('target', flat=True)
+    )
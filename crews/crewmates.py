@@ -0,0 +1,92 @@
+"""
+Crew-mate lookups for profile privacy.
+
+Profiles with ``CREWS`` visibility are shown to people who share an active
+crew with their owner. Each user's crew mates are read with one
+``CrewMembership`` self-join and cached as a set of user IDs, so checking
+one profile is a set lookup and a list page filters with ``user__in``.
+
+The cache key is versioned on the ``updated_at`` of every crew the user
+belongs to, read from the database on each lookup. The signal handlers in
+``crews.signals`` touch a crew's ``updated_at`` in the same transaction as
+any change to its memberships, so every process stops reading a stale set
+as soon as the change commits, whichever cache backend it uses.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Crew, CrewMembership
+
+CREW_MATES_CACHE_TIMEOUT = 60 * 60
+
+# Roles that make someone a crew mate; pending invitations do not
+MEMBER_ROLES = [role for role, _ in CrewMembership.ROLE_CHOICES if role != 'PENDING']
+
+
+def crew_mates_cache_key(user_id, crew_versions):
+    """
+    Cache key for a user's crew-mate set.
+
+    Args:
+        user_id (int): The user
+        crew_versions (list): ``(crew_id, updated_at)`` for each of the
+            user's active crews
+
+    Returns:
+        str: A key that changes whenever any of those crews does
+    """
+    version = hashlib.md5(repr(crew_versions).encode()).hexdigest()
+    return f"crew_mates:{user_id}:{version}"
+
+
+def get_crew_mate_ids(user):
+    """
+    IDs of the users who share an active crew with a user.
+
+    The user is not their own crew mate.
+
+    Args:
+        user (User): The user to look up; anonymous users have none
+
+    Returns:
+        frozenset: User IDs, from the cache when they are there
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    crew_versions = list(
+        Crew.objects.filter(
+            is_active=True,
+            memberships__user=user,
+            memberships__is_active=True,
+            memberships__role__in=MEMBER_ROLES,
+        ).order_by('pk').values_list('pk', 'updated_at')
+    )
+    if not crew_versions:
+        return frozenset()
+
+    key = crew_mates_cache_key(user.pk, crew_versions)
+    mates = cache.get(key)
+    if mates is None:
+        mates = frozenset(
+            CrewMembership.objects.filter(
+                is_active=True,
+                role__in=MEMBER_ROLES,
+                crew__is_active=True,
+                crew__memberships__user=user,
+                crew__memberships__is_active=True,
+                crew__memberships__role__in=MEMBER_ROLES,
+            ).exclude(
+                user=user
+            ).values_list('user_id', flat=True).distinct()
+        )
+        cache.set(key, mates, CREW_MATES_CACHE_TIMEOUT)
+    return mates
+
+
+def touch_crew(crew_id):
+    """Move a crew's version on, so its members' crew-mate sets are re-read."""
+    Crew.objects.filter(pk=crew_id).update(updated_at=timezone.now())
@@ -0,0 +1,53 @@
+"""
+Management command to recount every crew's CrewStats row.
+
+Run nightly to repair rows that drifted, e.g. after bulk updates that
+bypass signals or events moved from one crew to another.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from crews.models import CrewStats
+from crews.stats import TOTAL_FIELDS, count_crew_totals
+
+
+class Command(BaseCommand):
+    help = 'Recount crew statistics and repair rows that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted rows without writing them',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        totals = count_crew_totals()
+        existing = CrewStats.objects.in_bulk(totals.keys())
+
+        missing = []
+        drifted = []
+        for crew_id, values in totals.items():
+            stats = existing.get(crew_id)
+            if stats is None:
+                missing.append(CrewStats(crew_id=crew_id, **values))
+                continue
+            if any(getattr(stats, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(stats, field, value)
+                drifted.append(stats)
+
+        if not options['dry_run']:
+            with transaction.atomic():
+                CrewStats.objects.bulk_create(missing, ignore_conflicts=True)
+                CrewStats.objects.bulk_update(drifted, TOTAL_FIELDS, batch_size=500)
+
+        verb = 'Would repair' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {len(totals)} crews. {verb} {len(drifted)} drifted '
+            f'and {len(missing)} missing rows in {time.perf_counter() - started:.2f}s'
+        ))
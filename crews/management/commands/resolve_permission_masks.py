@@ -0,0 +1,19 @@
+"""
+Management command to recompute every membership's permission_mask.
+
+``migrate`` already does this for the crews app; run it after rows were
+changed by queryset updates that skipped the mask, so indexed permission
+lookups match the stored grants.
+"""
+
+from django.core.management.base import BaseCommand
+
+from crews.models import CrewMembership
+
+
+class Command(BaseCommand):
+    help = 'Recompute membership permission masks from roles and explicit grants'
+
+    def handle(self, *args, **options):
+        updated = CrewMembership.resolve_permission_masks()
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} permission masks'))
@@ -0,0 +1,75 @@
+"""
+Management command to award achievements across every crew.
+
+Triggered checks only cover membership changes and event publishes, so
+time-based criteria such as ``min_age_days`` are awarded by this nightly
+sweep. Metrics and earned titles are read with grouped queries, every
+template is evaluated in memory, and new achievements and their activity
+rows are written with bulk inserts.
+"""
+
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from crews.models import Crew
+from crews.models_achievements import CrewAchievement
+from crews.stats import get_crews_metrics
+from crews.utils_achievements import award_achievements, get_achievement_evaluator
+
+
+class Command(BaseCommand):
+    help = 'Evaluate achievement templates for all active crews and award new achievements'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the achievements that would be awarded without writing them',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        evaluator = get_achievement_evaluator()
+        crews = list(Crew.objects.filter(is_active=True).select_related('stats'))
+        metrics = get_crews_metrics(crews)
+
+        earned = defaultdict(set)
+        for crew_id, title in CrewAchievement.objects.filter(
+            crew__in=crews
+        ).values_list('crew', 'title').iterator(chunk_size=5000):
+            earned[crew_id].add(title)
+        loaded = time.perf_counter()
+
+        awards = []
+        for crew in crews:
+            if crew.pk not in metrics:
+                continue
+            templates = evaluator.eligible(metrics[crew.pk], earned[crew.pk])
+            if templates:
+                awards.append((crew, metrics[crew.pk], templates))
+        pending = sum(len(templates) for _, _, templates in awards)
+        evaluated = time.perf_counter()
+
+        if options['dry_run']:
+            for crew, _, templates in awards:
+                self.stdout.write(f"{crew.name}: {', '.join(template.title for template in templates)}")
+            awarded = []
+        else:
+            awarded = award_achievements(awards)
+        finished = time.perf_counter()
+
+        self.stdout.write(
+            f'Loaded {len(crews)} crews and {len(evaluator.templates)} templates in {loaded - started:.2f}s, '
+            f'evaluated in {evaluated - loaded:.2f}s, wrote in {finished - evaluated:.2f}s'
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Would award {pending} achievements to {len(awards)} crews'))
+        else:
+            awarded_crews = len({achievement.crew_id for achievement in awarded})
+            self.stdout.write(self.style.SUCCESS(f'Awarded {len(awarded)} achievements to {awarded_crews} crews'))
+            if len(awarded) < pending:
+                self.stdout.write(self.style.WARNING(
+                    f'Skipped {pending - len(awarded)} achievements already awarded by another process'
+                ))
@@ -0,0 +1,28 @@
+"""
+Middleware for crew permissions.
+
+Attaches a ``CrewPermissionResolver`` to each request as
+``request.crew_permissions``. The user's memberships are loaded on first use,
+so requests that never check a crew permission make no extra query.
+
+Permission audit entries committed during the request are attributed to
+the request's user, buffered, and written together once the response is
+ready.
+"""
+
+from django.utils.functional import SimpleLazyObject
+
+from .audit import acting_as, buffered_permission_audit
+from .permissions import CrewPermissionResolver
+
+
+class CrewPermissionMiddleware:
+    """Give every request a lazily loaded crew permission resolver."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.crew_permissions = SimpleLazyObject(lambda: CrewPermissionResolver(request.user))
+        with buffered_permission_audit(), acting_as(request.user):
+            return self.get_response(request)
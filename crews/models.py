@@ -6,7 +6,9 @@ functionality including roles, permissions, and associations with events/leagues
 """
 
 from django.db import models
+from django.db.models import Case, Value, When
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.text import slugify
 from cloudinary.models import CloudinaryField
 from django_countries.fields import CountryField
@@ -112,6 +114,14 @@ class Crew(SearchableModel):
             crew_memberships__is_active=True
         )
     
+    def members_with_permission(self, permission_type):
+        """Get the active members holding an event permission, by role or grant."""
+        return User.objects.filter(
+            crew_memberships__crew=self,
+            crew_memberships__permission_mask__in=CrewMembership.masks_with_permission(permission_type),
+            crew_memberships__is_active=True
+        )
+    
     def can_manage(self, user):
         """Check if a user can manage this crew."""
         if not user.is_authenticated:
@@ -192,6 +202,26 @@ class CrewMembership(models.Model):
         ('PENDING', 'Pending'),       # Invited but not accepted
     ]
     
+    # Permission type and its explicit permission field
+    PERMISSION_FIELDS = {
+        'create': 'can_create_events',
+        'edit': 'can_edit_events',
+        'publish': 'can_publish_events',
+        'delegate': 'can_delegate_permissions',
+    }
+    
+    # Bit for each permission type in permission bitmasks
+    PERMISSION_BITS = {
+        'create': 1,
+        'edit': 2,
+        'publish': 4,
+        'delegate': 8,
+    }
+    
+    # Every permission; owners and admins hold all of them by role
+    ALL_PERMISSIONS = 15
+    FULL_PERMISSION_ROLES = ('OWNER', 'ADMIN')
+    
     crew = models.ForeignKey(Crew, on_delete=models.CASCADE, related_name='memberships')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='crew_memberships')
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='MEMBER')
@@ -214,6 +244,13 @@ class CrewMembership(models.Model):
         help_text="Can grant/revoke permissions to other crew members"
     )
     
+    # Effective permissions: the grants above with role defaults folded in,
+    # 0 while inactive. Recorded in the permission audit log whenever it
+    # changes; used for indexed "members who can X" queries. Permission checks
+    # read role and grants directly. Kept by save() and backfilled after
+    # migrate; queryset updates must set it with permission_mask_expression().
+    permission_mask = models.PositiveSmallIntegerField(default=0, editable=False)
+    
     # Member profile within crew
     nickname = models.CharField(max_length=50, blank=True, help_text="Crew nickname (optional)")
     bio = models.TextField(blank=True, help_text="Your role/bio within the crew")
@@ -235,10 +272,71 @@ class CrewMembership(models.Model):
     class Meta:
         unique_together = ['crew', 'user']
         ordering = ['role', 'joined_at']
+        indexes = [
+            models.Index(fields=['crew', 'permission_mask'], name='crews_member_perm_mask_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.crew.name} ({self.get_role_display()})"
     
+    def save(self, *args, **kwargs):
+        before = 0 if self._state.adding else self.permission_mask
+        self.permission_mask = self.resolve_permission_mask()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'permission_mask'}
+        super().save(*args, **kwargs)
+        
+        if self.permission_mask != before:
+            from .audit import record_permission_change
+            record_permission_change(self.crew_id, None, self.user_id, before, self.permission_mask)
+    
+    def resolve_permission_mask(self):
+        """This member's effective permissions as a bitmask."""
+        if not self.is_active:
+            return 0
+        if self.role in self.FULL_PERMISSION_ROLES:
+            return self.ALL_PERMISSIONS
+        return self.granted_permissions
+    
+    @classmethod
+    def permission_mask_expression(cls, **values):
+        """
+        SQL expression resolving ``permission_mask`` from a row's role and grants.
+        
+        Args:
+            **values: Permission fields being set in the same UPDATE, as
+                booleans; they are used instead of the row's current values
+        
+        Returns:
+            Expression: For ``QuerySet.update(permission_mask=...)``
+        """
+        granted = Value(0)
+        for permission_type, field in cls.PERMISSION_FIELDS.items():
+            bit = cls.PERMISSION_BITS[permission_type]
+            if field in values:
+                granted = granted + Value(bit if values[field] else 0)
+            else:
+                granted = granted + Case(When(**{field: True}, then=Value(bit)), default=Value(0))
+        return Case(
+            When(is_active=False, then=Value(0)),
+            When(role__in=cls.FULL_PERMISSION_ROLES, then=Value(cls.ALL_PERMISSIONS)),
+            default=granted,
+            output_field=models.PositiveSmallIntegerField(),
+        )
+    
+    @classmethod
+    def resolve_permission_masks(cls):
+        """Recompute every stale ``permission_mask``, returning how many changed."""
+        stale = cls.objects.exclude(permission_mask=cls.permission_mask_expression())
+        return stale.update(permission_mask=cls.permission_mask_expression())
+    
+    @classmethod
+    def masks_with_permission(cls, permission_type):
+        """Every permission mask including a permission, for indexed ``__in`` lookups."""
+        bit = cls.PERMISSION_BITS[permission_type]
+        return [mask for mask in range(cls.ALL_PERMISSIONS + 1) if mask & bit]
+    
     def can_manage(self):
         """Check if this member can manage crew settings and members."""
         return self.role in ['OWNER', 'ADMIN']
@@ -266,20 +364,9 @@ class CrewMembership(models.Model):
         """
         if not self.is_active:
             return False
-            
-        # Owners and Admins have all permissions by default
-        if self.role in ['OWNER', 'ADMIN']:
+        if self.role in self.FULL_PERMISSION_ROLES:
             return True
-            
-        # Check specific permissions
-        permission_map = {
-            'create': self.can_create_events,
-            'edit': self.can_edit_events,
-            'publish': self.can_publish_events,
-            'delegate': self.can_delegate_permissions,
-        }
-        
-        return permission_map.get(permission_type, False)
+        return bool(self.granted_permissions & self.PERMISSION_BITS.get(permission_type, 0))
     
     def can_delegate_to_member(self, target_member):
         """
@@ -314,35 +401,34 @@ class CrewMembership(models.Model):
             
         return False
     
+    @property
+    def granted_permissions(self):
+        """Bitmask of the permissions explicitly granted to this member."""
+        return sum(
+            bit for permission_type, bit in self.PERMISSION_BITS.items()
+            if getattr(self, self.PERMISSION_FIELDS[permission_type])
+        )
+    
+    def _set_permission(self, permission_type, value, changed_by):
+        field = self.PERMISSION_FIELDS.get(permission_type)
+        if field is None:
+            return
+        setattr(self, field, value)
+        
+        from .audit import acting_as
+        with acting_as(changed_by):
+            self.save(update_fields=[field])
+    
     def grant_permission(self, permission_type, granted_by=None):
         """
         Grant a specific permission to this member.
         
         Args:
             permission_type (str): 'create', 'edit', 'publish', or 'delegate'
-            granted_by (User): User who granted the permission
+            granted_by (User): User who granted the permission, recorded in
+                the permission audit log
         """
-        if permission_type == 'create':
-            self.can_create_events = True
-        elif permission_type == 'edit':
-            self.can_edit_events = True
-        elif permission_type == 'publish':
-            self.can_publish_events = True
-        elif permission_type == 'delegate':
-            self.can_delegate_permissions = True
-        
-        self.save()
-        
-        # Log the permission change
-        if granted_by:
-            CrewActivity.objects.create(
-                crew=self.crew,
-                activity_type='MEMBER_PROMOTED',
-                user=granted_by,
-                target_user=self.user,
-                description=f"Granted {permission_type} permission to {self.user.username}",
-                metadata={'permission_type': permission_type, 'action': 'granted'}
-            )
+        self._set_permission(permission_type, True, granted_by)
     
     def revoke_permission(self, permission_type, revoked_by=None):
         """
@@ -350,29 +436,10 @@ class CrewMembership(models.Model):
         
         Args:
             permission_type (str): 'create', 'edit', 'publish', or 'delegate'
-            revoked_by (User): User who revoked the permission
+            revoked_by (User): User who revoked the permission, recorded in
+                the permission audit log
         """
-        if permission_type == 'create':
-            self.can_create_events = False
-        elif permission_type == 'edit':
-            self.can_edit_events = False
-        elif permission_type == 'publish':
-            self.can_publish_events = False
-        elif permission_type == 'delegate':
-            self.can_delegate_permissions = False
-        
-        self.save()
-        
-        # Log the permission change
-        if revoked_by:
-            CrewActivity.objects.create(
-                crew=self.crew,
-                activity_type='MEMBER_PROMOTED',  # We'll use this for permission changes
-                user=revoked_by,
-                target_user=self.user,
-                description=f"Revoked {permission_type} permission from {self.user.username}",
-                metadata={'permission_type': permission_type, 'action': 'revoked'}
-            )
+        self._set_permission(permission_type, False, revoked_by)
     
     def get_permission_summary(self):
         """
@@ -486,3 +553,79 @@ class CrewActivity(models.Model):
     
     def __str__(self):
         return f"{self.crew.name} - {self.get_activity_type_display()}"
+
+
+class PermissionAuditEntry(models.Model):
+    """
+    One change to a member's effective crew permissions.
+    
+    Permissions are stored as ``CrewMembership.permission_mask`` bitmasks
+    before and after the change, so joining, role changes, deactivation and
+    removal are recorded as well as explicit grants. Entries are written in
+    batches by ``crews.audit`` and indexed for "who held a permission at a
+    given time" queries.
+    """
+    
+    crew = models.ForeignKey(Crew, on_delete=models.CASCADE, related_name='permission_audit')
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="User who changed the permissions"
+    )
+    target = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    permissions_before = models.PositiveSmallIntegerField()
+    permissions_after = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'Permission Audit Entries'
+        indexes = [
+            models.Index(fields=['crew', 'target', 'created_at'], name='crews_perm_audit_target_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.crew_id} - {self.target_id}: {self.permissions_before} -> {self.permissions_after}"
+
+
+class CrewStats(models.Model):
+    """
+    Denormalised counts for a crew, one row per crew.
+    
+    Rewritten in the same transaction as every membership, event and activity
+    write (see ``crews.signals``) and reconciled nightly by the
+    ``reconcile_crew_stats`` command. Dashboards and achievements read crew
+    metrics from here instead of counting.
+    """
+    
+    crew = models.OneToOneField(Crew, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    
+    # Active members
+    member_count = models.PositiveIntegerField(default=0)
+    owner_count = models.PositiveIntegerField(default=0)
+    admin_count = models.PositiveIntegerField(default=0)
+    event_manager_count = models.PositiveIntegerField(default=0)
+    regular_member_count = models.PositiveIntegerField(default=0)
+    
+    # Events created by the crew
+    event_count = models.PositiveIntegerField(default=0)
+    published_event_count = models.PositiveIntegerField(default=0)
+    
+    # Activity feed
+    activity_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Crew Stats'
+    
+    def __str__(self):
+        return f"{self.crew_id} - {self.member_count} members, {self.event_count} events"
+
+
+# Achievement models live in their own module; import them so they are registered
+from .models_achievements import AchievementTemplate, CrewAchievement  # noqa: E402,F401
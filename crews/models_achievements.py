@@ -116,38 +116,42 @@ class AchievementTemplate(models.Model):
     def __str__(self):
         return self.title
     
-    def check_crew_eligibility(self, crew):
+    def check_crew_eligibility(self, crew, metrics=None):
         """
         Check if a crew meets the criteria for this achievement.
         
         Args:
             crew (Crew): Crew to check
+            metrics (dict): Optional values from ``get_crew_metrics``, to
+                check many templates against one read of the crew's stats
             
         Returns:
             bool: True if crew meets criteria
         """
+        from crews.stats import get_crew_metrics
+        
         criteria = self.criteria
+        if metrics is None:
+            metrics = get_crew_metrics(crew)
         
         # Member count achievements
         if criteria.get('min_members'):
-            if crew.member_count < criteria['min_members']:
+            if metrics['member_count'] < criteria['min_members']:
                 return False
         
         # Event count achievements
         if criteria.get('min_events'):
-            event_count = crew.events.filter(is_published=True).count()
-            if event_count < criteria['min_events']:
+            if metrics['event_count'] < criteria['min_events']:
                 return False
         
         # Age achievements
         if criteria.get('min_age_days'):
-            crew_age = (timezone.now() - crew.created_at).days
-            if crew_age < criteria['min_age_days']:
+            if metrics['crew_age_days'] < criteria['min_age_days']:
                 return False
         
         # Verification status
         if criteria.get('requires_verification', False):
-            if not crew.is_verified:
+            if not metrics['is_verified']:
                 return False
         
         return True
@@ -181,10 +185,9 @@ class AchievementTemplate(models.Model):
     
     def _get_current_criteria_values(self, crew):
         """Get current values for criteria tracking."""
+        from crews.stats import get_crew_metrics
+        
         return {
-            'member_count': crew.member_count,
-            'event_count': crew.events.filter(is_published=True).count(),
-            'crew_age_days': (timezone.now() - crew.created_at).days,
-            'is_verified': crew.is_verified,
+            **get_crew_metrics(crew),
             'awarded_at': timezone.now().isoformat()
         }
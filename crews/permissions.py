@@ -33,14 +33,142 @@ class InsufficientPermissionError(CrewPermissionError):
     pass
 
 
+# Request-scoped permission resolution
+class CrewPermissionResolver:
+    """
+    A user's active crew memberships, loaded with one query on first use.
+    
+    ``CrewPermissionMiddleware`` attaches one to every request as
+    ``request.crew_permissions``, so the decorators, mixins and views of a
+    request answer every membership and permission check from memory.
+    
+    Usage:
+        membership = request.crew_permissions.membership(crew)
+        if request.crew_permissions.has_permission(crew.slug, 'publish'):
+            ...
+    """
+    
+    def __init__(self, user):
+        self.user = user
+        self._by_id = None
+        self._by_slug = None
+    
+    def _load(self):
+        """Read every active membership of the user, with its crew."""
+        self._by_id = {}
+        self._by_slug = {}
+        if not self.user.is_authenticated:
+            return
+        for membership in CrewMembership.objects.filter(
+            user=self.user, is_active=True
+        ).select_related('crew'):
+            self._by_id[membership.crew_id] = membership
+            self._by_slug[membership.crew.slug] = membership
+    
+    def invalidate(self):
+        """Drop the loaded memberships so the next check reads them again."""
+        self._by_id = None
+        self._by_slug = None
+    
+    def membership(self, crew):
+        """
+        The user's active membership in a crew.
+        
+        Args:
+            crew: A Crew, crew slug or crew ID
+            
+        Returns:
+            CrewMembership: Active membership, or None if the user is not a member
+        """
+        if self._by_id is None:
+            self._load()
+        if isinstance(crew, Crew):
+            return self._by_id.get(crew.pk)
+        if isinstance(crew, str) and not crew.isdigit():
+            return self._by_slug.get(crew)
+        return self._by_id.get(int(crew))
+    
+    def has_permission(self, crew, permission_type):
+        """Check if the user has an event permission in a crew."""
+        membership = self.membership(crew)
+        return membership is not None and membership.has_event_permission(permission_type)
+    
+    def permissions(self, crew):
+        """Every event permission of the user in a crew, plus ``manage_crew``."""
+        membership = self.membership(crew)
+        if membership is None:
+            return {
+                'create': False, 'edit': False, 'publish': False,
+                'delegate': False, 'manage_crew': False,
+            }
+        return {
+            'create': membership.has_event_permission('create'),
+            'edit': membership.has_event_permission('edit'),
+            'publish': membership.has_event_permission('publish'),
+            'delegate': membership.has_event_permission('delegate'),
+            'manage_crew': membership.can_manage(),
+        }
+    
+    @property
+    def memberships(self):
+        """All of the user's active memberships."""
+        if self._by_id is None:
+            self._load()
+        return list(self._by_id.values())
+
+
+def get_crew_permissions(request):
+    """
+    Get the request's crew permission resolver, attaching one if needed.
+    
+    Requests that went through ``CrewPermissionMiddleware`` already have one;
+    this covers views called directly, e.g. from ``RequestFactory`` tests.
+    """
+    resolver = getattr(request, 'crew_permissions', None)
+    if not isinstance(resolver, CrewPermissionResolver):
+        resolver = CrewPermissionResolver(request.user)
+        request.crew_permissions = resolver
+    return resolver
+
+
+def authorize_events(user, events, resolver=None):
+    """
+    Get manage and publish permissions for a list of events.
+    
+    Every crew check is answered by one CrewPermissionResolver, so the whole
+    list costs a single membership query whichever crews the events belong to.
+    
+    Args:
+        user: The user to check
+        events: Events to authorize, ideally with ``select_related('organizer')``
+            so the organizer check does not query per event
+        resolver: Optional CrewPermissionResolver for the user, e.g. the
+            request's ``crew_permissions``
+        
+    Returns:
+        dict: ``{event.pk: {'manage': bool, 'publish': bool}}``
+    """
+    if resolver is None:
+        resolver = CrewPermissionResolver(user)
+    return {
+        event.pk: {
+            'manage': event.can_manage(user, resolver),
+            'publish': event.can_publish(user, resolver),
+        }
+        for event in events
+    }
+
+
 # Utility Functions
-def get_user_crew_membership(user, crew_slug_or_id):
+def get_user_crew_membership(user, crew_slug_or_id, resolver=None):
     """
     Get user's active membership in a crew.
     
     Args:
         user: The user to check
         crew_slug_or_id: Either crew slug or crew ID
+        resolver: Optional CrewPermissionResolver for the user; when given,
+            the membership is read from it instead of the database
         
     Returns:
         CrewMembership: Active membership if found
@@ -51,6 +179,12 @@ def get_user_crew_membership(user, crew_slug_or_id):
     if not user.is_authenticated:
         raise CrewNotFoundError("User must be authenticated")
     
+    if resolver is not None:
+        membership = resolver.membership(crew_slug_or_id)
+        if not membership:
+            raise CrewNotFoundError(f"Crew not found or user is not an active member: {crew_slug_or_id}")
+        return membership
+    
     # Try to get crew by slug first, then by ID
     try:
         if isinstance(crew_slug_or_id, str) and not crew_slug_or_id.isdigit():
@@ -67,7 +201,7 @@ def get_user_crew_membership(user, crew_slug_or_id):
     return membership
 
 
-def check_crew_permission(user, crew_slug_or_id, permission_type):
+def check_crew_permission(user, crew_slug_or_id, permission_type, resolver=None):
     """
     Check if user has specific crew permission.
     
@@ -75,6 +209,7 @@ def check_crew_permission(user, crew_slug_or_id, permission_type):
         user: The user to check
         crew_slug_or_id: Either crew slug or crew ID
         permission_type: 'create', 'edit', 'publish', or 'delegate'
+        resolver: Optional CrewPermissionResolver for the user
         
     Returns:
         bool: True if user has permission
@@ -82,11 +217,11 @@ def check_crew_permission(user, crew_slug_or_id, permission_type):
     Raises:
         CrewNotFoundError: If crew not found or user not a member
     """
-    membership = get_user_crew_membership(user, crew_slug_or_id)
+    membership = get_user_crew_membership(user, crew_slug_or_id, resolver)
     return membership.has_event_permission(permission_type)
 
 
-def require_crew_permission(user, crew_slug_or_id, permission_type, raise_exception=True):
+def require_crew_permission(user, crew_slug_or_id, permission_type, raise_exception=True, resolver=None):
     """
     Require user to have specific crew permission.
     
@@ -95,6 +230,7 @@ def require_crew_permission(user, crew_slug_or_id, permission_type, raise_except
         crew_slug_or_id: Either crew slug or crew ID
         permission_type: 'create', 'edit', 'publish', or 'delegate'
         raise_exception: Whether to raise exception if permission denied
+        resolver: Optional CrewPermissionResolver for the user
         
     Returns:
         bool: True if user has permission
@@ -103,10 +239,10 @@ def require_crew_permission(user, crew_slug_or_id, permission_type, raise_except
         InsufficientPermissionError: If user lacks permission (when raise_exception=True)
         CrewNotFoundError: If crew not found or user not a member
     """
-    has_permission = check_crew_permission(user, crew_slug_or_id, permission_type)
+    membership = get_user_crew_membership(user, crew_slug_or_id, resolver)
+    has_permission = membership.has_event_permission(permission_type)
     
     if not has_permission and raise_exception:
-        membership = get_user_crew_membership(user, crew_slug_or_id)
         raise InsufficientPermissionError(
             f"User '{user.username}' lacks '{permission_type}' permission in crew '{membership.crew.name}'"
         )
@@ -149,7 +285,10 @@ def crew_permission_required(permission_type, crew_param='crew_slug', login_url=
             
             try:
                 # Check permission
-                require_crew_permission(request.user, crew_identifier, permission_type)
+                require_crew_permission(
+                    request.user, crew_identifier, permission_type,
+                    resolver=get_crew_permissions(request)
+                )
                 
                 # Permission granted, proceed with view
                 return view_func(request, *args, **kwargs)
@@ -255,12 +394,16 @@ class CrewPermissionMixin:
     def check_crew_permission(self, user, crew_identifier):
         """Check if user has required crew permission."""
         permission_type = self.get_required_permission()
-        require_crew_permission(user, crew_identifier, permission_type)
+        require_crew_permission(
+            user, crew_identifier, permission_type, resolver=get_crew_permissions(self.request)
+        )
     
     def get_crew_membership(self):
         """Get current user's crew membership."""
         crew_identifier = self.get_crew_identifier()
-        return get_user_crew_membership(self.request.user, crew_identifier)
+        return get_user_crew_membership(
+            self.request.user, crew_identifier, resolver=get_crew_permissions(self.request)
+        )
     
     def get_crew(self):
         """Get the crew object."""
@@ -0,0 +1,145 @@
+"""
+Signal handlers for the crews application.
+
+Handlers run inside the write's transaction, so a crew's ``CrewStats`` row
+commits or rolls back with the membership, event or activity row that
+changed it. Membership writes also touch the crew's ``updated_at``, which
+versions its members' cached crew-mate sets, and removed members are
+recorded in the permission audit log. Achievement checks wait for the
+commit. They run after membership changes and event publishes, and only
+for the templates whose criteria the write can affect.
+"""
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from events.models import Event
+
+from .audit import record_permission_change, seed_permission_audit
+from .crewmates import touch_crew
+from .models import Crew, CrewActivity, CrewMembership
+from .models_achievements import AchievementTemplate
+from .stats import record_crew_activity, refresh_crew_stats
+from .utils_achievements import check_and_award_achievements, invalidate_achievement_evaluator
+
+
+# Membership fields the crew's member counts depend on
+MEMBER_COUNT_FIELDS = {'role', 'is_active', 'crew'}
+
+
+def _deleting(origin, model):
+    """Whether a delete cascaded from an instance or queryset of ``model``."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+def _deleting_crew(origin):
+    """Whether a delete cascaded from a crew, whose stats row goes with it."""
+    return _deleting(origin, Crew)
+
+
+def _check_achievements_on_commit(crew_id, criteria):
+    """Award the achievements a crew qualifies for once the write has committed."""
+    def check():
+        crew = Crew.objects.select_related('stats').filter(pk=crew_id).first()
+        if crew is not None:
+            check_and_award_achievements(crew, criteria=criteria)
+    transaction.on_commit(check)
+
+
+@receiver(post_save, sender=CrewMembership)
+@receiver(post_delete, sender=CrewMembership)
+def update_crew_stats_on_membership_change(sender, instance, origin=None, update_fields=None, **kwargs):
+    """Recount a crew's members after a membership changes."""
+    if _deleting_crew(origin):
+        return
+    if update_fields is not None and not update_fields & MEMBER_COUNT_FIELDS:
+        # Permission-only saves change no counts
+        return
+    refresh_crew_stats(instance.crew_id)
+    if instance.is_active and kwargs.get('signal') is post_save:
+        _check_achievements_on_commit(instance.crew_id, ['min_members'])
+
+
+@receiver(post_save, sender=CrewMembership)
+@receiver(post_delete, sender=CrewMembership)
+def touch_crew_on_membership_change(sender, instance, origin=None, update_fields=None, **kwargs):
+    """Move the crew's version on, so its members' crew-mate sets are re-read."""
+    if _deleting_crew(origin):
+        # The crew leaves its members' versions when it is deleted
+        return
+    if update_fields is not None and not update_fields & MEMBER_COUNT_FIELDS:
+        return
+    touch_crew(instance.crew_id)
+
+
+@receiver(post_delete, sender=CrewMembership)
+def record_removed_member_permissions(sender, instance, origin=None, **kwargs):
+    """Record that a removed member no longer holds any permissions."""
+    if _deleting_crew(origin) or _deleting(origin, User):
+        # The crew's or user's audit entries are deleted with them
+        return
+    record_permission_change(instance.crew_id, None, instance.user_id, instance.permission_mask, 0)
+
+
+@receiver(post_save, sender=CrewActivity)
+@receiver(post_delete, sender=CrewActivity)
+def update_crew_stats_on_activity_change(sender, instance, origin=None, created=False, **kwargs):
+    """Count a crew's activity after an activity row is added or removed."""
+    if _deleting_crew(origin):
+        return
+    if created:
+        record_crew_activity(instance.crew_id, instance.created_at)
+    elif kwargs.get('signal') is post_delete:
+        refresh_crew_stats(instance.crew_id)
+
+
+@receiver(pre_save, sender=Event)
+def remember_event_crew(sender, instance, raw=False, **kwargs):
+    """Note the crew an event belonged to before it is saved."""
+    if instance.pk and not raw:
+        instance._previous_crew_id = Event.objects.filter(
+            pk=instance.pk
+        ).values_list('created_by_crew', flat=True).first()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def update_crew_stats_on_event_change(sender, instance, **kwargs):
+    """Recount the events of the crew that created an event, and of its previous crew."""
+    previous_crew_id = getattr(instance, '_previous_crew_id', None)
+    if previous_crew_id and previous_crew_id != instance.created_by_crew_id:
+        refresh_crew_stats(previous_crew_id)
+    if instance.created_by_crew_id:
+        refresh_crew_stats(instance.created_by_crew_id)
+        if instance.published and kwargs.get('signal') is post_save:
+            _check_achievements_on_commit(instance.created_by_crew_id, ['min_events'])
+
+
+@receiver(post_save, sender=AchievementTemplate)
+@receiver(post_delete, sender=AchievementTemplate)
+def invalidate_achievement_evaluator_on_change(sender, **kwargs):
+    """Reload the indexed achievement templates after one is edited."""
+    invalidate_achievement_evaluator()
+
+
+def resolve_permission_masks_after_migrate(sender, using=DEFAULT_DB_ALIAS, plan=None, **kwargs):
+    """
+    Backfill membership permission masks and their audit history after migrate.
+
+    Only runs when the migration plan moved crews forward and its tables
+    exist, so ``flush``, unapplying crews and migrating other apps skip it.
+    """
+    if not any(
+        migration.app_label == sender.label and not backwards
+        for migration, backwards in plan or []
+    ):
+        return
+    if CrewMembership._meta.db_table not in connections[using].introspection.table_names():
+        return
+    CrewMembership.resolve_permission_masks()
+    seed_permission_audit()
@@ -0,0 +1,276 @@
+"""
+Crew statistics.
+
+Every crew has one ``CrewStats`` row holding its running totals: active
+members by role, events created and published, and activity. The signal
+handlers in ``crews.signals`` rewrite the row as part of each membership,
+event and activity write. ``reconcile_crew_stats`` recounts every crew
+nightly with grouped queries. Dashboards and achievement checks read crew
+metrics from the row instead of counting.
+
+The crew detail page also shows counts relative to today ("upcoming",
+"joined this month"). Those come from one aggregate each over memberships,
+events and activity, and the page's statistics are cached per crew. The
+key includes ``CrewStats.updated_at``, which every write to the row moves
+on, so a committed change is seen by every worker without deleting
+entries. The key also includes the date, so counts relative to today start
+fresh each day, and rolling windows are at most ``CREW_STATS_CACHE_TIMEOUT``
+seconds behind.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from events.models import Event
+
+from .models import Crew, CrewActivity, CrewMembership, CrewStats
+
+CREW_STATS_CACHE_TIMEOUT = 60 * 15
+
+ROLE_COUNT_FIELDS = {
+    'OWNER': 'owner_count',
+    'ADMIN': 'admin_count',
+    'EVENT_MANAGER': 'event_manager_count',
+    'MEMBER': 'regular_member_count',
+}
+
+TOTAL_FIELDS = (
+    'member_count', *ROLE_COUNT_FIELDS.values(),
+    'event_count', 'published_event_count', 'activity_count', 'last_activity_at',
+)
+
+
+def count_crew_totals(crew_ids=None):
+    """
+    Count crew totals with one grouped query each over memberships, events
+    and activity.
+
+    Args:
+        crew_ids (iterable): Crews to count; every crew when None
+
+    Returns:
+        dict: ``{crew_id: {CrewStats field: value}}`` for every crew counted
+    """
+    memberships = CrewMembership.objects.filter(is_active=True)
+    events = Event.objects.filter(created_by_crew__isnull=False)
+    activities = CrewActivity.objects.all()
+    crews = Crew.objects.all()
+    if crew_ids is not None:
+        crew_ids = list(crew_ids)
+        memberships = memberships.filter(crew__in=crew_ids)
+        events = events.filter(created_by_crew__in=crew_ids)
+        activities = activities.filter(crew__in=crew_ids)
+        crews = crews.filter(pk__in=crew_ids)
+
+    totals = {
+        crew_id: dict.fromkeys(TOTAL_FIELDS, 0) | {'last_activity_at': None}
+        for crew_id in crews.values_list('pk', flat=True)
+    }
+    role_counts = {
+        field: Count('pk', filter=Q(role=role)) for role, field in ROLE_COUNT_FIELDS.items()
+    }
+    for row in memberships.values('crew').annotate(member_count=Count('pk'), **role_counts).order_by():
+        if row['crew'] in totals:
+            totals[row['crew']].update({field: row[field] for field in ('member_count', *role_counts)})
+    for row in events.values('created_by_crew').annotate(
+        event_count=Count('pk'),
+        published_event_count=Count('pk', filter=Q(published=True)),
+    ).order_by():
+        if row['created_by_crew'] in totals:
+            totals[row['created_by_crew']].update(
+                event_count=row['event_count'], published_event_count=row['published_event_count']
+            )
+    for row in activities.values('crew').annotate(
+        activity_count=Count('pk'), last_activity_at=Max('created_at')
+    ).order_by():
+        if row['crew'] in totals:
+            totals[row['crew']].update(
+                activity_count=row['activity_count'], last_activity_at=row['last_activity_at']
+            )
+    return totals
+
+
+def refresh_crew_stats(crew_id):
+    """
+    Recount one crew's totals and write its ``CrewStats`` row.
+
+    Returns:
+        CrewStats: The updated row, or None if the crew no longer exists
+    """
+    totals = count_crew_totals([crew_id]).get(crew_id)
+    if totals is None:
+        return None
+    with transaction.atomic():
+        stats, _ = CrewStats.objects.update_or_create(crew_id=crew_id, defaults=totals)
+    return stats
+
+
+def record_crew_activity(crew_id, created_at, count=1):
+    """Count new activity rows without recounting the crew."""
+    updated = CrewStats.objects.filter(crew_id=crew_id).update(
+        activity_count=F('activity_count') + count,
+        last_activity_at=created_at,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        refresh_crew_stats(crew_id)
+
+
+def get_crew_stats_row(crew):
+    """A crew's ``CrewStats`` row, counted now if the crew has none yet."""
+    try:
+        return crew.stats
+    except CrewStats.DoesNotExist:
+        return refresh_crew_stats(crew.pk)
+
+
+def get_crew_metrics(crew):
+    """
+    The values achievement criteria are checked against.
+
+    Returns:
+        dict: ``member_count``, ``event_count`` (published events),
+        ``crew_age_days`` and ``is_verified``
+    """
+    return _crew_metrics(crew, get_crew_stats_row(crew), timezone.now())
+
+
+def get_crews_metrics(crews):
+    """
+    Achievement metrics for many crews at once.
+
+    Crews should be loaded with ``select_related('stats')``. Crews without
+    a row yet are counted together with ``count_crew_totals``.
+
+    Args:
+        crews (list): Crews to read
+
+    Returns:
+        dict: ``{crew_id: metrics}`` as returned by ``get_crew_metrics``
+    """
+    rows = {}
+    missing = []
+    for crew in crews:
+        try:
+            rows[crew.pk] = crew.stats
+        except CrewStats.DoesNotExist:
+            missing.append(crew.pk)
+    if missing:
+        created = [
+            CrewStats(crew_id=crew_id, **totals) for crew_id, totals in count_crew_totals(missing).items()
+        ]
+        CrewStats.objects.bulk_create(created, ignore_conflicts=True)
+        rows.update((stats.crew_id, stats) for stats in created)
+
+    now = timezone.now()
+    return {crew.pk: _crew_metrics(crew, rows[crew.pk], now) for crew in crews if crew.pk in rows}
+
+
+def _crew_metrics(crew, stats, now):
+    return {
+        'member_count': stats.member_count,
+        'event_count': stats.published_event_count,
+        'crew_age_days': (now - crew.created_at).days,
+        'is_verified': crew.is_verified,
+    }
+
+
+def count_permission_grants(crew):
+    """
+    Count the active members holding each explicit permission, in one query.
+
+    Returns:
+        dict: A count per permission field, plus ``total_members``
+    """
+    return crew.memberships.filter(is_active=True).aggregate(
+        total_members=Count('pk'),
+        **{field: Count('pk', filter=Q(**{field: True})) for field in CrewMembership.PERMISSION_FIELDS.values()}
+    )
+
+
+def crew_stats_cache_key(row, today=None):
+    """Cache key for a crew's detail page statistics, for a version of its stats row."""
+    today = today or timezone.now().date()
+    return f"crew_stats:{row.crew_id}:{row.updated_at.timestamp()}:{today.isoformat()}"
+
+
+def compute_crew_stats(crew, row=None):
+    """
+    Build the statistics shown on the crew detail page.
+
+    Totals come from the crew's ``CrewStats`` row. Counts relative to today
+    are one aggregate each over memberships, events and activity.
+
+    Args:
+        crew (Crew): The crew to count
+        row (CrewStats): The crew's stats row, read when not given
+
+    Returns:
+        dict: The ``crew_stats`` context of the crew detail page
+    """
+    now = timezone.now()
+    today = now.date()
+    row = row or get_crew_stats_row(crew)
+
+    stats = {
+        'total_members': row.member_count,
+        'owner_count': row.owner_count,
+        'admin_count': row.admin_count,
+        'member_count': row.regular_member_count,
+        'total_events': row.event_count,
+        'published_events': row.published_event_count,
+        'total_activity_count': row.activity_count,
+    }
+    stats.update(crew.memberships.filter(is_active=True).aggregate(
+        members_this_month=Count('pk', filter=Q(joined_at__gte=now - timedelta(days=30))),
+        members_this_year=Count('pk', filter=Q(joined_at__gte=now - timedelta(days=365))),
+    ))
+    stats.update(Event.objects.filter(created_by_crew=crew).aggregate(
+        upcoming_events=Count('pk', filter=Q(start_date__gte=today)),
+        events_this_year=Count('pk', filter=Q(start_date__gte=today.replace(month=1, day=1))),
+    ))
+    stats['past_events'] = stats['total_events'] - stats['upcoming_events']
+    stats['recent_activity_count'] = CrewActivity.objects.filter(
+        crew=crew, created_at__gte=now - timedelta(days=7)
+    ).count() if row.last_activity_at and row.last_activity_at >= now - timedelta(days=7) else 0
+
+    # Engagement metrics
+    stats['crew_age_days'] = (today - crew.created_at.date()).days
+    stats['avg_events_per_month'] = 0
+    if stats['crew_age_days'] > 0:
+        months_active = max(1, stats['crew_age_days'] / 30.44)  # Average days per month
+        stats['avg_events_per_month'] = round(stats['total_events'] / months_active, 1)
+
+    # A crew is "active" when something happened recently
+    stats['is_active_crew'] = (
+        stats['recent_activity_count'] > 0 or
+        stats['upcoming_events'] > 0 or
+        stats['members_this_month'] > 0
+    )
+
+    # Member role breakdown for chart/display
+    total_members = stats['total_members']
+    stats['role_breakdown'] = [
+        {
+            'role': role,
+            'count': stats[key],
+            'percentage': round((stats[key] / total_members) * 100, 1) if total_members else 0,
+        }
+        for role, key in (('Owner', 'owner_count'), ('Admin', 'admin_count'), ('Member', 'member_count'))
+    ]
+    return stats
+
+
+def get_crew_stats(crew):
+    """A crew's detail page statistics, from the cache when they are there."""
+    row = get_crew_stats_row(crew)
+    key = crew_stats_cache_key(row)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_crew_stats(crew, row)
+        cache.set(key, stats, CREW_STATS_CACHE_TIMEOUT)
+    return stats
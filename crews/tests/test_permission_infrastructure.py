@@ -415,3 +415,60 @@ class PermissionMixinsTestCase(TestCase):
         
         delegate_mixin = CrewDelegatePermissionMixin()
         self.assertEqual(delegate_mixin.required_crew_permission, 'delegate')
+
+
+class CrewPermissionResolverTestCase(TestCase):
+    """Test cases for the request-scoped permission resolver."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.factory = RequestFactory()
+        
+        self.member = User.objects.create_user('member', 'member@test.com', 'password')
+        self.crew = Crew.objects.create(name='Test Crew', slug='test-crew')
+        self.other_crew = Crew.objects.create(name='Other Crew', slug='other-crew')
+        
+        CrewMembership.objects.create(
+            crew=self.crew, user=self.member, role='MEMBER', can_create_events=True
+        )
+        CrewMembership.objects.create(
+            crew=self.other_crew, user=self.member, role='ADMIN', is_active=False
+        )
+    
+    def test_memberships_loaded_once(self):
+        """Test every check after the first is answered without a query."""
+        from crews.permissions import CrewPermissionResolver
+        
+        resolver = CrewPermissionResolver(self.member)
+        with self.assertNumQueries(1):
+            self.assertTrue(resolver.has_permission(self.crew, 'create'))
+            self.assertFalse(resolver.has_permission('test-crew', 'publish'))
+            self.assertEqual(resolver.membership(self.crew.pk).crew, self.crew)
+            self.assertIsNone(resolver.membership(self.other_crew))
+            self.assertFalse(resolver.permissions('other-crew')['manage_crew'])
+    
+    def test_decorator_uses_request_resolver(self):
+        """Test the decorator and the view share one membership query."""
+        from crews.permissions import get_crew_permissions
+        
+        @crew_permission_required('create')
+        def test_view(request, crew_slug):
+            return get_crew_permissions(request).membership(crew_slug)
+        
+        request = self.factory.get('/test/')
+        request.user = self.member
+        
+        with self.assertNumQueries(1):
+            membership = test_view(request, crew_slug='test-crew')
+        self.assertEqual(membership.crew, self.crew)
+    
+    def test_denial_needs_no_second_lookup(self):
+        """Test a denied check raises from the loaded membership."""
+        from crews.permissions import CrewPermissionResolver
+        
+        resolver = CrewPermissionResolver(self.member)
+        with self.assertNumQueries(1):
+            with self.assertRaises(InsufficientPermissionError):
+                require_crew_permission(self.member, 'test-crew', 'publish', resolver=resolver)
+            with self.assertRaises(CrewNotFoundError):
+                check_crew_permission(self.member, 'other-crew', 'create', resolver=resolver)
@@ -7,7 +7,7 @@ including permission checking, delegation, and role-based access.
 
 from django.test import TestCase
 from django.contrib.auth.models import User
-from crews.models import Crew, CrewMembership, CrewActivity
+from crews.models import Crew, CrewMembership, CrewActivity, PermissionAuditEntry
 
 
 class CrewPermissionsTestCase(TestCase):
@@ -189,35 +189,137 @@ class CrewPermissionsTestCase(TestCase):
         self.assertFalse(summary['delegate'])
         self.assertFalse(summary['role_based'])
     
-    def test_activity_logging(self):
-        """Test that permission changes are logged as activities."""
+    def test_permission_audit_logging(self):
+        """Test that permission changes are recorded in the audit log."""
         initial_activity_count = CrewActivity.objects.count()
         
         # Grant a permission
-        self.member_membership.grant_permission('create', self.owner)
-        
-        # Check that activity was logged
-        self.assertEqual(CrewActivity.objects.count(), initial_activity_count + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member_membership.grant_permission('create', self.owner)
         
-        activity = CrewActivity.objects.latest('created_at')
-        self.assertEqual(activity.crew, self.crew)
-        self.assertEqual(activity.user, self.owner)
-        self.assertEqual(activity.target_user, self.member)
-        self.assertIn('create', activity.description)
-        self.assertEqual(activity.metadata['permission_type'], 'create')
-        self.assertEqual(activity.metadata['action'], 'granted')
+        entry = PermissionAuditEntry.objects.get()
+        self.assertEqual(entry.crew, self.crew)
+        self.assertEqual(entry.actor, self.owner)
+        self.assertEqual(entry.target, self.member)
+        self.assertEqual((entry.permissions_before, entry.permissions_after), (0, 1))
         
         # Revoke a permission
-        self.member_membership.revoke_permission('create', self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member_membership.revoke_permission('create', self.admin)
+        
+        entry = PermissionAuditEntry.objects.latest('created_at')
+        self.assertEqual(entry.actor, self.admin)
+        self.assertEqual((entry.permissions_before, entry.permissions_after), (1, 0))
+        
+        # Granting a permission already held records nothing
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member_membership.revoke_permission('create', self.admin)
+        self.assertEqual(PermissionAuditEntry.objects.count(), 2)
+        self.assertEqual(CrewActivity.objects.count(), initial_activity_count)
+    
+    def test_rolled_back_change_not_audited(self):
+        """Test audit entries are dropped with a rolled-back permission change."""
+        from django.db import transaction
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.member_membership.grant_permission('create', self.owner)
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+        self.assertFalse(PermissionAuditEntry.objects.exists())
+    
+    def test_permission_holders_at(self):
+        """Test point-in-time permission queries read the latest entry per member."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from crews.audit import permission_holders_at, seed_permission_audit
+        
+        # Memberships from before the log get a starting entry
+        self.assertEqual(seed_permission_audit(), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member_membership.grant_permission('publish', self.owner)
+            self.event_manager_membership.grant_permission('publish', self.owner)
+            new_admin = CrewMembership.objects.create(crew=self.crew, user=self.outsider, role='ADMIN')
+        PermissionAuditEntry.objects.update(created_at=timezone.now() - timedelta(days=10))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member_membership.revoke_permission('publish', self.owner)
+            self.admin_membership.role = 'MEMBER'
+            self.admin_membership.save()
+            new_admin.is_active = False
+            new_admin.save()
+            self.event_manager_membership.delete()
+        
+        self.assertEqual(
+            permission_holders_at(self.crew, 'publish', timezone.now() - timedelta(days=5)),
+            {self.owner.pk, self.admin.pk, self.member.pk, self.event_manager.pk, self.outsider.pk}
+        )
+        self.assertEqual(permission_holders_at(self.crew, 'publish', timezone.now()), {self.owner.pk})
+        self.assertEqual(permission_holders_at(self.crew, 'create', timezone.now() - timedelta(days=20)), set())
+        self.assertEqual(seed_permission_audit(), 0)
+        
+        # A deleted user's entries go with them
+        with self.captureOnCommitCallbacks(execute=True):
+            self.outsider.delete()
+        self.assertFalse(PermissionAuditEntry.objects.filter(target_id=new_admin.user_id).exists())
+    
+    def test_permission_mask_folds_in_role(self):
+        """Test the stored mask holds role defaults and explicit grants."""
+        self.assertEqual(self.owner_membership.permission_mask, CrewMembership.ALL_PERMISSIONS)
+        self.assertEqual(self.admin_membership.permission_mask, CrewMembership.ALL_PERMISSIONS)
+        self.assertEqual(self.member_membership.permission_mask, 0)
         
-        # Check that revocation was logged
-        self.assertEqual(CrewActivity.objects.count(), initial_activity_count + 2)
+        self.member_membership.grant_permission('publish', self.owner)
+        self.member_membership.refresh_from_db()
+        self.assertEqual(self.member_membership.permission_mask, CrewMembership.PERMISSION_BITS['publish'])
         
-        activity = CrewActivity.objects.latest('created_at')
-        self.assertEqual(activity.user, self.admin)
-        self.assertEqual(activity.target_user, self.member)
-        self.assertIn('create', activity.description)
-        self.assertEqual(activity.metadata['action'], 'revoked')
+        self.assertEqual(
+            set(self.crew.members_with_permission('publish')),
+            {self.owner, self.admin, self.member}
+        )
+        self.assertEqual(set(self.crew.members_with_permission('delegate')), {self.owner, self.admin})
+    
+    def test_permission_mask_expression(self):
+        """Test queryset updates resolve masks in SQL like save() does."""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        CrewMembership.objects.update(permission_mask=0)
+        call_command('resolve_permission_masks', stdout=StringIO())
+        self.admin_membership.refresh_from_db()
+        self.assertEqual(self.admin_membership.permission_mask, CrewMembership.ALL_PERMISSIONS)
+        
+        CrewMembership.objects.filter(crew=self.crew).update(
+            can_edit_events=True,
+            permission_mask=CrewMembership.permission_mask_expression(can_edit_events=True),
+        )
+        for membership in CrewMembership.objects.filter(crew=self.crew):
+            self.assertEqual(membership.permission_mask, membership.resolve_permission_mask())
+    
+    def test_stale_mask_keeps_role_permissions(self):
+        """Test permission checks ignore a mask that has not been backfilled."""
+        from django.apps import apps
+        from django.db.migrations import Migration
+        from django.db.models.signals import post_migrate
+        
+        CrewMembership.objects.update(permission_mask=0)
+        self.owner_membership.refresh_from_db()
+        self.assertTrue(self.owner_membership.has_event_permission('publish'))
+        
+        crews_config = apps.get_app_config('crews')
+        
+        # Migrates that did not move crews forward leave the masks alone
+        post_migrate.send(sender=crews_config, app_config=crews_config, plan=None)
+        post_migrate.send(
+            sender=crews_config, app_config=crews_config, plan=[(Migration('0001_initial', 'crews'), True)]
+        )
+        self.assertEqual(set(self.crew.members_with_permission('delegate')), set())
+        
+        post_migrate.send(
+            sender=crews_config, app_config=crews_config, plan=[(Migration('0001_initial', 'crews'), False)]
+        )
+        self.assertEqual(set(self.crew.members_with_permission('delegate')), {self.owner, self.admin})
     
     def test_inactive_member_permissions(self):
         """Test that inactive members have no permissions."""
@@ -253,3 +355,74 @@ class CrewPermissionsTestCase(TestCase):
         self.member_membership.save()
         membership = self.crew.get_user_membership(self.member)
         self.assertIsNone(membership)
+
+
+class BulkPermissionViewsTestCase(TestCase):
+    """Test cases for the bulk permission views."""
+    
+    def setUp(self):
+        """Set up a crew with an owner and a batch of members."""
+        self.owner = User.objects.create_user('owner', 'owner@test.com', 'password')
+        self.crew = Crew.objects.create(name='Test Crew', slug='test-crew')
+        CrewMembership.objects.create(crew=self.crew, user=self.owner, role='OWNER')
+        self.memberships = [
+            CrewMembership.objects.create(
+                crew=self.crew,
+                user=User.objects.create_user(f'member{index}', password='password'),
+                role='MEMBER',
+                can_publish_events=index == 0
+            )
+            for index in range(5)
+        ]
+        self.client.login(username='owner', password='password')
+    
+    def test_bulk_grant_is_one_update(self):
+        """Test a bulk grant updates only members whose permission differs."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('crews:bulk_permissions', args=[self.crew.slug]), {
+                'members': [membership.pk for membership in self.memberships],
+                'action': 'grant',
+                'permission_type': 'can_publish_events',
+            })
+        self.assertEqual(response.status_code, 302)
+        
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "crews_crewmembership"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            CrewMembership.objects.filter(crew=self.crew, role='MEMBER', can_publish_events=True).count(), 5
+        )
+        activity = CrewActivity.objects.get(activity_type='BULK_PERMISSIONS_UPDATED')
+        self.assertIn('for 4 members', activity.description)
+        
+        inserts = [q for q in queries.captured_queries if 'INSERT INTO "crews_permissionauditentry"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(PermissionAuditEntry.objects.values_list('permissions_before', 'permissions_after')), {(0, 4)}
+        )
+        self.assertEqual(PermissionAuditEntry.objects.count(), 4)
+        self.assertEqual(
+            set(self.crew.members_with_permission('publish')),
+            {self.owner, *(membership.user for membership in self.memberships)}
+        )
+    
+    def test_toggle_returns_aggregated_stats(self):
+        """Test a toggle reports permission counts from one aggregate."""
+        from django.urls import reverse
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('crews:ajax_toggle_permission', args=[self.crew.slug]), {
+                'member_id': self.memberships[1].pk,
+                'permission_type': 'can_publish_events',
+            })
+        data = response.json()
+        self.assertTrue(data['new_value'])
+        self.assertEqual(data['permission_stats']['can_publish_events'], 2)
+        self.assertEqual(data['permission_stats']['can_create_events'], 0)
+        self.assertEqual(data['permission_stats']['total_members'], 6)
+        entry = PermissionAuditEntry.objects.get()
+        self.assertEqual((entry.actor, entry.target), (self.owner, self.memberships[1].user))
+        self.assertFalse(CrewActivity.objects.filter(activity_type='PERMISSION_TOGGLED').exists())
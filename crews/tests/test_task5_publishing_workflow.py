@@ -228,6 +228,60 @@ class PublishingWorkflowTestCase(TestCase):
             self.assertTrue(hasattr(event, 'user_can_publish'))
 
 
+    def _add_events(self, count):
+        """Create more crew events, organised by the owner."""
+        first = Event.objects.count()
+        for index in range(first, first + count):
+            Event.objects.create(
+                title=f'Extra Event {index}',
+                slug=f'extra-event-{index}',
+                start_date='2030-01-01' if index % 2 else '2020-01-01',
+                event_type='Race',
+                skill_level='INTERMEDIATE',
+                organizer=self.owner.profile,
+                location=self.location,
+                created_by_crew=self.crew,
+            )
+
+    def test_authorize_events_single_query(self):
+        """Test event permissions for a list of events use one membership query."""
+        from crews.permissions import authorize_events
+        
+        self._add_events(4)
+        events = list(Event.objects.filter(created_by_crew=self.crew).select_related('organizer'))
+        
+        with self.assertNumQueries(1):
+            permissions = authorize_events(self.member_with_publish, events)
+        for event in events:
+            self.assertEqual(permissions[event.pk], {'manage': False, 'publish': True})
+        
+        with self.assertNumQueries(0):
+            owner_permissions = authorize_events(self.owner, events)
+        self.assertTrue(all(p['manage'] and p['publish'] for p in owner_permissions.values()))
+
+    def test_crew_detail_query_count_constant(self):
+        """Test crew detail does not query per event for permissions."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        from django.core.cache import cache
+        
+        self.client.login(username='member_edit', password='test123')
+        url = reverse('crews:detail', args=[self.crew.slug])
+        self.client.get(url)
+        
+        cache.clear()
+        with CaptureQueriesContext(connection) as few_events:
+            response = self.client.get(url)
+        self._add_events(6)
+        cache.clear()
+        with CaptureQueriesContext(connection) as many_events:
+            response = self.client.get(url)
+        
+        self.assertEqual(len(many_events), len(few_events))
+        self.assertTrue(all(event.user_can_manage for event in response.context['upcoming_events']))
+        self.assertFalse(any(event.user_can_publish for event in response.context['past_events']))
+
 if __name__ == '__main__':
     import django
     from django.conf import settings
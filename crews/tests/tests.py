@@ -1,3 +1,345 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from crews.models import Crew, CrewActivity, CrewMembership, CrewStats
+from crews.models_achievements import AchievementTemplate
+from crews.stats import crew_stats_cache_key, get_crew_metrics, get_crew_stats
+from events.models import Event, Location
+
+
+class CrewStatsTestCase(TestCase):
+    """Test cases for cached crew statistics."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.owner = User.objects.create_user('owner', 'owner@test.com', 'password')
+        self.member = User.objects.create_user('member', 'member@test.com', 'password')
+        self.crew = Crew.objects.create(name='Test Crew', slug='test-crew')
+        CrewMembership.objects.create(crew=self.crew, user=self.owner, role='OWNER')
+        self.location = Location.objects.create(location_title='Hill', city='Town', country='US')
+
+    def _create_event(self, slug, start_date, published=False):
+        return Event.objects.create(
+            title=slug, slug=slug, start_date=start_date, event_type='Race',
+            skill_level='INTERMEDIATE', organizer=self.owner.profile,
+            location=self.location, created_by_crew=self.crew, published=published
+        )
+
+    def _stats(self):
+        """Detail page statistics for a freshly loaded crew, as a new request sees it."""
+        return get_crew_stats(Crew.objects.get(pk=self.crew.pk))
+
+    def test_stats_counted_in_three_queries(self):
+        """Test counts relative to today are one aggregate each over the stats row."""
+        CrewMembership.objects.create(crew=self.crew, user=self.member, role='MEMBER')
+        self._create_event('upcoming', '2099-01-01', published=True)
+        self._create_event('past', '2001-01-01')
+        CrewActivity.objects.create(crew=self.crew, user=self.owner, activity_type='CREW_UPDATED')
+
+        crew = Crew.objects.select_related('stats').get(pk=self.crew.pk)
+        with self.assertNumQueries(3):
+            stats = get_crew_stats(crew)
+        with self.assertNumQueries(0):
+            get_crew_stats(crew)
+
+        self.assertEqual(stats['total_members'], 2)
+        self.assertEqual(stats['owner_count'], 1)
+        self.assertEqual(stats['member_count'], 1)
+        self.assertEqual(stats['total_events'], 2)
+        self.assertEqual(stats['upcoming_events'], 1)
+        self.assertEqual(stats['past_events'], 1)
+        self.assertEqual(stats['published_events'], 1)
+        self.assertEqual(stats['total_activity_count'], 1)
+        self.assertTrue(stats['is_active_crew'])
+        self.assertEqual(stats['role_breakdown'][0]['percentage'], 50.0)
+
+    def test_signals_invalidate_cached_stats(self):
+        """Test membership, event and activity changes drop the cached stats."""
+        self.assertEqual(self._stats()['total_members'], 1)
+
+        membership = CrewMembership.objects.create(crew=self.crew, user=self.member, role='MEMBER')
+        self.assertEqual(self._stats()['total_members'], 2)
+
+        event = self._create_event('upcoming', '2099-01-01')
+        self.assertEqual(self._stats()['total_events'], 1)
+
+        CrewActivity.objects.create(crew=self.crew, user=self.owner, activity_type='CREW_UPDATED')
+        self.assertEqual(self._stats()['total_activity_count'], 1)
+
+        event.delete()
+        membership.delete()
+        stats = self._stats()
+        self.assertEqual((stats['total_members'], stats['total_events']), (1, 0))
+
+    def test_cached_stats_keyed_on_row_version(self):
+        """Test a write elsewhere is seen without deleting this process's entry."""
+        row = CrewStats.objects.get(crew=self.crew)
+        self.assertEqual(self._stats()['total_members'], 1)
+
+        CrewMembership.objects.create(crew=self.crew, user=self.member, role='MEMBER')
+        # The old entry, as other workers hold it, is left alone but no longer read
+        self.assertIsNotNone(cache.get(crew_stats_cache_key(row)))
+        self.assertEqual(self._stats()['total_members'], 2)
+
+    def test_event_moved_between_crews(self):
+        """Test reassigning an event recounts the crew it left."""
+        other = Crew.objects.create(name='Other Crew', slug='other-crew')
+        event = self._create_event('moved', '2099-01-01')
+        self.assertEqual(self._stats()['total_events'], 1)
+
+        event.created_by_crew = other
+        event.save()
+        self.assertEqual(self._stats()['total_events'], 0)
+        self.assertEqual(CrewStats.objects.get(crew=other).event_count, 1)
+
+    def test_stats_row_follows_writes(self):
+        """Test the CrewStats row is rewritten by membership, event and activity writes."""
+        membership = CrewMembership.objects.create(crew=self.crew, user=self.member, role='ADMIN')
+        event = self._create_event('upcoming', '2099-01-01')
+        CrewActivity.objects.create(crew=self.crew, user=self.owner, activity_type='CREW_UPDATED')
+
+        stats = CrewStats.objects.get(crew=self.crew)
+        self.assertEqual((stats.member_count, stats.owner_count, stats.admin_count), (2, 1, 1))
+        self.assertEqual((stats.event_count, stats.published_event_count), (1, 0))
+        self.assertEqual(stats.activity_count, 1)
+        self.assertIsNotNone(stats.last_activity_at)
+
+        event.published = True
+        event.save()
+        membership.is_active = False
+        membership.save()
+        stats.refresh_from_db()
+        self.assertEqual((stats.member_count, stats.admin_count, stats.published_event_count), (1, 0, 1))
+
+        self.crew.delete()
+        self.assertFalse(CrewStats.objects.exists())
+
+    def test_reconcile_repairs_drift(self):
+        """Test the nightly command recounts rows changed behind the signals' back."""
+        CrewMembership.objects.filter(crew=self.crew).update(is_active=False)
+        other = Crew.objects.create(name='Other Crew', slug='other-crew')
+        CrewStats.objects.filter(crew=other).delete()
+
+        output = StringIO()
+        call_command('reconcile_crew_stats', '--dry-run', stdout=output)
+        self.assertIn('Would repair 1 drifted and 1 missing rows', output.getvalue())
+        self.assertEqual(CrewStats.objects.get(crew=self.crew).member_count, 1)
+
+        call_command('reconcile_crew_stats', stdout=StringIO())
+        self.assertEqual(CrewStats.objects.get(crew=self.crew).member_count, 0)
+        self.assertEqual(CrewStats.objects.get(crew=other).member_count, 0)
+
+    def test_achievement_metrics_read_stats_row(self):
+        """Test achievement checks read published events from the stats row."""
+        self._create_event('draft', '2099-01-01')
+        self._create_event('published', '2099-01-02', published=True)
+        template = AchievementTemplate.objects.create(
+            title='Event Starter', description='First event', achievement_type='EVENT_MILESTONE',
+            level='BRONZE', criteria={'min_events': 1, 'min_members': 1}
+        )
+        crew = Crew.objects.select_related('stats').get(pk=self.crew.pk)
+
+        with self.assertNumQueries(0):
+            metrics = get_crew_metrics(crew)
+            self.assertTrue(template.check_crew_eligibility(crew, metrics))
+        self.assertEqual((metrics['member_count'], metrics['event_count']), (1, 1))
+
+
+class AchievementEvaluatorTestCase(TestCase):
+    """Test cases for triggered achievement evaluation."""
+
+    def setUp(self):
+        """Set up test data."""
+        from crews.utils_achievements import invalidate_achievement_evaluator
+
+        invalidate_achievement_evaluator()
+        self.owner = User.objects.create_user('owner', 'owner@test.com', 'password')
+        self.member = User.objects.create_user('member', 'member@test.com', 'password')
+        self.crew = Crew.objects.create(name='Test Crew', slug='test-crew')
+        self.location = Location.objects.create(location_title='Hill', city='Town', country='US')
+        for title, criteria in [
+            ('First Steps', {'min_members': 1}),
+            ('Growing Strong', {'min_members': 2}),
+            ('Event Starter', {'min_events': 1}),
+            ('Established', {'min_age_days': 365}),
+        ]:
+            AchievementTemplate.objects.create(
+                title=title, description=title, achievement_type='SPECIAL',
+                level='BRONZE', criteria=criteria
+            )
+
+    def test_evaluator_indexes_templates_by_criterion(self):
+        """Test a trigger only checks the templates using its criterion."""
+        from crews.utils_achievements import get_achievement_evaluator
+
+        evaluator = get_achievement_evaluator()
+        self.assertEqual(
+            {t.title for t in evaluator.candidates(['min_members'])}, {'First Steps', 'Growing Strong'}
+        )
+        metrics = {'member_count': 1, 'event_count': 5, 'crew_age_days': 0, 'is_verified': False}
+        self.assertEqual(
+            [t.title for t in evaluator.eligible(metrics, {'Event Starter'})], ['First Steps']
+        )
+
+    def test_membership_change_awards_in_bulk(self):
+        """Test joining members awards member milestones with activity rows."""
+        with self.captureOnCommitCallbacks(execute=True):
+            CrewMembership.objects.create(crew=self.crew, user=self.owner, role='OWNER')
+            CrewMembership.objects.create(crew=self.crew, user=self.member, role='MEMBER')
+
+        self.assertEqual(
+            set(self.crew.achievements.values_list('title', flat=True)), {'First Steps', 'Growing Strong'}
+        )
+        activities = CrewActivity.objects.filter(crew=self.crew, metadata__auto_awarded=True)
+        self.assertEqual(activities.count(), 2)
+        self.assertTrue(all(activity.user == self.owner for activity in activities))
+        self.assertEqual(CrewStats.objects.get(crew=self.crew).activity_count, 2)
+
+    def test_event_publish_awards_event_milestone(self):
+        """Test only a published event counts towards event milestones."""
+        CrewMembership.objects.create(crew=self.crew, user=self.owner, role='OWNER')
+        with self.captureOnCommitCallbacks(execute=True):
+            event = Event.objects.create(
+                title='Draft', slug='draft', event_type='Race', skill_level='INTERMEDIATE',
+                organizer=self.owner.profile, location=self.location, created_by_crew=self.crew
+            )
+        self.assertFalse(self.crew.achievements.filter(title='Event Starter').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.published = True
+            event.save()
+        achievement = self.crew.achievements.get(title='Event Starter')
+        self.assertEqual(achievement.criteria_met['event_count'], 1)
+
+    def test_award_conflicts_keep_other_awards(self):
+        """Test an achievement another process awarded first only skips that one."""
+        from crews.models_achievements import CrewAchievement
+        from crews.utils_achievements import award_achievements
+
+        other = Crew.objects.create(name='Other Crew', slug='other-crew')
+        CrewMembership.objects.create(crew=self.crew, user=self.owner, role='OWNER')
+        CrewMembership.objects.create(crew=other, user=self.member, role='OWNER')
+        first_steps = AchievementTemplate.objects.get(title='First Steps')
+        growing = AchievementTemplate.objects.get(title='Growing Strong')
+        CrewAchievement.objects.filter(crew__in=[self.crew, other]).delete()
+        CrewAchievement.objects.create(
+            crew=self.crew, title='First Steps', description='Raced', achievement_type='SPECIAL'
+        )
+
+        with self.assertLogs('crews.utils_achievements', 'WARNING'):
+            awarded = award_achievements([
+                (self.crew, {}, [first_steps, growing]),
+                (other, {}, [first_steps]),
+            ])
+        self.assertEqual(
+            sorted((a.crew_id, a.title) for a in awarded),
+            [(self.crew.pk, 'Growing Strong'), (other.pk, 'First Steps')]
+        )
+        self.assertEqual(CrewActivity.objects.filter(metadata__auto_awarded=True).count(), 2)
+
+    def test_nightly_sweep_awards_time_based_achievements(self):
+        """Test the sweep awards age milestones across crews in bulk, and --dry-run writes nothing."""
+        from datetime import timedelta
+        from django.utils import timezone
+
+        other = Crew.objects.create(name='Other Crew', slug='other-crew')
+        CrewMembership.objects.create(crew=self.crew, user=self.owner, role='OWNER')
+        CrewMembership.objects.create(crew=other, user=self.member, role='OWNER')
+        Crew.objects.filter(pk=self.crew.pk).update(created_at=timezone.now() - timedelta(days=400))
+
+        output = StringIO()
+        call_command('sweep_crew_achievements', '--dry-run', stdout=output)
+        self.assertIn('Would award 3 achievements to 2 crews', output.getvalue())
+        self.assertFalse(self.crew.achievements.exists())
+
+        output = StringIO()
+        call_command('sweep_crew_achievements', stdout=output)
+        self.assertIn('Awarded 3 achievements to 2 crews', output.getvalue())
+        self.assertEqual(
+            set(self.crew.achievements.values_list('title', flat=True)), {'First Steps', 'Established'}
+        )
+        self.assertEqual(list(other.achievements.values_list('title', flat=True)), ['First Steps'])
+        self.assertEqual(CrewStats.objects.get(crew=self.crew).activity_count, 2)
+
+        output = StringIO()
+        call_command('sweep_crew_achievements', stdout=output)
+        self.assertIn('Awarded 0 achievements to 0 crews', output.getvalue())
+
+
+class CrewMatesTestCase(TestCase):
+    """Test cases for crew-mate lookups behind CREWS profile visibility."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.viewer = User.objects.create_user('viewer', 'viewer@test.com', 'password')
+        self.mate = User.objects.create_user('mate', 'mate@test.com', 'password')
+        self.stranger = User.objects.create_user('stranger', 'stranger@test.com', 'password')
+        for user in (self.mate, self.stranger):
+            user.profile.profile_visibility = 'CREWS'
+            user.profile.save()
+        self.crew = Crew.objects.create(name='Test Crew', slug='test-crew')
+        CrewMembership.objects.create(crew=self.crew, user=self.viewer, role='OWNER')
+        self.membership = CrewMembership.objects.create(crew=self.crew, user=self.mate, role='MEMBER')
+        CrewMembership.objects.create(
+            crew=Crew.objects.create(name='Other Crew', slug='other-crew'), user=self.stranger, role='PENDING'
+        )
+
+    def test_crew_mates_cached_and_invalidated(self):
+        """Test crew mates are cached under a version that moves when a membership changes."""
+        from crews.crewmates import crew_mates_cache_key, get_crew_mate_ids
+
+        with self.assertNumQueries(2):
+            self.assertEqual(get_crew_mate_ids(self.viewer), {self.mate.pk})
+        with self.assertNumQueries(1):
+            get_crew_mate_ids(self.viewer)
+
+        # A pending invitation does not make someone a crew mate
+        CrewMembership.objects.create(crew=self.crew, user=self.stranger, role='PENDING')
+        self.assertEqual(get_crew_mate_ids(self.viewer), {self.mate.pk})
+
+        # Nothing is deleted from the cache, so the old set stays there as it
+        # would in another process's cache, but it is no longer read
+        old_key = crew_mates_cache_key(
+            self.viewer.pk, list(Crew.objects.filter(pk=self.crew.pk).values_list('pk', 'updated_at'))
+        )
+        self.membership.is_active = False
+        self.membership.save()
+        self.assertEqual(cache.get(old_key), {self.mate.pk})
+        self.assertEqual(get_crew_mate_ids(self.viewer), set())
+        self.assertEqual(get_crew_mate_ids(self.mate), set())
+
+        self.membership.is_active = True
+        self.membership.save()
+        self.assertEqual(get_crew_mate_ids(self.viewer), {self.mate.pk})
+
+        # An inactive crew makes no one crew mates
+        self.crew.is_active = False
+        self.crew.save()
+        self.assertEqual(get_crew_mate_ids(self.viewer), set())
+
+        self.crew.delete()
+        self.assertEqual(get_crew_mate_ids(self.stranger), set())
+
+    def test_crews_visibility_profiles(self):
+        """Test CREWS profiles are shown to crew mates only, singly and in lists."""
+        from django.urls import reverse
+        from profiles.views import ProfilePrivacyManager
+
+        self.assertTrue(ProfilePrivacyManager(self.mate.profile, self.viewer).can_view_profile())
+        self.assertFalse(ProfilePrivacyManager(self.stranger.profile, self.viewer).can_view_profile())
+
+        self.client.login(username='viewer', password='password')
+        response = self.client.get(reverse('profiles:users_list'))
+        usernames = [profile.user.username for profile in response.context['page_obj']]
+        self.assertIn('mate', usernames)
+        self.assertNotIn('stranger', usernames)
+
+        self.client.logout()
+        response = self.client.get(reverse('profiles:users_list'))
+        self.assertNotIn('mate', [profile.user.username for profile in response.context['page_obj']])
@@ -1,67 +1,199 @@
 """
 Utility functions for crew achievements system.
+
+Achievement templates are checked against a crew's metrics (see
+``get_crew_metrics``), read once from its ``CrewStats`` row. Templates are
+indexed by the criteria they use, so a trigger such as a new member only
+checks the templates with a ``min_members`` criterion. Everything a crew
+newly qualifies for is awarded with one ``bulk_create`` of achievements and
+one of activity rows.
 """
-from django.utils import timezone
+import logging
+import time
+from collections import defaultdict
+
 from django.db import transaction
+from django.utils import timezone
+
 from .models_achievements import AchievementTemplate, CrewAchievement
-from .models import CrewActivity
+from .models import CrewActivity, CrewMembership
+from .stats import get_crew_metrics, record_crew_activity
+
+logger = logging.getLogger(__name__)
+
+# Achievement criteria and the crew metric each one is checked against
+CRITERION_METRICS = {
+    'min_members': 'member_count',
+    'min_events': 'event_count',
+    'min_age_days': 'crew_age_days',
+    'requires_verification': 'is_verified',
+}
+
+# Seconds the loaded templates are trusted. Template saves in this process
+# invalidate immediately; the TTL bounds staleness in other workers.
+TEMPLATE_CACHE_TTL = 300
+
+_evaluator_cache = {}
+
+
+class AchievementEvaluator:
+    """Active achievement templates, indexed by the criteria they check."""
+    
+    def __init__(self, templates):
+        self.templates = list(templates)
+        self.by_criterion = defaultdict(list)
+        for template in self.templates:
+            for criterion in CRITERION_METRICS:
+                if template.criteria.get(criterion):
+                    self.by_criterion[criterion].append(template)
+    
+    def candidates(self, criteria=None):
+        """Templates that check any of the criteria; every template when None."""
+        if criteria is None:
+            return self.templates
+        templates = {}
+        for criterion in criteria:
+            for template in self.by_criterion.get(criterion, ()):
+                templates[template.pk] = template
+        return list(templates.values())
+    
+    def eligible(self, metrics, earned_titles, criteria=None):
+        """
+        Templates a crew qualifies for but has not earned.
+        
+        Args:
+            metrics (dict): The crew's values from ``get_crew_metrics``
+            earned_titles (set): Titles of the crew's achievements
+            criteria (iterable): Only check templates using these criteria
+            
+        Returns:
+            list: ``AchievementTemplate`` instances to award
+        """
+        return [
+            template for template in self.candidates(criteria)
+            if template.title not in earned_titles and template.check_crew_eligibility(None, metrics)
+        ]
+
+
+def get_achievement_evaluator():
+    """The evaluator for the active templates, reloaded after ``TEMPLATE_CACHE_TTL`` seconds."""
+    cached = _evaluator_cache.get('evaluator')
+    if cached is not None and time.monotonic() - cached[0] < TEMPLATE_CACHE_TTL:
+        return cached[1]
+    
+    evaluator = AchievementEvaluator(AchievementTemplate.objects.filter(is_active=True))
+    _evaluator_cache['evaluator'] = (time.monotonic(), evaluator)
+    return evaluator
+
+
+def invalidate_achievement_evaluator():
+    """Drop the loaded templates so the next check reads them again."""
+    _evaluator_cache.clear()
+
+
+def award_achievements(awards, triggered_by_user=None):
+    """
+    Award templates to crews in bulk.
+    
+    Achievements another process awarded first are skipped and logged,
+    so one conflict does not lose the rest.
+    
+    Args:
+        awards (list): ``(crew, metrics, templates)`` tuples
+        triggered_by_user (User): Optional user who triggered the check;
+            activity rows are otherwise credited to each crew's owner
+        
+    Returns:
+        list: The created ``CrewAchievement`` instances
+    """
+    awards = [(crew, metrics, templates) for crew, metrics, templates in awards if templates]
+    if not awards:
+        return []
+    
+    now = timezone.now()
+    achievements = [
+        CrewAchievement(
+            crew=crew,
+            title=template.title,
+            description=template.description,
+            achievement_type=template.achievement_type,
+            level=template.level,
+            icon=template.icon,
+            color=template.color,
+            criteria_met={**metrics, 'awarded_at': now.isoformat()},
+        )
+        for crew, metrics, templates in awards
+        for template in templates
+    ]
+    
+    actors = {}
+    if triggered_by_user is None:
+        for crew_id, user_id in CrewMembership.objects.filter(
+            crew__in=[crew for crew, _, _ in awards], role='OWNER', is_active=True
+        ).order_by('joined_at').values_list('crew', 'user'):
+            actors.setdefault(crew_id, user_id)
+    
+    with transaction.atomic():
+        # Another process may award some of these first; those rows are skipped
+        CrewAchievement.objects.bulk_create(achievements, ignore_conflicts=True)
+        achievements = list(CrewAchievement.objects.filter(
+            crew__in=[crew for crew, _, _ in awards],
+            criteria_met__awarded_at=now.isoformat(),
+        ))
+        conflicts = sum(len(templates) for _, _, templates in awards) - len(achievements)
+        if conflicts:
+            logger.warning("Skipped %d achievements already awarded by another process", conflicts)
+        
+        # Log each achievement in crew activity
+        activities = [
+            CrewActivity(
+                crew_id=achievement.crew_id,
+                activity_type='MEMBER_PROMOTED',  # We'll reuse this for achievements
+                user_id=triggered_by_user.pk if triggered_by_user else actors[achievement.crew_id],
+                description=f"🏆 Earned achievement: {achievement.title}",
+                metadata={
+                    'achievement_id': achievement.id,
+                    'achievement_level': achievement.level,
+                    'achievement_type': achievement.achievement_type,
+                    'auto_awarded': triggered_by_user is None
+                }
+            )
+            for achievement in achievements
+            if triggered_by_user or achievement.crew_id in actors
+        ]
+        CrewActivity.objects.bulk_create(activities)
+        
+        # bulk_create skips the signals that keep CrewStats current
+        logged = defaultdict(int)
+        for activity in activities:
+            logged[activity.crew_id] += 1
+        for crew_id, count in logged.items():
+            record_crew_activity(crew_id, now, count)
+    
+    return achievements
 
 
-def check_and_award_achievements(crew, triggered_by_user=None):
+def check_and_award_achievements(crew, triggered_by_user=None, criteria=None):
     """
-    Check all achievement templates and award any that the crew now qualifies for.
+    Check achievement templates and award any that the crew now qualifies for.
     
     Args:
         crew (Crew): The crew to check achievements for
         triggered_by_user (User): Optional user who triggered the check
+        criteria (iterable): Only check templates using these criteria, e.g.
+            ``['min_members']`` after a membership change; all when None
         
     Returns:
         list: List of newly awarded achievements
     """
-    newly_awarded = []
-    
-    # Get all active achievement templates
-    templates = AchievementTemplate.objects.filter(is_active=True)
+    evaluator = get_achievement_evaluator()
+    if not evaluator.candidates(criteria):
+        return []
     
-    # Get already earned achievement titles to avoid duplicates
-    earned_titles = set(
-        crew.achievements.values_list('title', flat=True)
-    )
-    
-    for template in templates:
-        # Skip if already earned
-        if template.title in earned_titles:
-            continue
-            
-        # Check if crew meets criteria
-        if template.check_crew_eligibility(crew):
-            try:
-                with transaction.atomic():
-                    achievement, created = template.award_to_crew(crew)
-                    
-                    if created:
-                        newly_awarded.append(achievement)
-                        
-                        # Log the achievement in crew activity
-                        CrewActivity.objects.create(
-                            crew=crew,
-                            activity_type='MEMBER_PROMOTED',  # We'll reuse this for achievements
-                            user=triggered_by_user or crew.owners.first(),
-                            description=f"🏆 Earned achievement: {achievement.title}",
-                            metadata={
-                                'achievement_id': achievement.id,
-                                'achievement_level': achievement.level,
-                                'achievement_type': achievement.achievement_type,
-                                'auto_awarded': triggered_by_user is None
-                            }
-                        )
-                        
-            except Exception as e:
-                # Log error but don't break the flow
-                print(f"Error awarding achievement {template.title} to {crew.name}: {e}")
-                continue
-    
-    return newly_awarded
+    metrics = get_crew_metrics(crew)
+    earned_titles = set(crew.achievements.values_list('title', flat=True))
+    templates = evaluator.eligible(metrics, earned_titles, criteria)
+    return award_achievements([(crew, metrics, templates)], triggered_by_user)
 
 
 def award_manual_achievement(crew, achievement_title, awarded_by, custom_description=None):
@@ -140,12 +272,7 @@ def get_crew_achievement_progress(crew):
         'locked': []
     }
     
-    current_stats = {
-        'member_count': crew.member_count,
-        'event_count': crew.events.filter(is_published=True).count(),
-        'crew_age_days': (timezone.now() - crew.created_at).days,
-        'is_verified': crew.is_verified,
-    }
+    current_stats = get_crew_metrics(crew)
     
     for template in templates:
         if template.title in earned_titles:
@@ -195,7 +322,7 @@ def get_crew_achievement_progress(crew):
                 'template': template,
                 'progress_percentage': progress_pct,
                 'progress_details': progress_details,
-                'eligible': template.check_crew_eligibility(crew)
+                'eligible': template.check_crew_eligibility(crew, current_stats)
             }
             
             if achievement_data['eligible']:
@@ -9,8 +9,9 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponseForbidden
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
 from datetime import timedelta
+from .audit import record_permission_changes
 from .models import Crew, CrewMembership, CrewInvitation, CrewActivity
 from .forms import CrewForm, CrewMembershipForm, CrewInvitationForm, MemberPermissionForm, BulkPermissionForm
 from .permissions import (
@@ -19,8 +20,11 @@ from .permissions import (
     check_crew_permission,
     require_crew_permission,
     CrewNotFoundError,
-    InsufficientPermissionError
+    InsufficientPermissionError,
+    authorize_events,
+    get_crew_permissions
 )
+from .stats import count_permission_grants, get_crew_stats
 from .views_member_profiles import member_profile_detail, update_member_permissions
 
 
@@ -34,38 +38,13 @@ def crew_list(request):
 
 def crew_detail(request, slug):
     """Display crew detail page."""
-    crew = get_object_or_404(Crew, slug=slug, is_active=True)
+    crew = get_object_or_404(Crew.objects.select_related('stats'), slug=slug, is_active=True)
     
-    # Get user's membership to determine permissions
-    user_membership = None
-    can_manage = False
-    user_permissions = {}
-    
-    if request.user.is_authenticated:
-        user_membership = crew.get_user_membership(request.user)
-        if user_membership:
-            # User is a member - get all permissions
-            user_permissions = {
-                'create': user_membership.has_event_permission('create'),
-                'edit': user_membership.has_event_permission('edit'), 
-                'publish': user_membership.has_event_permission('publish'),
-                'delegate': user_membership.has_event_permission('delegate'),
-                'manage_crew': user_membership.can_manage(),
-            }
-            can_manage = user_permissions['manage_crew']
-        else:
-            # User is authenticated but not a member
-            user_permissions = {
-                'create': False, 'edit': False, 'publish': False, 
-                'delegate': False, 'manage_crew': False
-            }
-    else:
-        # User is not authenticated
-        user_membership = None
-        user_permissions = {
-            'create': False, 'edit': False, 'publish': False, 
-            'delegate': False, 'manage_crew': False
-        }
+    # Get user's membership and permissions from the request's resolver
+    crew_permissions = get_crew_permissions(request)
+    user_membership = crew_permissions.membership(crew)
+    user_permissions = crew_permissions.permissions(crew)
+    can_manage = user_permissions['manage_crew']
     
     active_memberships = crew.memberships.filter(is_active=True).order_by('role', 'joined_at')
     
@@ -73,86 +52,22 @@ def crew_detail(request, slug):
     from events.models import Event
     from django.utils import timezone
     
-    crew_events = Event.objects.filter(
+    crew_events = list(Event.objects.filter(
         created_by_crew=crew
-    ).order_by('-start_date')
+    ).select_related('organizer').order_by('-start_date'))
     
     # Separate upcoming and past events
     now = timezone.now().date()
-    upcoming_events = crew_events.filter(start_date__gte=now)
-    past_events = crew_events.filter(start_date__lt=now)
+    upcoming_events = [event for event in crew_events if event.start_date >= now]
+    past_events = [event for event in crew_events if event.start_date < now]
     
-    # Add event management permissions for each event
-    if request.user.is_authenticated:
-        for event in upcoming_events:
-            event.user_can_manage = event.can_manage(request.user)
-            event.user_can_publish = event.can_publish(request.user)
-        for event in past_events:
-            event.user_can_manage = event.can_manage(request.user)
-            event.user_can_publish = event.can_publish(request.user)
-    
-    # Enhanced crew statistics
-    crew_stats = {
-        # Member statistics
-        'total_members': active_memberships.count(),
-        'owner_count': active_memberships.filter(role='OWNER').count(),
-        'admin_count': active_memberships.filter(role='ADMIN').count(),
-        'member_count': active_memberships.filter(role='MEMBER').count(),
-        
-        # Growth metrics
-        'members_this_month': active_memberships.filter(
-            joined_at__gte=timezone.now() - timedelta(days=30)
-        ).count(),
-        'members_this_year': active_memberships.filter(
-            joined_at__gte=timezone.now() - timedelta(days=365)
-        ).count(),
-        
-        # Event statistics
-        'total_events': crew_events.count(),
-        'upcoming_events': upcoming_events.count(),
-        'past_events': past_events.count(),
-        'published_events': crew_events.filter(published=True).count(),
-        'events_this_year': crew_events.filter(
-            start_date__gte=timezone.now().date().replace(month=1, day=1)
-        ).count(),
-        
-        # Activity metrics
-        'recent_activity_count': CrewActivity.objects.filter(
-            crew=crew,
-            created_at__gte=timezone.now() - timedelta(days=7)
-        ).count(),
-        'total_activity_count': CrewActivity.objects.filter(crew=crew).count(),
-        
-        # Engagement metrics
-        'avg_events_per_month': 0,
-        'crew_age_days': (timezone.now().date() - crew.created_at.date()).days,
-        'is_active_crew': False,  # Will calculate below
-    }
+    # Add event management permissions for each event from one membership query
+    event_permissions = authorize_events(request.user, crew_events, crew_permissions)
+    for event in crew_events:
+        event.user_can_manage = event_permissions[event.pk]['manage']
+        event.user_can_publish = event_permissions[event.pk]['publish']
     
-    # Calculate average events per month
-    if crew_stats['crew_age_days'] > 0:
-        months_active = max(1, crew_stats['crew_age_days'] / 30.44)  # Average days per month
-        crew_stats['avg_events_per_month'] = round(crew_stats['total_events'] / months_active, 1)
-    
-    # Determine if crew is considered "active" (recent activity)
-    crew_stats['is_active_crew'] = (
-        crew_stats['recent_activity_count'] > 0 or 
-        crew_stats['upcoming_events'] > 0 or
-        crew_stats['members_this_month'] > 0
-    )
-    
-    # Member role breakdown for chart/display
-    crew_stats['role_breakdown'] = [
-        {'role': 'Owner', 'count': crew_stats['owner_count'], 'percentage': 0},
-        {'role': 'Admin', 'count': crew_stats['admin_count'], 'percentage': 0},
-        {'role': 'Member', 'count': crew_stats['member_count'], 'percentage': 0},
-    ]
-    
-    # Calculate percentages
-    total_members = crew_stats['total_members']
-    if total_members > 0:
-        for role_data in crew_stats['role_breakdown']:
-            role_data['percentage'] = round((role_data['count'] / total_members) * 100, 1)
+    crew_stats = get_crew_stats(crew)
     
     # Recent member activity
     recent_members = active_memberships.filter(
@@ -180,7 +95,7 @@ def crew_detail(request, slug):
         'active_memberships': active_memberships,
         'upcoming_events': upcoming_events,
         'past_events': past_events,
-        'total_events': crew_events.count(),
+        'total_events': len(crew_events),
         'crew_stats': crew_stats,
         'recent_members': recent_members,
         'achievements': achievements,
@@ -269,12 +184,8 @@ def delete_crew(request, slug):
     crew = get_object_or_404(Crew, slug=slug)
     
     # Check if user is the owner using new permission system
-    try:
-        user_membership = crew.get_user_membership(request.user)
-        if user_membership.role != 'OWNER':
-            messages.error(request, "Only crew owners can delete crews.")
-            return redirect('crews:detail', slug=crew.slug)
-    except CrewMembership.DoesNotExist:
+    user_membership = get_crew_permissions(request).membership(crew)
+    if not user_membership or user_membership.role != 'OWNER':
         messages.error(request, "Only crew owners can delete crews.")
         return redirect('crews:detail', slug=crew.slug)
     
@@ -318,7 +229,7 @@ def leave_crew(request, slug):
 def crew_members(request, slug):
     """Display crew members with management options."""
     crew = get_object_or_404(Crew, slug=slug)
-    user_membership = crew.memberships.filter(user=request.user).first()
+    user_membership = get_crew_permissions(request).membership(crew)
     
     # Get all memberships ordered by role hierarchy
     role_order = {'owner': 1, 'admin': 2, 'event_manager': 3, 'member': 4}
@@ -342,7 +253,7 @@ def edit_member(request, slug, user_id):
     """Edit a crew member's role and permissions."""
     crew = get_object_or_404(Crew, slug=slug)
     member_to_edit = get_object_or_404(CrewMembership, crew=crew, user_id=user_id)
-    user_membership = crew.memberships.filter(user=request.user).first()
+    user_membership = get_crew_permissions(request).membership(crew)
     
     # Check permissions - only owners and admins can edit member roles
     if not user_membership or not user_membership.can_manage():
@@ -394,7 +305,7 @@ def remove_member(request, slug, user_id):
     """Remove a member from the crew."""
     crew = get_object_or_404(Crew, slug=slug)
     member_to_remove = get_object_or_404(CrewMembership, crew=crew, user_id=user_id)
-    user_membership = crew.get_user_membership(request.user)
+    user_membership = get_crew_permissions(request).membership(crew)
     
     # Cannot remove crew owner
     if member_to_remove.role == 'OWNER':
@@ -484,7 +395,7 @@ def crew_activity(request, slug):
     can_view_activity = False
     
     if request.user.is_authenticated:
-        user_membership = crew.get_user_membership(request.user)
+        user_membership = get_crew_permissions(request).membership(crew)
         can_view_activity = user_membership is not None  # Only crew members can view activity
     
     # If user is not a member, redirect to crew detail
@@ -553,7 +464,7 @@ def crew_activity(request, slug):
 def manage_permissions(request, slug):
     """Main permission management dashboard."""
     crew = get_object_or_404(Crew, slug=slug, is_active=True)
-    user_membership = crew.get_user_membership(request.user)
+    user_membership = get_crew_permissions(request).membership(crew)
     
     # Get all active members with their permissions
     members = crew.memberships.filter(is_active=True).order_by('role', 'user__username')
@@ -574,13 +485,7 @@ def manage_permissions(request, slug):
         }
     
     # Calculate permission statistics
-    permission_stats = {
-        'can_create_events': sum(1 for m in members if m.can_create_events),
-        'can_edit_events': sum(1 for m in members if m.can_edit_events),
-        'can_publish_events': sum(1 for m in members if m.can_publish_events),
-        'can_delegate_permissions': sum(1 for m in members if m.can_delegate_permissions),
-        'total_members': members.count()
-    }
+    permission_stats = count_permission_grants(crew)
 
     return render(request, 'crews/manage_permissions.html', {
         'crew': crew,
@@ -598,7 +503,7 @@ def edit_member_permissions(request, slug, user_id):
     """Edit permissions for a specific member."""
     crew = get_object_or_404(Crew, slug=slug, is_active=True)
     member_to_edit = get_object_or_404(CrewMembership, crew=crew, user_id=user_id, is_active=True)
-    user_membership = crew.get_user_membership(request.user)
+    user_membership = get_crew_permissions(request).membership(crew)
     
     # Cannot edit owner permissions (owners have all permissions by default)
     if member_to_edit.role == 'OWNER':
@@ -676,7 +581,7 @@ def edit_member_permissions(request, slug, user_id):
 def bulk_permissions(request, slug):
     """Bulk permission management interface."""
     crew = get_object_or_404(Crew, slug=slug, is_active=True)
-    user_membership = crew.get_user_membership(request.user)
+    user_membership = get_crew_permissions(request).membership(crew)
     
     if request.method == 'POST':
         form = BulkPermissionForm(
@@ -690,20 +595,27 @@ def bulk_permissions(request, slug):
             permission_type = form.cleaned_data['permission_type']
             reason = form.cleaned_data.get('reason', '')
             
-            updated_count = 0
             permission_value = (action == 'grant')
             
-            for member in members:
-                # Skip owners
-                if member.role == 'OWNER':
-                    continue
-                    
-                # Update the specific permission
-                current_value = getattr(member, permission_type)
-                if current_value != permission_value:
+            # One UPDATE for every selected non-owner whose permission differs
+            with transaction.atomic():
+                changing = list(
+                    members.exclude(role='OWNER').exclude(**{permission_type: permission_value})
+                    .select_for_update()
+                    .only('user', 'role', 'is_active', 'permission_mask', *CrewMembership.PERMISSION_FIELDS.values())
+                )
+                updated_count = CrewMembership.objects.filter(
+                    pk__in=[member.pk for member in changing]
+                ).update(**{
+                    permission_type: permission_value,
+                    'permission_mask': CrewMembership.permission_mask_expression(**{permission_type: permission_value}),
+                })
+                
+                changes = []
+                for member in changing:
                     setattr(member, permission_type, permission_value)
-                    member.save()
-                    updated_count += 1
+                    changes.append((member.user_id, member.permission_mask, member.resolve_permission_mask()))
+                record_permission_changes(crew.id, request.user, changes)
             
             if updated_count > 0:
                 # Log the bulk change
@@ -761,7 +673,7 @@ def ajax_toggle_permission(request, slug):
         return JsonResponse({'error': 'POST required'}, status=405)
     
     crew = get_object_or_404(Crew, slug=slug, is_active=True)
-    user_membership = crew.get_user_membership(request.user)
+    user_membership = get_crew_permissions(request).membership(crew)
     
     try:
         member_id = request.POST.get('member_id')
@@ -785,31 +697,14 @@ def ajax_toggle_permission(request, slug):
             return JsonResponse({'error': 'Insufficient permissions'}, status=403)
         
         # Toggle the permission
-        current_value = getattr(member, permission_type)
-        new_value = not current_value
+        new_value = not getattr(member, permission_type)
         setattr(member, permission_type, new_value)
-        member.save()
+        member.save(update_fields=[permission_type])
         
-        # Log the change
-        action = "granted" if new_value else "revoked"
         permission_name = permission_type.replace('can_', '').replace('_', ' ').title()
         
-        CrewActivity.objects.create(
-            crew=crew,
-            user=request.user,
-            activity_type='PERMISSION_TOGGLED',
-            description=f"{action} {permission_name} for {member.user.username}"
-        )
-        
         # Calculate updated permission statistics
-        members = crew.memberships.filter(is_active=True)
-        permission_stats = {
-            'can_create_events': sum(1 for m in members if m.can_create_events),
-            'can_edit_events': sum(1 for m in members if m.can_edit_events),
-            'can_publish_events': sum(1 for m in members if m.can_publish_events),
-            'can_delegate_permissions': sum(1 for m in members if m.can_delegate_permissions),
-            'total_members': members.count()
-        }
+        permission_stats = count_permission_grants(crew)
         
         return JsonResponse({
             'success': True,
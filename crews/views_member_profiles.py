@@ -8,6 +8,7 @@ from django.template.loader import render_to_string
 from django.utils import timezone
 from datetime import timedelta
 from .models import Crew, CrewMembership, CrewActivity
+from .permissions import get_crew_permissions
 from events.models import Event
 
 
@@ -19,7 +20,7 @@ def member_profile_detail(request, slug, user_id):
     crew = get_object_or_404(Crew, slug=slug, is_active=True)
     
     # Check if requesting user has permission to view member details
-    user_membership = crew.get_user_membership(request.user)
+    user_membership = get_crew_permissions(request).membership(crew)
     if not user_membership:
         return JsonResponse({'error': 'Not authorized'}, status=403)
     
@@ -100,7 +101,7 @@ def update_member_permissions(request, slug, user_id):
     crew = get_object_or_404(Crew, slug=slug, is_active=True)
     
     # Check if requesting user can delegate permissions
-    if not crew.can_delegate_permissions(request.user):
+    if not get_crew_permissions(request).has_permission(crew, 'delegate'):
         return JsonResponse({'error': 'Not authorized to manage permissions'}, status=403)
     
     try:
@@ -118,7 +119,7 @@ def update_member_permissions(request, slug, user_id):
         return JsonResponse({'error': 'Invalid action'}, status=400)
     
     # Check if delegation is allowed
-    requesting_membership = crew.get_user_membership(request.user)
+    requesting_membership = get_crew_permissions(request).membership(crew)
     if not requesting_membership.can_delegate_to_member(target_membership):
         return JsonResponse({'error': 'Cannot delegate to this member'}, status=403)
     
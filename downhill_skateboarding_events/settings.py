@@ -68,6 +68,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "crews.middleware.CrewPermissionMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
@@ -237,6 +238,13 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Result processing jobs
+# Uploads and league recalculations are queued for the `run_result_jobs` worker.
+# In eager mode (default in development) they run inline within the request.
+RESULTS_JOBS_EAGER = env.bool("RESULTS_JOBS_EAGER", default=DEBUG)
+# Stale jobs are requeued until they have been claimed this many times, then failed.
+RESULTS_JOBS_MAX_ATTEMPTS = env.int("RESULTS_JOBS_MAX_ATTEMPTS", default=3)
+
 # Add these CSRF settings
 CSRF_COOKIE_SECURE = not DEBUG  # Only send cookie over HTTPS in production
 CSRF_COOKIE_HTTPONLY = False    # False allows JavaScript to access the cookie
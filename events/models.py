@@ -153,7 +153,7 @@ class Event(SearchableModel):
     def get_knockout_results(self):
         return self.results.filter(result_type='KNOCKOUT').first()
     
-    def can_manage(self, user):
+    def can_manage(self, user, crew_permissions=None):
         """
         Check if a user can manage this event.
         
@@ -161,12 +161,15 @@ class Event(SearchableModel):
         1. The original organizer
         2. A superuser
         3. A crew member with appropriate permissions (for crew events)
+        
+        Pass the user's CrewPermissionResolver as ``crew_permissions`` to
+        answer the crew check without a membership query.
         """
         if not user or not user.is_authenticated:
             return False
         
         # Check if user is the original organizer
-        if self.organizer and self.organizer.user == user:
+        if self.organizer_id and self.organizer.user_id == user.pk:
             return True
             
         # Superusers can always manage
@@ -174,13 +177,16 @@ class Event(SearchableModel):
             return True
             
         # If no crew is assigned, only organizer/admin can manage
-        if not self.created_by_crew:
+        if not self.created_by_crew_id:
             return False
+        
+        if crew_permissions is not None:
+            return crew_permissions.has_permission(self.created_by_crew_id, 'edit')
             
         # Check crew permissions - user needs edit permission for existing events
         return self.created_by_crew.can_edit_events(user)
     
-    def can_publish(self, user):
+    def can_publish(self, user, crew_permissions=None):
         """
         Check if a user can publish/unpublish this event.
         
@@ -188,12 +194,15 @@ class Event(SearchableModel):
         1. The original organizer
         2. A superuser
         3. A crew member with publish permissions (for crew events)
+        
+        Pass the user's CrewPermissionResolver as ``crew_permissions`` to
+        answer the crew check without a membership query.
         """
         if not user or not user.is_authenticated:
             return False
         
         # Check if user is the original organizer
-        if self.organizer and self.organizer.user == user:
+        if self.organizer_id and self.organizer.user_id == user.pk:
             return True
             
         # Superusers can always publish
@@ -201,8 +210,11 @@ class Event(SearchableModel):
             return True
             
         # If no crew is assigned, only organizer/admin can publish
-        if not self.created_by_crew:
+        if not self.created_by_crew_id:
             return False
+        
+        if crew_permissions is not None:
+            return crew_permissions.has_permission(self.created_by_crew_id, 'publish')
             
         # Check crew permissions - user needs publish permission
         return self.created_by_crew.can_publish_events(user)
@@ -9,6 +9,7 @@ from django.conf import settings
 import logging
 from .models import Event, Favorite, RSVP
 from .forms import EventForm, LocationForm
+from crews.permissions import get_crew_permissions
 from django_countries import countries
 from django.template.loader import render_to_string
 
@@ -219,7 +220,7 @@ def event_submission(request, slug=None):
         event = get_object_or_404(Event, slug=slug)
         
         # Check if user can edit this event
-        if not event.can_manage(request.user):
+        if not event.can_manage(request.user, get_crew_permissions(request)):
             from django.contrib import messages
             messages.error(request, "You don't have permission to edit this event.")
             return redirect('events:event_details', slug=event.slug)
@@ -246,7 +247,7 @@ def event_submission(request, slug=None):
                 
                 # Validate crew permission for new events or crew changes
                 if event.created_by_crew:
-                    if not event.created_by_crew.can_create_events(request.user):
+                    if not get_crew_permissions(request).has_permission(event.created_by_crew, 'create'):
                         from django.contrib import messages
                         messages.error(request, f"You don't have permission to create events for {event.created_by_crew.name}.")
                         return render(request, 'events/event_submission.html', {
@@ -279,7 +280,7 @@ def event_submission(request, slug=None):
             try:
                 crew = Crew.objects.get(slug=crew_slug, is_active=True)
                 # Check if user can create events for this crew using new permission system
-                if crew.can_create_events(request.user):
+                if get_crew_permissions(request).has_permission(crew, 'create'):
                     initial_data['created_by_crew'] = crew
             except Crew.DoesNotExist:
                 pass
@@ -300,7 +301,7 @@ def edit_event(request, slug):
     event = get_object_or_404(Event, slug=slug)
     
     # Check if user can edit this event (using new permission system)
-    if not event.can_manage(request.user):
+    if not event.can_manage(request.user, get_crew_permissions(request)):
         from django.contrib import messages
         messages.error(request, "You don't have permission to edit this event.")
         return redirect('events:event_details', slug=event.slug)
@@ -316,7 +317,7 @@ def edit_event(request, slug):
                 
                 # Check crew edit permission if crew is being changed
                 if event.created_by_crew:
-                    if not event.created_by_crew.can_edit_events(request.user):
+                    if not get_crew_permissions(request).has_permission(event.created_by_crew, 'edit'):
                         from django.contrib import messages
                         messages.error(request, f"You don't have permission to edit events for {event.created_by_crew.name}.")
                         return render(request, 'events/event_submission.html', {
@@ -359,7 +360,7 @@ def event_delete(request, slug):
     event = get_object_or_404(Event, slug=slug)
     
     # Check if user can manage (and therefore delete) this event
-    if not event.can_manage(request.user):
+    if not event.can_manage(request.user, get_crew_permissions(request)):
         from django.contrib import messages
         messages.error(request, "You don't have permission to delete this event.")
         return redirect('events:event_details', slug=event.slug)
@@ -389,7 +390,7 @@ def toggle_publish(request, slug):
     event = get_object_or_404(Event, slug=slug)
     
     # Check if user can publish this event
-    if not event.can_publish(request.user):
+    if not event.can_publish(request.user, get_crew_permissions(request)):
         from django.contrib import messages
         messages.error(request, "You don't have permission to publish/unpublish this event.")
         return redirect('events:event_details', slug=event.slug)
@@ -14,8 +14,11 @@ from django.core.paginator import Paginator
 from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
 from django.contrib import messages
+from django.db.models import Q
+from crews.crewmates import get_crew_mate_ids
 from events.models import RSVP, Favorite
 from profiles.models import UserProfile, ProfileFollow, ProfileActivity
+from results.head_to_head import rivals_for
 from .forms import UserProfileForm, AvatarUploadForm
 from typing import Optional
 import json
@@ -41,7 +44,6 @@ class ProfilePrivacyManager:
         if visibility == 'PRIVATE':
             return False
         elif visibility == 'CREWS':
-            # Check if they're in the same crew (implement when crews are integrated)
             return self.are_crew_mates()
         elif visibility == 'COMMUNITY':
             return self.viewer.is_authenticated if self.viewer else False
@@ -50,12 +52,18 @@ class ProfilePrivacyManager:
     
     def are_crew_mates(self):
         """Check if viewer and profile owner are in the same crew"""
-        if not self.viewer or not self.viewer.is_authenticated:
-            return False
-        
-        # TODO: Implement crew membership check when crews app is integrated
-        # For now, return False
-        return False
+        return self.profile.user_id in get_crew_mate_ids(self.viewer)
+    
+    @staticmethod
+    def visible_profiles(profiles, viewer):
+        """Filter a UserProfile queryset to the profiles viewer can see"""
+        if not viewer or not viewer.is_authenticated:
+            return profiles.filter(profile_visibility='PUBLIC')
+        return profiles.filter(
+            Q(profile_visibility__in=['PUBLIC', 'COMMUNITY']) |
+            Q(profile_visibility='CREWS', user__in=get_crew_mate_ids(viewer)) |
+            Q(user=viewer)
+        )
     
     def filter_profile_data(self, context):
         """Filter profile data based on privacy settings"""
@@ -148,6 +156,12 @@ def user_profile(request, username: Optional[str] = None):
             'reviews_given': len(user_reviews) if user_reviews else 0,
             'avg_rating': getattr(profile, 'get_average_rating', lambda: None)(),
         },
+        # Career race record, maintained by the results app
+        "rider_stats": getattr(profile, 'rider_stats', None),
+        "rivals": rivals_for(
+            profile.pk,
+            opponents=ProfilePrivacyManager.visible_profiles(UserProfile.objects.all(), request.user)
+        ),
         # Form choices for editing
         "skating_style_choices": profile._meta.get_field('skating_style').choices,
         "stance_choices": profile._meta.get_field('stance').choices,
@@ -174,16 +188,9 @@ def users_list(request):
     query = request.GET.get('q', '')
     
     # Base queryset - only show profiles based on visibility
-    if request.user.is_authenticated:
-        # Authenticated users can see PUBLIC and COMMUNITY profiles
-        users = UserProfile.objects.filter(
-            profile_visibility__in=['PUBLIC', 'COMMUNITY']
-        ).order_by('user__username')
-    else:
-        # Anonymous users can only see PUBLIC profiles
-        users = UserProfile.objects.filter(
-            profile_visibility='PUBLIC'
-        ).order_by('user__username')
+    users = ProfilePrivacyManager.visible_profiles(
+        UserProfile.objects.all(), request.user
+    ).order_by('user__username')
     
     # Apply search if query provided
     if query:
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ResultsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'results'
+
+    def ready(self):
+        # Register signal handlers and background job handlers
+        import results.signals  # noqa
+        import results.tasks  # noqa
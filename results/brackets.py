@@ -0,0 +1,269 @@
+"""
+Knockout bracket engine.
+
+A knockout is a complete binary tree of heats stored in heap order. Heat 0
+is the final, and heat ``i`` is fed by heats ``2i + 1`` and ``2i + 2``, so
+advancement edges need no extra storage. Heats have 2 riders (the winner
+advances) or 4 riders (the top two advance). Placement finals, such as a
+race for 3rd between the semi-final losers, sit outside the tree and only
+decide the places of the riders in them. A built tree is saved on
+``KnockoutBracket`` together with each rider's path and final placing. A
+bracket then renders, and answers rider lookups, from a single row.
+"""
+
+from collections import defaultdict
+
+ROUND_NAMES = {
+    1: ('FINAL', 'Final'),
+    2: ('SEMI', 'Semi-Final'),
+    4: ('QUARTER', 'Quarter-Final'),
+    8: ('ROUND16', 'Round of 16'),
+    16: ('ROUND32', 'Round of 32'),
+}
+
+
+def heat_depth(index):
+    """Rounds between a heat and the final (the final is depth 0)."""
+    return (index + 1).bit_length() - 1
+
+
+def round_for_depth(depth):
+    """Round code and name for heats at a depth of the tree."""
+    heats = 2 ** depth
+    return ROUND_NAMES.get(heats, (f'ROUND{heats * 2}', f'Round of {heats * 2}'))
+
+
+def seed_order(size):
+    """
+    Bracket positions of seeds 1..size so the top seeds meet as late as possible.
+
+    >>> seed_order(8)
+    [1, 8, 4, 5, 2, 7, 3, 6]
+    """
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+
+class HeatTree:
+    """
+    Heat tree for one knockout.
+
+    ``heats`` holds ``[riders, finish]`` pairs in heap order. ``riders`` is
+    the heat's entry list and ``finish`` the finishing order once raced.
+    Slots the bracket does not use are ``None``. ``placement`` holds the
+    ``[riders, finish]`` pairs of any placement finals.
+    """
+
+    def __init__(self, heats, heat_size=2, placement=None):
+        if heat_size not in (2, 4):
+            raise ValueError("Heats must have 2 or 4 riders.")
+        self.heats = heats
+        self.heat_size = heat_size
+        self.advance = heat_size // 2
+        self.placement = placement or []
+
+    @classmethod
+    def from_seeds(cls, seeds, heat_size=4):
+        """
+        Build an unraced bracket from a seeding list.
+
+        The first heats are filled snake-style: heat seeds follow
+        ``seed_order`` and each tier of riders alternates direction. When the
+        field is not full, the top seeds get the empty places.
+        """
+        tree = cls([], heat_size)
+        leaves = 1
+        while leaves * heat_size < len(seeds):
+            leaves *= 2
+
+        tree.heats = [[[], []] for _ in range(2 * leaves - 1)]
+        for offset, heat_seed in enumerate(seed_order(leaves)):
+            riders = []
+            for tier in range(heat_size):
+                seed = tier * leaves + (heat_seed if tier % 2 == 0 else leaves + 1 - heat_seed)
+                if seed <= len(seeds):
+                    riders.append(seeds[seed - 1])
+            tree.heats[leaves - 1 + offset][0] = riders
+        return tree
+
+    @classmethod
+    def from_heats(cls, records, heat_size=2):
+        """
+        Build a raced bracket from heat results.
+
+        Args:
+            records (list): ``(round_order, number, finish)`` tuples where
+                ``round_order`` increases towards the final and ``finish``
+                lists rider ids in finishing order
+            heat_size (int): 2 or 4
+
+        Feeder edges come from the riders themselves: a heat feeds the heat
+        in the next round that its advancing riders appear in. A final-round
+        heat raced only by riders knocked out in the round before, such as a
+        3rd-place final, is a placement final.
+
+        Raises:
+            ValueError: If the heats do not form a single-final knockout
+        """
+        tree = cls([], heat_size)
+        by_round = defaultdict(list)
+        for round_order, number, finish in records:
+            by_round[round_order].append((number, list(finish)))
+        if not by_round:
+            return tree
+
+        rounds = sorted(by_round)
+        finals = sorted(by_round[rounds[-1]])
+        if len(finals) > 1 and len(rounds) > 1:
+            advancing = {r for _, finish in by_round[rounds[-2]] for r in finish[:tree.advance]}
+            tree.placement = [
+                [list(finish), list(finish)] for _, finish in finals if advancing.isdisjoint(finish)
+            ]
+            finals = [(number, finish) for number, finish in finals if not advancing.isdisjoint(finish)]
+        if len(finals) != 1:
+            raise ValueError("A knockout must end in a single final heat.")
+
+        positions = {0: finals[0][1]}
+        later_round = [0]
+        for earlier in reversed(rounds[:-1]):
+            # Heats of the round after this one, keyed by the riders racing in them
+            later_heats = {rider: index for index in later_round for rider in positions[index]}
+
+            feeders = defaultdict(list)
+            for number, finish in sorted(by_round[earlier]):
+                advancing = finish[:tree.advance]
+                parent = next((later_heats[r] for r in advancing if r in later_heats), None)
+                if parent is None:
+                    raise ValueError(f"Heat {number} riders never appear in the next round.")
+                feeders[parent].append(finish)
+
+            later_round = []
+            for parent, finishes in feeders.items():
+                if len(finishes) > 2:
+                    raise ValueError("A heat can only be fed by two heats from the round before.")
+                for slot, finish in enumerate(finishes, start=1):
+                    positions[2 * parent + slot] = finish
+                    later_round.append(2 * parent + slot)
+
+        size = 2 ** len(rounds) - 1
+        tree.heats = [None] * size
+        for index, finish in positions.items():
+            tree.heats[index] = [list(finish), list(finish)]
+        return tree
+
+    @property
+    def depth(self):
+        return heat_depth(len(self.heats) - 1) if self.heats else 0
+
+    def parent(self, index):
+        """Heat the winners of a heat advance to, or None for the final."""
+        return (index - 1) // 2 if index > 0 else None
+
+    def feeders(self, index):
+        """Heats whose winners race in a heat."""
+        return [i for i in (2 * index + 1, 2 * index + 2) if i < len(self.heats) and self.heats[i]]
+
+    def record_heat(self, index, finish):
+        """Record a heat's finishing order and advance its top riders."""
+        self.heats[index][1] = list(finish)
+        parent = self.parent(index)
+        if parent is not None:
+            entries = self.heats[parent][0]
+            entries.extend(rider for rider in finish[:self.advance] if rider not in entries)
+
+    def paths(self):
+        """Every rider's heats, from their first heat to their last."""
+        paths = defaultdict(list)
+        for index in range(len(self.heats) - 1, -1, -1):
+            heat = self.heats[index]
+            if heat:
+                for rider in heat[0]:
+                    paths[rider].append(index)
+        return {rider: sorted(path, key=heat_depth, reverse=True) for rider, path in paths.items()}
+
+    def placings(self):
+        """
+        Final placing of every rider who raced.
+
+        Finalists place by their finish. Riders knocked out earlier tie with
+        others knocked out in the same round at the same heat finish. So in
+        4-rider heats, both semi-final thirds are 5th and both fourths are 7th.
+        A placement final splits such ties: its riders take the places from
+        the best of theirs down, in finishing order.
+        """
+        placings = {}
+        riders_beyond = 0
+        for depth in range(self.depth + 1):
+            first = 2 ** depth - 1
+            heats = [h for h in self.heats[first:2 * first + 1] if h and h[1]]
+            keep = self.advance if depth else 0
+            for heat in heats:
+                for offset, rider in enumerate(heat[1][keep:]):
+                    if rider not in placings:
+                        placings[rider] = riders_beyond + 1 + offset * (len(heats) if depth else 1)
+            riders_beyond = len(placings)
+
+        for _, finish in self.placement:
+            raced = [rider for rider in finish if rider in placings]
+            if raced:
+                best = min(placings[rider] for rider in raced)
+                for offset, rider in enumerate(raced):
+                    placings[rider] = best + offset
+        return placings
+
+    def rounds(self, riders=None):
+        """
+        Heats grouped by round from the first round to the final, for rendering.
+
+        Args:
+            riders (dict): Optional ``{rider_id: info}`` attached to each entry
+        """
+        riders = riders or {}
+        rounds = []
+        for depth in range(self.depth, -1, -1):
+            code, name = round_for_depth(depth)
+            first = 2 ** depth - 1
+            heats = []
+            for number, index in enumerate(range(first, 2 * first + 1), start=1):
+                heat = self.heats[index] if index < len(self.heats) else None
+                if not heat:
+                    continue
+                entries, finish = heat
+                order = finish or entries
+                heats.append({
+                    'index': index,
+                    'number': number,
+                    'raced': bool(finish),
+                    'riders': [
+                        {
+                            'id': rider,
+                            'info': riders.get(str(rider)),
+                            'place': place if finish else None,
+                            'advanced': bool(finish) and depth > 0 and place <= self.advance,
+                        }
+                        for place, rider in enumerate(order, start=1)
+                    ],
+                })
+            rounds.append({'code': code, 'name': name, 'heats': heats})
+
+        if self.placement:
+            rounds.append({
+                'code': 'PLACEMENT',
+                'name': 'Placement Final',
+                'heats': [
+                    {
+                        'index': None,
+                        'number': number,
+                        'raced': True,
+                        'riders': [
+                            {'id': rider, 'info': riders.get(str(rider)), 'place': place, 'advanced': False}
+                            for place, rider in enumerate(finish, start=1)
+                        ],
+                    }
+                    for number, (_, finish) in enumerate(self.placement, start=1)
+                ],
+            })
+        return rounds
@@ -0,0 +1,204 @@
+"""
+Competitor identities for imported results.
+
+Results files name riders in free text. Each rider gets one ``Competitor``
+row, and every spelling seen for them becomes a ``CompetitorAlias``, keyed by
+the normalised name from ``results.matching``. Imports resolve names through
+an alias dictionary cached per process. Only names never seen before are
+matched against profiles, and each becomes a new competitor. Bracket results
+and league standings key on the competitor, so "J. Smith" and "J Smith" are
+one rider in the standings.
+"""
+
+import time
+from collections import defaultdict
+
+from django.db import transaction
+
+from profiles.models import UserProfile
+
+from .matching import get_name_index, normalize_name
+from .models import BracketResult, Competitor, CompetitorAlias, LeagueStanding
+
+# Seconds a cached alias map is trusted before reloading. Every lookup checks
+# its competitors still exist, so merges in other processes are picked up.
+ALIAS_TTL = 300
+
+_alias_cache = {}
+
+
+def get_alias_map():
+    """
+    The cached alias dictionary.
+
+    Returns:
+        dict: ``{alias: competitor_id}``
+    """
+    cached = _alias_cache.get('aliases')
+    if cached is not None and time.monotonic() - cached[0] < ALIAS_TTL:
+        return cached[1]
+
+    aliases = dict(CompetitorAlias.objects.values_list('alias', 'competitor').iterator(chunk_size=5000))
+    _alias_cache['aliases'] = (time.monotonic(), aliases)
+    return aliases
+
+
+def invalidate_alias_map():
+    """Drop the cached alias dictionary."""
+    _alias_cache.clear()
+
+
+def _load_aliases(keys):
+    """Aliases read from the database: ``{alias: (competitor_id, profile_id)}``."""
+    return {
+        alias: (competitor_id, profile_id)
+        for alias, competitor_id, profile_id in CompetitorAlias.objects.filter(
+            alias__in=keys
+        ).values_list('alias', 'competitor', 'competitor__profile')
+    }
+
+
+def resolve_competitors(names):
+    """
+    Resolve the rider names in a file to competitors, creating new ones.
+
+    Known aliases are dictionary lookups, confirmed with one query that also
+    reads each competitor's current profile. New names are matched against
+    profiles once (see ``RiderNameIndex``). A new name that links to a
+    profile joins that profile's competitor, if it has one.
+
+    Args:
+        names (iterable): Rider names as written in the file
+
+    Returns:
+        tuple: (``{name: (competitor_id, profile_id)}``,
+        ``{name: NameMatch}`` for the names seen for the first time)
+    """
+    keys = {}
+    for name in set(names):
+        key = normalize_name(name)
+        if key:
+            keys[name] = key
+
+    aliases = get_alias_map()
+    profiles = dict(Competitor.objects.filter(
+        pk__in={aliases[key] for key in keys.values() if key in aliases}
+    ).values_list('pk', 'profile'))
+    missing = {key for key in keys.values() if aliases.get(key) not in profiles}
+
+    matches = {}
+    if missing:
+        # Another process may have added (or merged) these since the map was loaded
+        found = _load_aliases(missing)
+        missing -= found.keys()
+        if missing:
+            # One raw spelling per new alias
+            new_names = {}
+            for name, key in sorted(keys.items()):
+                if key in missing:
+                    new_names.setdefault(key, name)
+            matches = get_name_index().match_all(new_names.values())
+            found.update(_create_competitors(new_names, matches))
+        for key, (competitor_id, profile_id) in found.items():
+            aliases[key] = competitor_id
+            profiles[competitor_id] = profile_id
+
+    return {name: (aliases[key], profiles[aliases[key]]) for name, key in keys.items()}, matches
+
+
+def _create_competitors(new_names, matches):
+    """Create competitors and aliases for never-seen names; returns the new aliases."""
+    linked = {key: matches[name].profile_id for key, name in new_names.items() if matches[name].profile_id}
+
+    with transaction.atomic():
+        # Profiles that already race under a competitor, and ones deleted since the index was built
+        profiles = set(UserProfile.objects.filter(pk__in=set(linked.values())).values_list('pk', flat=True))
+        linked = {key: profile_id for key, profile_id in linked.items() if profile_id in profiles}
+        existing = dict(
+            Competitor.objects.filter(profile__in=set(linked.values())).values_list('profile', 'pk')
+        )
+
+        # One competitor per profile, however many spellings link to it
+        competitors = {}
+        for key, name in new_names.items():
+            profile_id = linked.get(key)
+            owner = profile_id or key
+            if profile_id in existing or owner in competitors:
+                continue
+            competitors[owner] = Competitor(name=name, profile_id=profile_id)
+        Competitor.objects.bulk_create(competitors.values())
+
+        competitor_ids = {owner: competitor.pk for owner, competitor in competitors.items()}
+        competitor_ids.update(existing)
+        CompetitorAlias.objects.bulk_create([
+            CompetitorAlias(competitor_id=competitor_ids[linked.get(key) or key], alias=key, name=name)
+            for key, name in new_names.items()
+        ], ignore_conflicts=True)
+
+    # Re-read so aliases another process won the race for point at its competitor
+    return _load_aliases(new_names.keys())
+
+
+def assign_competitors(bracket_results):
+    """
+    Attach competitors to bracket results imported without one.
+
+    Args:
+        bracket_results (QuerySet): ``BracketResult`` rows to check
+
+    Returns:
+        int: Number of rows updated
+    """
+    names = set(
+        bracket_results.filter(rider__isnull=True).values_list('competitor_name', flat=True).distinct()
+    )
+    if not names:
+        return 0
+
+    resolved, _ = resolve_competitors(names)
+    updated = 0
+    for name, (competitor_id, _) in resolved.items():
+        updated += bracket_results.filter(rider__isnull=True, competitor_name=name).update(rider=competitor_id)
+    return updated
+
+
+def link_competitor(competitor, profile):
+    """
+    Link a competitor to a profile.
+
+    Standings snapshots that show the competitor are republished. When the
+    profile already has a competitor, the two are merged: aliases and results
+    move to the profile's competitor and the standings of the affected
+    leagues are rebuilt.
+
+    Returns:
+        Competitor: The competitor now linked to the profile
+    """
+    from .standings import publish_standings_snapshots, rebuild_league_standings
+
+    owner = Competitor.objects.filter(profile=profile).exclude(pk=competitor.pk).first()
+    with transaction.atomic():
+        if owner is None:
+            competitor.profile = profile
+            competitor.save(update_fields=['profile'])
+            BracketResult.objects.filter(rider=competitor).update(competitor_profile=profile)
+            standings = LeagueStanding.objects.filter(rider=competitor).select_related('league', 'discipline')
+            disciplines = defaultdict(list)
+            for standing in standings:
+                disciplines[standing.league].append(standing.discipline)
+            standings.update(competitor=profile)
+            # Snapshots carry the profile link, so publish the standings it changed
+            for league, league_disciplines in disciplines.items():
+                publish_standings_snapshots(league, league_disciplines)
+        else:
+            leagues = {standing.league for standing in LeagueStanding.objects.filter(
+                rider=competitor
+            ).select_related('league')}
+            CompetitorAlias.objects.filter(competitor=competitor).update(competitor=owner)
+            BracketResult.objects.filter(rider=competitor).update(rider=owner, competitor_profile=profile)
+            competitor.delete()
+            for league in leagues:
+                rebuild_league_standings(league)
+            competitor = owner
+    invalidate_alias_map()
+    return competitor
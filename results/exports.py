@@ -0,0 +1,248 @@
+"""
+Bulk data exports for timing partners and ranking bodies.
+
+Each dataset (bracket results, league standings, rider career stats) is a
+flat ``values_list()`` query over a set of leagues. It is read with
+``.iterator(chunk_size=EXPORT_CHUNK_SIZE)`` and written out as it streams,
+so memory stays bounded however large the season is. Every dataset can be
+written as CSV. The columnar format is Parquet, written one row group per
+chunk, when pyarrow is installed. Without pyarrow it falls back to
+newline-delimited JSON.
+"""
+
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.db.models import Q
+
+from .models import BracketResult, LeagueStanding, RiderStats
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; columnar exports fall back to NDJSON
+    pa = pq = None
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+Column = namedtuple('Column', ['name', 'field', 'type'])
+
+DATASETS = {}
+
+
+def register_dataset(name, columns):
+    """Register the queryset builder for an export dataset."""
+    def decorator(func):
+        DATASETS[name] = (columns, func)
+        return func
+    return decorator
+
+
+@register_dataset('results', [
+    Column('league', 'result__event__league_links__league__slug', 'string'),
+    Column('event', 'result__event__slug', 'string'),
+    Column('event_date', 'result__event__start_date', 'date'),
+    Column('discipline', 'discipline', 'string'),
+    Column('position', 'position', 'int'),
+    Column('competitor_name', 'competitor_name', 'string'),
+    Column('competitor_id', 'rider', 'int'),
+    Column('username', 'competitor_profile__user__username', 'string'),
+    Column('points', 'points', 'int'),
+    Column('multiplier', 'result__event__league_links__multiplier', 'float'),
+])
+def bracket_results_for_export(leagues):
+    """Final bracket results of every event in the leagues."""
+    return BracketResult.objects.filter(
+        result__event__league_links__league__in=leagues,
+        result__result_type='BRACKET',
+        result__is_final=True
+    ).order_by(
+        'result__event__league_links__league', 'result__event__start_date', 'result__event',
+        'discipline', 'position'
+    )
+
+
+@register_dataset('standings', [
+    Column('league', 'league__slug', 'string'),
+    Column('discipline', 'discipline__name', 'string'),
+    Column('position', 'position', 'int'),
+    Column('competitor_name', 'competitor_name', 'string'),
+    Column('competitor_id', 'rider', 'int'),
+    Column('username', 'competitor__user__username', 'string'),
+    Column('points', 'points', 'int'),
+    Column('events_competed', 'events_competed', 'int'),
+    Column('average_rank', 'average_rank', 'float'),
+])
+def standings_for_export(leagues):
+    """Current standings of the leagues."""
+    return LeagueStanding.objects.filter(league__in=leagues).order_by('league', 'discipline', 'position')
+
+
+@register_dataset('riders', [
+    Column('rider_key', 'rider_key', 'string'),
+    Column('competitor_name', 'competitor_name', 'string'),
+    Column('username', 'profile__user__username', 'string'),
+    Column('events_raced', 'events_raced', 'int'),
+    Column('races', 'races', 'int'),
+    Column('wins', 'wins', 'int'),
+    Column('podiums', 'podiums', 'int'),
+    Column('best_position', 'best_position', 'int'),
+    Column('average_position', 'average_position', 'float'),
+    Column('total_points', 'total_points', 'int'),
+    Column('best_time_seconds', 'best_time', 'duration'),
+    Column('season_points', 'season_points', 'json'),
+])
+def rider_stats_for_export(leagues):
+    """Career stats of every rider with a standing in the leagues."""
+    standings = LeagueStanding.objects.filter(league__in=leagues)
+    return RiderStats.objects.filter(
+        Q(profile__in=standings.filter(competitor__isnull=False).values('competitor'))
+        | Q(profile__isnull=True, competitor_name__in=standings.values('competitor_name'))
+    ).order_by('rider_key')
+
+
+def _converter(column_type, text):
+    """Value conversion for a column type, or None when values are written as read."""
+    if column_type == 'duration':
+        return lambda value: value.total_seconds() if isinstance(value, timedelta) else value
+    if column_type == 'date' and text:
+        return lambda value: value.isoformat() if isinstance(value, date) else value
+    if column_type == 'json':
+        return lambda value: json.dumps(value, sort_keys=True) if value is not None else None
+    return None
+
+
+def export_rows(dataset, leagues, text=True):
+    """
+    Stream a dataset's rows.
+
+    Args:
+        dataset (str): A key of ``DATASETS``
+        leagues (QuerySet): Leagues to export
+        text (bool): Convert dates to ISO strings for text formats
+
+    Returns:
+        tuple: (column names, row iterator)
+    """
+    columns, build = DATASETS[dataset]
+    converters = [(index, _converter(c.type, text)) for index, c in enumerate(columns)]
+    converters = [(index, convert) for index, convert in converters if convert]
+
+    def rows():
+        queryset = build(leagues).values_list(*(c.field for c in columns))
+        for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            if converters:
+                row = list(row)
+                for index, convert in converters:
+                    row[index] = convert(row[index])
+            yield row
+
+    return [c.name for c in columns], rows()
+
+
+class _Echo:
+    """File-like object that hands back what is written, for streaming ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(dataset, leagues):
+    """CSV lines for a dataset, header first."""
+    names, rows = export_rows(dataset, leagues)
+    writer = csv.writer(_Echo())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(dataset, leagues):
+    """One JSON object per line for a dataset."""
+    names, rows = export_rows(dataset, leagues)
+    for row in rows:
+        yield json.dumps(dict(zip(names, row))) + '\n'
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only sink that keeps its offset while handing written bytes to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_schema(dataset):
+    types = {
+        'string': pa.string(), 'int': pa.int64(), 'float': pa.float64(),
+        'date': pa.date32(), 'duration': pa.float64(), 'json': pa.string(),
+    }
+    return pa.schema([(c.name, types[c.type]) for c in DATASETS[dataset][0]])
+
+
+def stream_parquet(dataset, leagues):
+    """Parquet bytes for a dataset, one row group per chunk of rows."""
+    names, rows = export_rows(dataset, leagues, text=False)
+    schema = _arrow_schema(dataset)
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+
+    def write_chunk(chunk):
+        writer.write_table(pa.Table.from_pylist([dict(zip(names, row)) for row in chunk], schema=schema))
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            write_chunk(chunk)
+            chunk = []
+            yield sink.drain()
+    if chunk:
+        write_chunk(chunk)
+    writer.close()
+    yield sink.drain()
+
+
+def resolve_export_format(requested):
+    """
+    The format an export is written in.
+
+    ``columnar`` (and ``parquet``) mean Parquet when pyarrow is installed and
+    NDJSON otherwise. Unknown formats are CSV.
+    """
+    if requested in ('columnar', 'parquet'):
+        return 'parquet' if pa is not None else 'ndjson'
+    return requested if requested in EXPORT_FORMATS else 'csv'
+
+
+def stream_export(dataset, leagues, export_format):
+    """Chunks of an export in a format returned by ``resolve_export_format``."""
+    if export_format == 'parquet':
+        return stream_parquet(dataset, leagues)
+    if export_format == 'ndjson':
+        return stream_ndjson(dataset, leagues)
+    return stream_csv(dataset, leagues)
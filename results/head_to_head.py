@@ -0,0 +1,164 @@
+"""
+Rider head-to-head records from knockout heats.
+
+Every pair of riders who shared a knockout heat has one ``HeadToHead`` row.
+In a heat, the rider who finished ahead beats the one behind, so a 4-rider
+heat gives six meetings. The row is keyed with the lower profile id as
+``rider_a``. Rows are updated in place when a final knockout is processed
+and taken back out when it is deleted. An "A vs B" lookup is then one
+unique-index read, however many knockouts have been raced.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import HeadToHead, KnockoutBracket
+
+
+def ordered_pair(rider, opponent):
+    """Storage order of a pair: lower profile id first."""
+    return (rider, opponent) if rider < opponent else (opponent, rider)
+
+
+def heat_meetings(heats):
+    """
+    Count the meetings in a stored heat tree.
+
+    Args:
+        heats (list): ``KnockoutBracket.heats`` and ``placement_heats``
+
+    Returns:
+        dict: ``{(rider_a, rider_b): [wins_a, wins_b]}`` in storage order
+    """
+    meetings = defaultdict(lambda: [0, 0])
+    for heat in heats:
+        if not heat or not heat[1]:
+            continue
+        finish = heat[1]
+        for place, winner in enumerate(finish):
+            for loser in finish[place + 1:]:
+                pair = ordered_pair(winner, loser)
+                meetings[pair][0 if winner == pair[0] else 1] += 1
+    return meetings
+
+
+def record_head_to_head(heats, met_on, sign=1):
+    """
+    Add (or with ``sign=-1`` remove) a knockout's meetings.
+
+    Existing pairs are read with one query and updated with one
+    ``bulk_update``. New pairs are inserted with one ``bulk_create``. Pairs
+    left with no meetings are deleted. ``last_met`` only moves forward, so
+    removing a knockout keeps the previous date.
+
+    Args:
+        heats (list): ``KnockoutBracket.heats`` and ``placement_heats``
+        met_on (date): The knockout's event date
+        sign (int): 1 to add the meetings, -1 to remove them
+
+    Returns:
+        int: Number of pairs touched
+    """
+    meetings = heat_meetings(heats)
+    if not meetings:
+        return 0
+
+    with transaction.atomic():
+        rows = {
+            (row.rider_a_id, row.rider_b_id): row
+            for row in HeadToHead.objects.select_for_update().filter(
+                rider_a__in={a for a, _ in meetings},
+                rider_b__in={b for _, b in meetings},
+            )
+        }
+
+        created = []
+        updated = []
+        for (rider_a, rider_b), (wins_a, wins_b) in meetings.items():
+            row = rows.get((rider_a, rider_b))
+            if row is None:
+                if sign > 0:
+                    created.append(HeadToHead(
+                        rider_a_id=rider_a, rider_b_id=rider_b,
+                        wins_a=wins_a, wins_b=wins_b, last_met=met_on,
+                    ))
+                continue
+            row.wins_a = max(0, row.wins_a + sign * wins_a)
+            row.wins_b = max(0, row.wins_b + sign * wins_b)
+            if sign > 0 and (row.last_met is None or met_on > row.last_met):
+                row.last_met = met_on
+            updated.append(row)
+
+        empty = [row.pk for row in updated if not row.meetings]
+        HeadToHead.objects.bulk_create(created)
+        HeadToHead.objects.bulk_update(
+            [row for row in updated if row.meetings], ['wins_a', 'wins_b', 'last_met']
+        )
+        HeadToHead.objects.filter(pk__in=empty).delete()
+
+    return len(created) + len(updated)
+
+
+def record_result_head_to_head(result, sign=1):
+    """Add (or remove) the meetings of a knockout result's bracket."""
+    bracket = KnockoutBracket.objects.filter(result=result).values_list('heats', 'placement_heats').first()
+    if not bracket or not bracket[0]:
+        return 0
+    heats, placement_heats = bracket
+    return record_head_to_head(heats + placement_heats, result.event.start_date, sign)
+
+
+def get_head_to_head(rider, opponent):
+    """
+    The record between two riders.
+
+    Args:
+        rider (int): Profile id whose side the record is read from
+        opponent (int): The other rider's profile id
+
+    Returns:
+        dict: ``wins``, ``losses``, ``meetings`` and ``last_met``
+    """
+    rider_a, rider_b = ordered_pair(rider, opponent)
+    row = HeadToHead.objects.filter(rider_a=rider_a, rider_b=rider_b).first()
+    if row is None:
+        return {'wins': 0, 'losses': 0, 'meetings': 0, 'last_met': None}
+    wins, losses = row.record_for(rider)
+    return {'wins': wins, 'losses': losses, 'meetings': row.meetings, 'last_met': row.last_met}
+
+
+def rivals_for(rider, limit=5, opponents=None):
+    """
+    A rider's most frequent opponents.
+
+    Args:
+        rider (int): Profile id
+        limit (int): Most opponents to return
+        opponents (QuerySet): Optional ``UserProfile`` queryset the opponents
+            must be in, e.g. the profiles a viewer may see
+
+    Returns:
+        list: dicts with the ``opponent`` profile, ``wins``, ``losses``,
+        ``meetings`` and ``last_met``, most meetings first
+    """
+    rivalries = Q(rider_a=rider) | Q(rider_b=rider)
+    if opponents is not None:
+        rivalries = Q(rider_a=rider, rider_b__in=opponents) | Q(rider_b=rider, rider_a__in=opponents)
+    rows = (
+        HeadToHead.objects.filter(rivalries)
+        .select_related('rider_a__user', 'rider_b__user')
+        .order_by((F('wins_a') + F('wins_b')).desc(), F('last_met').desc(nulls_last=True))[:limit]
+    )
+    rivals = []
+    for row in rows:
+        wins, losses = row.record_for(rider)
+        rivals.append({
+            'opponent': row.opponent_of(rider),
+            'wins': wins,
+            'losses': losses,
+            'meetings': row.meetings,
+            'last_met': row.last_met,
+        })
+    return rivals
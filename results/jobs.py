@@ -0,0 +1,141 @@
+"""
+Lightweight database-backed job queue for result processing.
+
+Long-running work (result uploads, standings updates, league rebuilds) is
+stored as ``ProcessingJob`` rows and picked up by the ``run_result_jobs``
+worker command. Workers claim jobs with ``SELECT ... FOR UPDATE SKIP LOCKED``
+so several can run side by side without Redis or Celery.
+
+When ``settings.RESULTS_JOBS_EAGER`` is enabled (development and tests),
+jobs run inline as soon as they are enqueued.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ProcessingJob
+
+logger = logging.getLogger(__name__)
+
+# job_type -> handler(job, payload)
+JOB_HANDLERS = {}
+
+
+def job_handler(job_type):
+    """Register a function as the handler for a job type."""
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def enqueue_job(job_type, payload=None, created_by=None):
+    """
+    Queue a job for the background worker.
+
+    Args:
+        job_type (str): One of ``ProcessingJob.JOB_TYPES``
+        payload (dict): JSON-serialisable arguments for the handler
+        created_by (UserProfile): Optional profile that requested the job
+
+    Returns:
+        ProcessingJob: The queued (or, in eager mode, finished) job
+    """
+    job = ProcessingJob.objects.create(
+        job_type=job_type,
+        payload=payload or {},
+        created_by=created_by
+    )
+
+    if getattr(settings, 'RESULTS_JOBS_EAGER', False):
+        job.status = 'RUNNING'
+        job.started_at = timezone.now()
+        job.attempts = 1
+        job.worker = 'eager'
+        job.save(update_fields=['status', 'started_at', 'attempts', 'worker'])
+        run_job(job)
+
+    return job
+
+
+def claim_next_job(worker_name):
+    """
+    Claim the oldest pending job, skipping rows locked by other workers.
+
+    Returns:
+        ProcessingJob or None: The claimed job, already marked as running
+    """
+    with transaction.atomic():
+        job = (
+            ProcessingJob.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = 'RUNNING'
+        job.started_at = timezone.now()
+        job.attempts += 1
+        job.worker = worker_name
+        job.save(update_fields=['status', 'started_at', 'attempts', 'worker'])
+
+    return job
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome."""
+    handler = JOB_HANDLERS.get(job.job_type)
+
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job type {job.job_type}")
+        handler(job, job.payload)
+    except Exception as e:
+        logger.error("Job %s failed: %s\n%s", job.pk, e, traceback.format_exc())
+        job.status = 'FAILED'
+        job.error = str(e)
+        job.message = 'Failed'
+    else:
+        job.status = 'COMPLETED'
+        job.progress = 100
+        job.message = job.message or 'Done'
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'message', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs(timeout_minutes=30):
+    """
+    Return jobs orphaned by a crashed worker to the queue.
+
+    A job is stale when it has not reported progress for ``timeout_minutes``.
+    Jobs that have already been claimed ``settings.RESULTS_JOBS_MAX_ATTEMPTS``
+    times are marked as failed instead, so a job that keeps killing its
+    worker is not retried forever.
+
+    Returns:
+        tuple: Number of jobs requeued and number failed
+    """
+    now = timezone.now()
+    max_attempts = getattr(settings, 'RESULTS_JOBS_MAX_ATTEMPTS', 3)
+    stale = ProcessingJob.objects.filter(
+        status='RUNNING',
+        started_at__lt=now - timedelta(minutes=timeout_minutes)
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status='FAILED',
+        worker='',
+        message='Failed',
+        error=f"Worker stopped responding after {max_attempts} attempts",
+        finished_at=now,
+    )
+    requeued = stale.update(status='PENDING', worker='')
+    return requeued, failed
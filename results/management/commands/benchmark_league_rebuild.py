@@ -0,0 +1,112 @@
+"""
+Management command to benchmark league standings rebuilds on synthetic data.
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from events.models import Event
+from results.competitors import invalidate_alias_map, resolve_competitors
+from results.models import BracketResult, League, LeagueEvent, LeagueStanding, Result
+from results.points import points_for_positions
+from results.standings import rebuild_league_standings, update_league_standings_for_bracket
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic season once the benchmark has run."""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark league standings rebuilds on a synthetic season (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=50, help='Number of events in the season')
+        parser.add_argument('--riders', type=int, default=5000, help='Number of distinct riders')
+        parser.add_argument('--field-size', type=int, default=500, help='Riders per event and discipline')
+        parser.add_argument('--disciplines', type=int, default=3, help='Number of disciplines')
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Also time the per-event incremental path for comparison',
+        )
+        parser.add_argument('--seed', type=int, default=2025, help='Random seed for the synthetic season')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run_benchmark(options)
+                raise Rollback
+        except Rollback:
+            invalidate_alias_map()
+            self.stdout.write('Synthetic season rolled back.')
+
+    def run_benchmark(self, options):
+        rng = random.Random(options['seed'])
+        riders = [f"Rider {number:05d}" for number in range(options['riders'])]
+        disciplines = ['Open Skate', "Women's Skate", 'Luge', 'Inline', 'Trike'][:options['disciplines']]
+        field_size = min(options['field_size'], len(riders))
+
+        self.stdout.write('Creating synthetic season...')
+        started = time.perf_counter()
+
+        league = League.objects.create(name='Benchmark League', slug='benchmark-league-rebuild')
+        events = Event.objects.bulk_create([
+            Event(
+                title=f"Benchmark Event {number}",
+                slug=f"benchmark-event-{number}",
+                event_type='Race',
+                skill_level='Professional',
+            )
+            for number in range(options['events'])
+        ])
+        LeagueEvent.objects.bulk_create([
+            LeagueEvent(league=league, event=event, multiplier=rng.choice([1.0, 1.0, 1.5, 2.0]))
+            for event in events
+        ])
+        results = Result.objects.bulk_create([
+            Result(event=event, result_type='BRACKET', raw_data='results/benchmark.csv', is_final=True)
+            for event in events
+        ])
+
+        competitors, _ = resolve_competitors(riders)
+        field_points = points_for_positions(range(1, field_size + 1), league)
+        entries = []
+        for result in results:
+            for discipline in disciplines:
+                for position, name in enumerate(rng.sample(riders, field_size), start=1):
+                    entries.append(BracketResult(
+                        result=result,
+                        competitor_name=name,
+                        rider_id=competitors[name][0],
+                        position=position,
+                        discipline=discipline,
+                        points=field_points[position - 1],
+                    ))
+        BracketResult.objects.bulk_create(entries, batch_size=5000)
+
+        self.stdout.write(
+            f'  {len(events)} events, {len(riders)} riders, {len(entries)} bracket entries '
+            f'({time.perf_counter() - started:.2f}s)'
+        )
+
+        started = time.perf_counter()
+        standings_count = rebuild_league_standings(league)
+        rebuild_seconds = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Set-based rebuild: {standings_count} standings in {rebuild_seconds:.2f}s'
+        ))
+
+        if options['compare']:
+            LeagueStanding.objects.filter(league=league).delete()
+            started = time.perf_counter()
+            for result in results:
+                for discipline in disciplines:
+                    update_league_standings_for_bracket(league, discipline, result)
+            incremental_seconds = time.perf_counter() - started
+            self.stdout.write(
+                f'Per-event incremental path: {incremental_seconds:.2f}s '
+                f'({incremental_seconds / max(rebuild_seconds, 1e-9):.1f}x slower)'
+            )
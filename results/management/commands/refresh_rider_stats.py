@@ -0,0 +1,20 @@
+"""
+Management command to rebuild every rider's career statistics.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from results.stats import refresh_rider_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild rider career statistics from all final results'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        riders = refresh_rider_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt stats for {riders} riders in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,68 @@
+"""
+Management command that runs the background worker for result processing jobs.
+"""
+
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from results.jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued result uploads and league recalculations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process all pending jobs and exit instead of polling forever',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=30,
+            help='Requeue running jobs that have not reported progress for this many minutes',
+        )
+
+    def handle(self, *args, **options):
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+
+        requeued, failed = requeue_stale_jobs(options['stale_after'])
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale jobs.'))
+        if failed:
+            self.stdout.write(self.style.ERROR(f'Failed {failed} stale jobs that ran out of attempts.'))
+
+        self.stdout.write(f'Worker {worker_name} waiting for jobs...')
+
+        while True:
+            close_old_connections()
+            job = claim_next_job(worker_name)
+
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            started = time.perf_counter()
+            self.stdout.write(f'Running {job}...')
+            run_job(job)
+            elapsed = time.perf_counter() - started
+
+            if job.status == 'COMPLETED':
+                self.stdout.write(self.style.SUCCESS(f'  Completed in {elapsed:.2f}s: {job.message}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'  Failed after {elapsed:.2f}s: {job.error}'))
+
+        self.stdout.write('Queue empty, exiting.')
@@ -0,0 +1,138 @@
+"""
+Rider name matching for bracket imports.
+
+Bracket files name riders as they were written on the day: "J. Smith",
+"Jose Nunez" for "José Núñez", or a username. A ``RiderNameIndex`` holds
+every profile under a set of normalised keys: transliterated to ASCII,
+casefolded, punctuation dropped. The keys are the username, the display
+name, the full name and the initial-plus-surname form. The index is built
+with one query and cached per process.
+
+A whole file is matched against the index in memory. A name whose key
+belongs to exactly one profile links directly. Other names are scored with
+RapidFuzz. Scores at or above ``AUTO_LINK_SCORE`` link automatically when
+no other profile comes close. Plausible but uncertain names are returned
+with their candidates so they can be queued for review.
+"""
+
+import re
+import time
+from collections import defaultdict, namedtuple
+
+from rapidfuzz import fuzz, process
+from text_unidecode import unidecode
+
+from profiles.models import UserProfile
+
+AUTO_LINK_SCORE = 90
+REVIEW_SCORE = 75
+
+# A fuzzy match only auto-links when the next best profile is this far behind
+AMBIGUITY_MARGIN = 5
+
+CANDIDATE_LIMIT = 3
+
+# Seconds a cached index is trusted before reloading. Profile saves in this
+# process invalidate immediately; the TTL bounds staleness in other workers.
+INDEX_TTL = 300
+
+_index_cache = {}
+
+NameMatch = namedtuple('NameMatch', ['profile_id', 'score', 'candidates'])
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+
+
+def normalize_name(name):
+    """Transliterate, casefold and strip punctuation from a rider name."""
+    name = _NON_WORD.sub(' ', unidecode(name or '').casefold())
+    return ' '.join(name.split())
+
+
+def name_keys(username, first_name, last_name, display_name):
+    """Every normalised key a profile can be written as in a results file."""
+    keys = {normalize_name(username), normalize_name(display_name)}
+    first = normalize_name(first_name)
+    last = normalize_name(last_name)
+    if first and last:
+        keys.add(f"{first} {last}")
+        keys.add(f"{first[0]} {last}")
+    elif first or last:
+        keys.add(first or last)
+    keys.discard('')
+    return keys
+
+
+class RiderNameIndex:
+    """Normalised rider names with the profiles they belong to."""
+
+    def __init__(self, entries):
+        # entries: (profile_id, key) pairs; a key may belong to several profiles
+        self.profiles_by_key = defaultdict(set)
+        for profile_id, key in entries:
+            self.profiles_by_key[key].add(profile_id)
+        self.keys = list(self.profiles_by_key)
+
+    @classmethod
+    def build(cls):
+        """Index every profile with one query."""
+        entries = []
+        for profile_id, *names in UserProfile.objects.values_list(
+            'pk', 'user__username', 'user__first_name', 'user__last_name', 'display_name'
+        ).iterator(chunk_size=2000):
+            entries.extend((profile_id, key) for key in name_keys(*names))
+        return cls(entries)
+
+    def match(self, name):
+        """
+        Match one name against the index.
+
+        Returns:
+            NameMatch: ``profile_id`` is set when the name links automatically.
+            ``candidates`` lists ``(profile_id, score)`` pairs above
+            ``REVIEW_SCORE``, best first.
+        """
+        key = normalize_name(name)
+        if not key:
+            return NameMatch(None, 0, [])
+
+        exact = self.profiles_by_key.get(key)
+        if exact and len(exact) == 1:
+            return NameMatch(next(iter(exact)), 100, [(next(iter(exact)), 100)])
+
+        best = {}
+        for choice, score, _ in process.extract(
+            key, self.keys, scorer=fuzz.token_sort_ratio,
+            score_cutoff=REVIEW_SCORE, limit=CANDIDATE_LIMIT * 2
+        ):
+            for profile_id in self.profiles_by_key[choice]:
+                best[profile_id] = max(best.get(profile_id, 0), score)
+        candidates = sorted(best.items(), key=lambda item: -item[1])[:CANDIDATE_LIMIT]
+
+        if not candidates:
+            return NameMatch(None, 0, [])
+        profile_id, score = candidates[0]
+        runner_up = candidates[1][1] if len(candidates) > 1 else 0
+        if score >= AUTO_LINK_SCORE and score - runner_up >= AMBIGUITY_MARGIN:
+            return NameMatch(profile_id, score, candidates)
+        return NameMatch(None, score, candidates)
+
+    def match_all(self, names):
+        """Match every distinct name in a file; returns ``{name: NameMatch}``."""
+        return {name: self.match(name) for name in set(names)}
+
+
+def get_name_index():
+    """The cached rider name index, rebuilt after ``INDEX_TTL`` seconds."""
+    cached = _index_cache.get('index')
+    if cached is not None and time.monotonic() - cached[0] < INDEX_TTL:
+        return cached[1]
+
+    index = RiderNameIndex.build()
+    _index_cache['index'] = (time.monotonic(), index)
+    return index
+
+
+def invalidate_name_index():
+    """Drop the cached index so the next import rebuilds it."""
+    _index_cache.clear()
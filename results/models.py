@@ -3,10 +3,12 @@ from events.models import Event
 from profiles.models import UserProfile
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
+from django.utils import timezone
 from cloudinary.models import CloudinaryField
 from django_countries.fields import CountryField
 import uuid
 from django.core.files.base import ContentFile
+from .brackets import HeatTree
 
 class League(models.Model):
     CONTINENT_CHOICES = [
@@ -112,12 +114,26 @@ class TimeTrialResult(models.Model):
     result = models.ForeignKey(Result, on_delete=models.CASCADE, related_name='time_trials')
     competitor = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
     position = models.PositiveIntegerField()
-    time = models.DurationField()
+    time = models.DurationField(null=True, blank=True, help_text="Best time, empty if the rider set no time")
     points = models.IntegerField(default=0)
+    
+    # Individual runs from the timing file
+    run_1 = models.DurationField(null=True, blank=True)
+    run_2 = models.DurationField(null=True, blank=True)
+    run_3 = models.DurationField(null=True, blank=True)
+    
+    # Derived when the field is ranked
+    gap_to_leader = models.DurationField(null=True, blank=True)
+    gap_to_previous = models.DurationField(null=True, blank=True)
+    consistency = models.FloatField(null=True, blank=True, help_text="Standard deviation of run times in seconds")
 
     class Meta:
         ordering = ['position']
 
+    @property
+    def runs(self):
+        return [self.run_1, self.run_2, self.run_3]
+
 class KnockoutResult(models.Model):
     ROUND_CHOICES = [
         ('FINAL', 'Final'),
@@ -136,6 +152,66 @@ class KnockoutResult(models.Model):
     class Meta:
         ordering = ['match_number']
 
+class KnockoutBracket(models.Model):
+    """Precomputed heat tree for a knockout result (see results.brackets)"""
+    HEAT_SIZE_CHOICES = [
+        (2, 'Head to head'),
+        (4, 'Four-rider heats'),
+    ]
+
+    result = models.OneToOneField(Result, on_delete=models.CASCADE, related_name='knockout_bracket')
+    heat_size = models.PositiveSmallIntegerField(choices=HEAT_SIZE_CHOICES, default=2)
+    heats = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Heats in heap order, heat i fed by heats 2i+1 and 2i+2: [[riders], [finish order]] or null"
+    )
+    placement_heats = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Placement finals outside the tree, e.g. for 3rd: [[riders], [finish order]]"
+    )
+    riders = models.JSONField(default=dict, blank=True, help_text="JSON with rider details: {rider_id: [username, display name]}")
+    paths = models.JSONField(default=dict, blank=True, help_text="JSON with heats raced: {rider_id: [heat index, ...]}")
+    placings = models.JSONField(default=dict, blank=True, help_text="JSON with final places: {rider_id: place}")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.result} bracket"
+
+    @classmethod
+    def from_tree(cls, result, tree, profiles):
+        """Build (without saving) the stored form of a heat tree"""
+        return cls(
+            result=result,
+            heat_size=tree.heat_size,
+            heats=tree.heats,
+            placement_heats=tree.placement,
+            riders={
+                str(profile.pk): [profile.user.username, profile.get_display_name()]
+                for profile in profiles
+            },
+            paths={str(rider): path for rider, path in tree.paths().items()},
+            placings={str(rider): place for rider, place in tree.placings().items()},
+        )
+
+    @property
+    def tree(self):
+        return HeatTree(self.heats, self.heat_size, self.placement_heats)
+
+    @property
+    def rounds(self):
+        """Heats grouped by round for rendering, with rider details attached"""
+        return self.tree.rounds(self.riders)
+
+    def path_for(self, rider_id):
+        """Heat indices a rider raced in, from first heat to last"""
+        return self.paths.get(str(rider_id), [])
+
+    def placing_for(self, rider_id):
+        """A rider's final place, or None if they did not race"""
+        return self.placings.get(str(rider_id))
+
 class Discipline(models.Model):
     """Represents a discipline within a league (e.g., Open Skate, Women's Skate, Luge, etc.)"""
     name = models.CharField(max_length=100)
@@ -183,6 +259,33 @@ class CSVColumnMapping(models.Model):
         owner = self.league or self.event
         return f"{self.name} → {self.get_field_type_display()} ({owner})"
 
+class Competitor(models.Model):
+    """A rider as they appear in imported results, optionally linked to a profile"""
+    name = models.CharField(max_length=200, help_text="Name shown in standings")
+    profile = models.OneToOneField(
+        UserProfile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='competitor'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+class CompetitorAlias(models.Model):
+    """A normalised spelling of a competitor's name seen in a results file"""
+    competitor = models.ForeignKey(Competitor, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=200, unique=True, help_text="Normalised name (see results.matching)")
+    name = models.CharField(max_length=200, help_text="The name as first written")
+
+    def __str__(self):
+        return f"{self.name} → {self.competitor}"
+
 class BracketResult(models.Model):
     """Individual competitor result for a bracket-style competition"""
     result = models.ForeignKey(Result, on_delete=models.CASCADE, related_name='bracket_results')
@@ -200,6 +303,13 @@ class BracketResult(models.Model):
         blank=True,
         related_name='bracket_results'
     )
+    rider = models.ForeignKey(
+        Competitor,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bracket_results'
+    )
     
     class Meta:
         ordering = ['position']
@@ -220,35 +330,9 @@ class PointsSystem(models.Model):
 
     @classmethod
     def get_points_for_position(cls, position):
-        """Get points for a given position using the standard points system"""
-        try:
-            return cls.objects.get(position=position).points
-        except cls.DoesNotExist:
-            # Calculate points using the standard formula if not in database
-            # This follows the pattern seen in the CSV: 1000, 961, 943, 926, etc.
-            if position == 1:
-                return 1000
-            elif position == 2:
-                return 961
-            elif position == 3:
-                return 943
-            elif position == 4:
-                return 926
-            elif position == 5:
-                return 911
-            elif position == 6:
-                return 896
-            elif position == 7:
-                return 883
-            elif position == 8:
-                return 870
-            elif position == 9:
-                return 857
-            elif position == 10:
-                return 846
-            else:
-                # Approximate formula for positions > 10
-                return max(500, int(1000 * 0.985 ** (position - 1)))
+        """Get points for a given position using the cached points table"""
+        from .points import get_points_table
+        return get_points_table('CUSTOM').points_for(position)
 
 
 class EventDisciplineResult(models.Model):
@@ -268,6 +352,7 @@ class LeagueStanding(models.Model):
     league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='standings')
     competitor = models.ForeignKey(UserProfile, on_delete=models.CASCADE, null=True, blank=True)
     competitor_name = models.CharField(max_length=200)
+    rider = models.ForeignKey(Competitor, on_delete=models.CASCADE, null=True, blank=True, related_name='standings')
     discipline = models.ForeignKey(Discipline, on_delete=models.CASCADE, related_name='standings')
     points = models.IntegerField(default=0)
     position = models.PositiveIntegerField(null=True, blank=True)
@@ -279,7 +364,185 @@ class LeagueStanding(models.Model):
     
     class Meta:
         ordering = ['-points', 'position']
-        unique_together = ['league', 'competitor_name', 'discipline']
+        unique_together = ['league', 'rider', 'discipline']
         
     def __str__(self):
         return f"{self.competitor_name} - {self.discipline.name} - {self.points} pts"
+
+
+
+class StandingsSnapshot(models.Model):
+    """Immutable, versioned copy of a discipline's standings, published after every change"""
+    COLUMNS = [
+        'position', 'competitor_name', 'competitor_id', 'points',
+        'events_competed', 'average_rank', 'event_results'
+    ]
+
+    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='standings_snapshots')
+    discipline = models.ForeignKey(Discipline, on_delete=models.CASCADE, related_name='snapshots')
+    version = models.PositiveIntegerField()
+    rows = models.JSONField(default=list, blank=True, help_text="Standings as lists of values in COLUMNS order")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['discipline', '-version']
+        unique_together = ['discipline', 'version']
+
+    def __str__(self):
+        return f"{self.discipline.name} standings v{self.version}"
+
+    @property
+    def standings(self):
+        """Rows as dictionaries keyed by column name"""
+        return [dict(zip(self.COLUMNS, row)) for row in self.rows]
+
+
+
+class RiderStats(models.Model):
+    """Career statistics for a rider across every event with final results"""
+    rider_key = models.CharField(
+        max_length=220,
+        unique=True,
+        help_text="profile:<id> for linked riders, name:<casefolded name> for bracket-only riders"
+    )
+    profile = models.OneToOneField(
+        UserProfile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='rider_stats'
+    )
+    competitor_name = models.CharField(max_length=200)
+
+    events_raced = models.PositiveIntegerField(default=0)
+    races = models.PositiveIntegerField(default=0, help_text="Placed races, counting each discipline separately")
+    wins = models.PositiveIntegerField(default=0)
+    podiums = models.PositiveIntegerField(default=0)
+    best_position = models.PositiveIntegerField(null=True, blank=True)
+    average_position = models.FloatField(null=True, blank=True)
+    total_points = models.IntegerField(default=0)
+    best_time = models.DurationField(null=True, blank=True, help_text="Fastest time trial run")
+    season_points = models.JSONField(default=dict, blank=True, help_text="JSON with points per season: {year: points}")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-wins', '-podiums', 'competitor_name']
+        indexes = [
+            models.Index(fields=['-wins', '-podiums']),
+            models.Index(fields=['-total_points']),
+        ]
+
+    def __str__(self):
+        return f"{self.competitor_name}: {self.wins} wins, {self.podiums} podiums"
+
+
+class HeadToHead(models.Model):
+    """Knockout record between two riders, stored once per pair with rider_a the lower profile id"""
+    rider_a = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='+')
+    rider_b = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='+')
+    wins_a = models.PositiveIntegerField(default=0)
+    wins_b = models.PositiveIntegerField(default=0)
+    last_met = models.DateField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['rider_a', 'rider_b']
+        indexes = [
+            models.Index(fields=['rider_b']),
+        ]
+
+    def __str__(self):
+        return f"{self.rider_a_id} v {self.rider_b_id}: {self.wins_a}-{self.wins_b}"
+
+    @property
+    def meetings(self):
+        return self.wins_a + self.wins_b
+
+    def record_for(self, profile_id):
+        """(wins, losses) from one rider's side of the pair"""
+        if profile_id == self.rider_a_id:
+            return self.wins_a, self.wins_b
+        return self.wins_b, self.wins_a
+
+    def opponent_of(self, profile_id):
+        return self.rider_b if profile_id == self.rider_a_id else self.rider_a
+
+
+class RiderMatchReview(models.Model):
+    """Imported rider name that could not be linked to a profile with confidence"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('LINKED', 'Linked'),
+        ('DISMISSED', 'Dismissed'),
+    ]
+
+    result = models.ForeignKey(Result, on_delete=models.CASCADE, related_name='match_reviews')
+    competitor_name = models.CharField(max_length=200)
+    candidates = models.JSONField(default=list, blank=True, help_text="JSON with likely profiles: [[profile_id, score], ...]")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    profile = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    resolved_by = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['competitor_name']
+        unique_together = ['result', 'competitor_name']
+        indexes = [
+            models.Index(fields=['result', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.competitor_name} ({self.get_status_display()})"
+
+
+class ProcessingJob(models.Model):
+    """Queued background work for result uploads and league recalculation"""
+    JOB_TYPES = [
+        ('PROCESS_RESULTS', 'Process Time Trial/Knockout Results'),
+        ('PROCESS_BRACKET', 'Process Bracket Results'),
+        ('RECALCULATE_LEAGUE', 'Recalculate League Standings'),
+    ]
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    job_type = models.CharField(max_length=30, choices=JOB_TYPES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    payload = models.JSONField(default=dict, blank=True, help_text="Arguments for the job handler")
+    progress = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])
+    message = models.CharField(max_length=255, blank=True, help_text="Latest progress message")
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, help_text="Worker that claimed the job")
+    created_by = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_job_type_display()} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('COMPLETED', 'FAILED')
+
+    def set_progress(self, progress, message=''):
+        """Record progress so polling clients can follow along"""
+        self.progress = max(0, min(100, int(progress)))
+        self.message = message[:255]
+        # Reporting progress also shows the worker is alive, so long jobs
+        # are not requeued as stale while they are still running
+        self.started_at = timezone.now()
+        ProcessingJob.objects.filter(pk=self.pk).update(
+            progress=self.progress, message=self.message, started_at=self.started_at
+        )
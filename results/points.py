@@ -0,0 +1,129 @@
+"""
+Points tables for converting finishing positions into league points.
+
+Each ``League.points_system`` value maps to a scoring profile that builds a
+``PointsTable``: a flat list indexed by position, so a whole field of
+positions can be scored with plain list lookups instead of a database query
+per rider. Tables are cached per process and invalidated whenever a
+``PointsSystem`` row changes (see ``results.signals``).
+"""
+
+import time
+
+# Built-in scale for the top ten, matching the 1000-961-943... pattern in league CSVs
+STANDARD_TOP_TEN = [1000, 961, 943, 926, 911, 896, 883, 870, 857, 846]
+STANDARD_MINIMUM_POINTS = 500
+STANDARD_DECAY = 0.985
+
+# Positions precomputed into each table; anything beyond falls back to the formula
+TABLE_SIZE = 256
+
+# Seconds a cached table is trusted before reloading. Saves in this process
+# invalidate immediately; the TTL bounds staleness in other worker processes.
+TABLE_TTL = 300
+
+_table_cache = {}
+SCORING_PROFILES = {}
+
+
+def standard_points_for_position(position):
+    """Points for a position on the built-in standard scale."""
+    if 1 <= position <= len(STANDARD_TOP_TEN):
+        return STANDARD_TOP_TEN[position - 1]
+    # Approximate formula for positions > 10
+    return max(STANDARD_MINIMUM_POINTS, int(1000 * STANDARD_DECAY ** (position - 1)))
+
+
+class PointsTable:
+    """Position-to-points lookup backed by a list indexed by position."""
+
+    def __init__(self, points_by_position, fallback=standard_points_for_position):
+        # Index 0 is unused so that table[position] reads naturally
+        self.points = [0] + list(points_by_position)
+        self.fallback = fallback
+
+    def __len__(self):
+        return len(self.points) - 1
+
+    def points_for(self, position):
+        """Points for a single finishing position."""
+        if 0 < position < len(self.points):
+            return self.points[position]
+        return self.fallback(position)
+
+    def points_for_positions(self, positions):
+        """Map a whole sequence of positions to points in one call."""
+        points = self.points
+        size = len(points)
+        fallback = self.fallback
+        return [points[p] if 0 < p < size else fallback(p) for p in positions]
+
+
+def register_scoring_profile(name):
+    """Register a function that builds the points table for a scoring profile."""
+    def decorator(func):
+        SCORING_PROFILES[name] = func
+        return func
+    return decorator
+
+
+@register_scoring_profile('STANDARD')
+def build_standard_table():
+    """The built-in standard scale."""
+    return PointsTable(
+        standard_points_for_position(position) for position in range(1, TABLE_SIZE + 1)
+    )
+
+
+@register_scoring_profile('CUSTOM')
+def build_custom_table():
+    """The admin-maintained ``PointsSystem`` table, on top of the standard scale."""
+    from .models import PointsSystem
+
+    points = [standard_points_for_position(position) for position in range(1, TABLE_SIZE + 1)]
+    for position, value in PointsSystem.objects.values_list('position', 'points'):
+        if position < 1:
+            continue
+        if position > len(points):
+            points.extend(
+                standard_points_for_position(p) for p in range(len(points) + 1, position + 1)
+            )
+        points[position - 1] = value
+    return PointsTable(points)
+
+
+def get_points_table(profile='STANDARD'):
+    """
+    Get the cached points table for a scoring profile.
+
+    Args:
+        profile (str): A ``League.points_system`` value; unknown values use STANDARD
+
+    Returns:
+        PointsTable: The table for the profile
+    """
+    if profile not in SCORING_PROFILES:
+        profile = 'STANDARD'
+
+    cached = _table_cache.get(profile)
+    if cached is not None and time.monotonic() - cached[0] < TABLE_TTL:
+        return cached[1]
+
+    table = SCORING_PROFILES[profile]()
+    _table_cache[profile] = (time.monotonic(), table)
+    return table
+
+
+def get_league_points_table(league=None):
+    """Get the points table for a league's scoring profile."""
+    return get_points_table(league.points_system if league else 'STANDARD')
+
+
+def points_for_positions(positions, league=None):
+    """Score a whole sequence of positions for a league in one call."""
+    return get_league_points_table(league).points_for_positions(positions)
+
+
+def invalidate_points_tables():
+    """Drop every cached table so the next lookup reloads from the database."""
+    _table_cache.clear()
@@ -0,0 +1,99 @@
+"""
+Seeding for upcoming knockouts.
+
+An event's field is the riders with a ``Going`` RSVP. Each rider is ranked
+by their ``LeagueStanding`` points in the leagues the event belongs to. One
+aggregate query returns every rider with their points, and the field is
+sorted in memory. Ties go to the rider who signed up first. Riders without
+standings go last. The seeds then fill first-round heats through
+``HeatTree.from_seeds``.
+
+The CSV export uses the heat columns of ``process_knockout_results``
+(``round, heat, position, rider``). ``position`` starts as the start order,
+so organisers overwrite it with the finishing order and upload the file.
+"""
+
+import csv
+from collections import namedtuple
+
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from events.models import RSVP
+
+from .brackets import ROUND_NAMES, HeatTree, round_for_depth
+
+SEEDING_CSV_COLUMNS = ['round', 'heat', 'position', 'rider', 'seed', 'name', 'points']
+
+SeededRider = namedtuple('SeededRider', ['seed', 'profile_id', 'username', 'name', 'points'])
+
+
+def seed_event_riders(event, discipline=None):
+    """
+    Seed an event's registered riders by league points.
+
+    Args:
+        event (Event): The event being seeded
+        discipline (str): Optional discipline slug to take points from
+
+    Returns:
+        list: ``SeededRider`` tuples, top seed first
+    """
+    standings = Q(user__leaguestanding__league__league_events__event=event)
+    if discipline:
+        standings &= Q(user__leaguestanding__discipline__slug=discipline)
+
+    riders = RSVP.objects.filter(event=event, status='Going').values_list(
+        'user', 'user__user__username', 'user__display_name', 'created_at'
+    ).annotate(
+        points=Coalesce(Sum('user__leaguestanding__points', filter=standings), 0)
+    ).order_by()
+
+    ranked = sorted(riders, key=lambda row: (-row[4], row[3], row[1]))
+    return [
+        SeededRider(seed, profile_id, username, display_name or username, points)
+        for seed, (profile_id, username, display_name, _, points) in enumerate(ranked, start=1)
+    ]
+
+
+def build_heat_sheet(seeds, heat_size=4):
+    """
+    Place seeded riders into first-round heats.
+
+    Args:
+        seeds (list): ``SeededRider`` tuples, top seed first
+        heat_size (int): 2 or 4 riders per heat
+
+    Returns:
+        tuple: (round code, round name, heats) where each heat is a dict with
+        its ``number`` and ``riders`` in start order
+
+    Raises:
+        ValueError: If the field needs more rounds than a knockout upload supports
+    """
+    if not seeds:
+        return None, None, []
+
+    tree = HeatTree.from_seeds(list(seeds), heat_size)
+    if 2 ** tree.depth not in ROUND_NAMES:
+        raise ValueError(f"Too many riders to seed ({len(seeds)}) for {heat_size}-rider heats.")
+
+    code, name = round_for_depth(tree.depth)
+    first = 2 ** tree.depth - 1
+    heats = [
+        {'number': number, 'riders': tree.heats[index][0]}
+        for number, index in enumerate(range(first, 2 * first + 1), start=1)
+    ]
+    return code, name, heats
+
+
+def write_heat_sheet_csv(output, round_code, heats):
+    """Write a heat sheet in the knockout upload's heat format."""
+    writer = csv.writer(output)
+    writer.writerow(SEEDING_CSV_COLUMNS)
+    for heat in heats:
+        for position, rider in enumerate(heat['riders'], start=1):
+            writer.writerow([
+                round_code, heat['number'], position, rider.username, rider.seed, rider.name, rider.points
+            ])
+    return output
@@ -0,0 +1,55 @@
+"""
+Signal handlers for the results application.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from profiles.models import UserProfile
+
+from .head_to_head import record_result_head_to_head
+from .matching import invalidate_name_index
+from .models import PointsSystem, Result
+from .points import invalidate_points_tables
+from .stats import refresh_rider_stats, riders_in_result
+from .views import invalidate_event_results
+
+
+@receiver(post_save, sender=PointsSystem)
+@receiver(post_delete, sender=PointsSystem)
+def invalidate_points_tables_on_change(sender, **kwargs):
+    """Reload the cached points tables after the points system is edited."""
+    invalidate_points_tables()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_name_index_on_change(sender, **kwargs):
+    """Rebuild the rider name index after a rider's names change."""
+    invalidate_name_index()
+
+
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+def invalidate_event_results_on_change(sender, instance, **kwargs):
+    """Rebuild the event's cached results page after an upload or deletion."""
+    invalidate_event_results(instance.event_id)
+
+
+@receiver(pre_delete, sender=Result)
+def refresh_rider_stats_on_delete(sender, instance, **kwargs):
+    """Recompute stats for the result's riders once its rows are gone."""
+    if not instance.is_final:
+        return
+    profile_ids, names = riders_in_result(instance)
+    transaction.on_commit(lambda: refresh_rider_stats(profile_ids, names))
+
+
+@receiver(pre_delete, sender=Result)
+def remove_head_to_head_on_delete(sender, instance, **kwargs):
+    """Take a final knockout's meetings back out of the head-to-head records."""
+    if instance.is_final and instance.result_type == 'KNOCKOUT':
+        record_result_head_to_head(instance, sign=-1)
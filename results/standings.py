@@ -0,0 +1,297 @@
+"""
+League standings engine.
+
+Maintains ``LeagueStanding`` rows from bracket results, either incrementally
+after a single upload or as a set-based rebuild of a whole league. Standings
+are keyed on the result's ``Competitor``, so every spelling of a rider's name
+adds to one standing. After each
+change a versioned ``StandingsSnapshot`` is published per discipline, and the
+standings page and JSON endpoint read from those.
+"""
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, OuterRef, Q, Subquery, Sum, Window
+from django.db.models.functions import Floor, RowNumber
+from django.utils.text import slugify
+
+from .competitors import assign_competitors
+from .models import BracketResult, Discipline, LeagueEvent, LeagueStanding, StandingsSnapshot
+
+# Snapshot versions kept per discipline
+SNAPSHOT_HISTORY = 5
+
+
+def update_league_standings_for_bracket(league, discipline, result):
+    """
+    Update league standings based on bracket results.
+
+    Each standing's totals are derived from its per-event contributions in
+    ``event_results`` (keyed by event slug), so re-uploading an event replaces
+    that event's contribution instead of adding it a second time. Riders who
+    dropped out of a re-uploaded discipline lose the stale contribution.
+    """
+    # Get or create the discipline object
+    discipline_obj, created = Discipline.objects.get_or_create(
+        league=league,
+        name=discipline,
+        defaults={'slug': discipline.lower().replace(' ', '-')}
+    )
+    
+    # Get the event and league event relationship
+    event = result.event
+    try:
+        league_event = LeagueEvent.objects.get(league=league, event=event)
+        multiplier = league_event.multiplier
+    except LeagueEvent.DoesNotExist:
+        # If this event isn't part of the league, create the relationship
+        league_event = LeagueEvent.objects.create(
+            league=league, 
+            event=event,
+            multiplier=1.0,
+            weight=100
+        )
+        multiplier = 1.0
+    
+    # Get all bracket results for this discipline
+    bracket_results = BracketResult.objects.filter(
+        result=result,
+        discipline=discipline
+    )
+    assign_competitors(bracket_results)
+    bracket_results = bracket_results.select_related('rider').order_by('position')
+
+    # Process each result
+    with transaction.atomic():
+        # Load every existing standing for this discipline once, keyed by rider
+        standings = {
+            standing.rider_id: standing
+            for standing in LeagueStanding.objects.select_for_update().filter(
+                league=league,
+                discipline=discipline_obj
+            )
+        }
+        touched = set()
+
+        for br in bracket_results:
+            # Calculate adjusted points based on multiplier
+            adjusted_points = int(br.points * multiplier)
+
+            standing = standings.get(br.rider_id)
+            if standing is None:
+                standing = LeagueStanding(
+                    league=league,
+                    discipline=discipline_obj,
+                    rider=br.rider,
+                    competitor_name=br.rider.name,
+                    competitor=br.competitor_profile,
+                    position=br.position,  # Initial position same as event position
+                    event_results={}
+                )
+                standings[br.rider_id] = standing
+            elif standing.competitor is None and br.competitor_profile:
+                standing.competitor = br.competitor_profile
+
+            # Replace (never accumulate) this event's contribution
+            standing.event_results[event.slug] = {
+                'points': adjusted_points,
+                'position': br.position
+            }
+            apply_event_contributions(standing)
+            standing.save()
+            touched.add(br.rider_id)
+
+        # Remove this event's stale contribution from riders no longer listed
+        for rider_id, standing in standings.items():
+            if rider_id in touched or event.slug not in standing.event_results:
+                continue
+
+            del standing.event_results[event.slug]
+            if standing.event_results:
+                apply_event_contributions(standing)
+                standing.save()
+            else:
+                standing.delete()
+
+        # Recalculate positions and average rank
+        recalculate_league_standings(league, discipline_obj)
+
+
+def apply_event_contributions(standing):
+    """Derive a standing's totals from its per-event contributions."""
+    event_results = standing.event_results
+    standing.points = sum(entry.get('points', 0) for entry in event_results.values())
+    standing.events_competed = len(event_results)
+
+
+def recalculate_league_standings(league, discipline):
+    """Recalculate positions and stats for league standings"""
+    standings = LeagueStanding.objects.filter(
+        league=league,
+        discipline=discipline
+    ).order_by('-points', 'competitor_name')
+    
+    # Update positions
+    position = 1
+    for standing in standings:
+        # Calculate average rank from event results
+        if standing.event_results and standing.events_competed > 0:
+            positions = [result.get('position', 0) for result in standing.event_results.values()]
+            standing.average_rank = sum(positions) / len(positions)
+        
+        standing.position = position
+        standing.save()
+        position += 1
+
+    publish_standings_snapshots(league, [discipline])
+
+
+def rebuild_league_standings(league):
+    """
+    Rebuild every standing in a league from its final bracket results.
+
+    Totals, event counts, average rank and positions are computed by a single
+    aggregate query over ``BracketResult`` joined to ``LeagueEvent`` (ranking
+    happens in SQL with ``ROW_NUMBER()``), and the standings are written back
+    with ``bulk_create``. Per-event contributions for ``event_results`` are
+    streamed from one flat query so incremental updates keep working after a
+    rebuild.
+
+    Returns:
+        int: Number of standings created
+    """
+    entries = BracketResult.objects.filter(
+        result__event__league_links__league=league,
+        result__result_type='BRACKET',
+        result__is_final=True
+    )
+    assign_competitors(entries)
+    # Truncate per entry, matching int(points * multiplier) in incremental updates
+    adjusted_points = Floor(F('points') * F('result__event__league_links__multiplier'))
+
+    totals = entries.values('discipline', 'rider', 'rider__name').annotate(
+        total_points=Sum(adjusted_points),
+        events_competed=Count('result__event', distinct=True),
+        average_rank=Avg('position'),
+        competitor_id=Max('competitor_profile'),
+    ).annotate(
+        rank=Window(
+            expression=RowNumber(),
+            partition_by=[F('discipline')],
+            order_by=[F('total_points').desc(), F('rider__name').asc()],
+        )
+    ).order_by()
+
+    contributions = entries.annotate(
+        adjusted_points=adjusted_points
+    ).values_list(
+        'discipline', 'rider', 'result__event__slug', 'position', 'adjusted_points'
+    ).order_by()
+
+    with transaction.atomic():
+        LeagueStanding.objects.filter(league=league).delete()
+
+        event_results = {}
+        for discipline, rider_id, event_slug, position, points in contributions.iterator(chunk_size=2000):
+            event_results.setdefault((discipline, rider_id), {})[event_slug] = {
+                'points': int(points),
+                'position': position
+            }
+
+        disciplines = {d.name: d for d in Discipline.objects.filter(league=league)}
+        missing = {discipline for discipline, _ in event_results} - disciplines.keys()
+        if missing:
+            Discipline.objects.bulk_create([
+                Discipline(league=league, name=name, slug=slugify(name))
+                for name in sorted(missing)
+            ])
+            disciplines = {d.name: d for d in Discipline.objects.filter(league=league)}
+
+        standings = [
+            LeagueStanding(
+                league=league,
+                discipline=disciplines[row['discipline']],
+                rider_id=row['rider'],
+                competitor_name=row['rider__name'],
+                competitor_id=row['competitor_id'],
+                points=int(row['total_points'] or 0),
+                position=row['rank'],
+                events_competed=row['events_competed'],
+                average_rank=row['average_rank'] or 0,
+                event_results=event_results.get((row['discipline'], row['rider']), {}),
+            )
+            for row in totals
+        ]
+        LeagueStanding.objects.bulk_create(standings, batch_size=1000)
+
+        publish_standings_snapshots(league, disciplines.values())
+
+    return len(standings)
+
+
+def publish_standings_snapshots(league, disciplines):
+    """
+    Publish a new standings snapshot version for each discipline.
+
+    Snapshots are never modified; readers always take the latest version, and
+    only the last ``SNAPSHOT_HISTORY`` versions per discipline are kept.
+
+    Returns:
+        list: The created ``StandingsSnapshot`` rows
+    """
+    disciplines = list(disciplines)
+    if not disciplines:
+        return []
+
+    latest_versions = dict(
+        StandingsSnapshot.objects.filter(discipline__in=disciplines)
+        .values('discipline')
+        .annotate(latest=Max('version'))
+        .values_list('discipline', 'latest')
+    )
+
+    rows = {discipline.pk: [] for discipline in disciplines}
+    standings = LeagueStanding.objects.filter(
+        league=league, discipline__in=disciplines
+    ).order_by('discipline', 'position').values_list('discipline', *StandingsSnapshot.COLUMNS)
+    for discipline_id, *row in standings:
+        rows[discipline_id].append(row)
+
+    snapshots = StandingsSnapshot.objects.bulk_create([
+        StandingsSnapshot(
+            league=league,
+            discipline=discipline,
+            version=latest_versions.get(discipline.pk, 0) + 1,
+            rows=rows[discipline.pk],
+        )
+        for discipline in disciplines
+    ])
+
+    expired = Q()
+    for snapshot in snapshots:
+        expired |= Q(discipline=snapshot.discipline, version__lte=snapshot.version - SNAPSHOT_HISTORY)
+    StandingsSnapshot.objects.filter(expired).delete()
+
+    return snapshots
+
+
+def get_latest_snapshots(league):
+    """
+    Get the current standings snapshot of every discipline in a league.
+
+    Leagues whose standings predate snapshots are published on first read.
+
+    Returns:
+        list: ``StandingsSnapshot`` rows ordered by discipline
+    """
+    latest_version = StandingsSnapshot.objects.filter(
+        discipline=OuterRef('discipline')
+    ).order_by('-version').values('version')[:1]
+
+    snapshots = list(
+        StandingsSnapshot.objects.filter(league=league, version=Subquery(latest_version))
+        .select_related('discipline')
+        .order_by('discipline')
+    )
+    if not snapshots and LeagueStanding.objects.filter(league=league).exists():
+        snapshots = publish_standings_snapshots(league, Discipline.objects.filter(league=league).order_by('pk'))
+    return snapshots
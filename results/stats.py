@@ -0,0 +1,182 @@
+"""
+Rider career statistics.
+
+``RiderStats`` holds one row per rider, built from every final bracket, time
+trial and knockout result. Knockouts are read through their
+``KnockoutBracket``. Linked riders are keyed by profile. Bracket-only riders
+are keyed by their normalised name (see ``results.matching``), so "John
+Smith" and "JOHN SMITH" are one career. Rows are refreshed for the riders in a result
+when it is processed or deleted. ``refresh_rider_stats`` with no arguments
+rebuilds the whole table.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+
+from profiles.models import UserProfile
+
+from .matching import normalize_name
+from .models import BracketResult, KnockoutBracket, RiderStats, TimeTrialResult
+
+
+def rider_key(profile_id, name=''):
+    """Stats key for a linked profile or a bracket-only competitor name."""
+    if profile_id:
+        return f"profile:{profile_id}"
+    return f"name:{normalize_name(name)}"
+
+
+class _Career:
+    """Accumulates one rider's results before they are written to ``RiderStats``."""
+
+    def __init__(self, profile_id, name):
+        self.profile_id = profile_id
+        self.name = name
+        self.events = set()
+        self.positions = []
+        self.season_points = {}
+        self.best_time = None
+
+    def add(self, event_id, start_date, position=None, points=0):
+        self.events.add(event_id)
+        if position:
+            self.positions.append(position)
+        if points:
+            season = str(start_date.year)
+            self.season_points[season] = self.season_points.get(season, 0) + points
+
+    def as_stats(self, key):
+        positions = self.positions
+        return RiderStats(
+            rider_key=key,
+            profile_id=self.profile_id,
+            competitor_name=self.name,
+            events_raced=len(self.events),
+            races=len(positions),
+            wins=sum(1 for p in positions if p == 1),
+            podiums=sum(1 for p in positions if p <= 3),
+            best_position=min(positions) if positions else None,
+            average_position=sum(positions) / len(positions) if positions else None,
+            total_points=sum(self.season_points.values()),
+            best_time=self.best_time,
+            season_points=self.season_points,
+        )
+
+
+def riders_in_result(result):
+    """
+    Collect the riders whose stats depend on a result.
+
+    Returns:
+        tuple: (profile ids, bracket-only competitor names)
+    """
+    profile_ids = set()
+    names = set()
+
+    for profile_id, name in result.bracket_results.values_list('competitor_profile', 'competitor_name'):
+        if profile_id:
+            profile_ids.add(profile_id)
+        else:
+            names.add(name)
+    profile_ids.update(result.time_trials.values_list('competitor', flat=True))
+    for paths in KnockoutBracket.objects.filter(result=result).values_list('paths', flat=True):
+        profile_ids.update(int(rider) for rider in paths)
+
+    return profile_ids, names
+
+
+def refresh_rider_stats(profile_ids=None, names=None):
+    """
+    Recompute career stats for some riders, or for everyone.
+
+    Args:
+        profile_ids (iterable): Linked riders to refresh
+        names (iterable): Bracket-only competitor names to refresh
+
+    With neither argument the whole table is rebuilt.
+
+    Returns:
+        int: Number of riders with stats after the refresh
+    """
+    rebuild = profile_ids is None and names is None
+    profile_ids = set(profile_ids or ())
+    names = set(names or ())
+    if not rebuild and not profile_ids and not names:
+        return 0
+
+    brackets = BracketResult.objects.filter(result__is_final=True, result__result_type='BRACKET')
+    time_trials = TimeTrialResult.objects.filter(result__is_final=True)
+    knockouts = KnockoutBracket.objects.filter(result__is_final=True)
+    if not rebuild:
+        # Other spellings of a name share its competitor's alias
+        brackets = brackets.filter(
+            Q(competitor_profile__in=profile_ids)
+            | Q(competitor_profile__isnull=True, competitor_name__in=names)
+            | Q(competitor_profile__isnull=True, rider__aliases__alias__in={normalize_name(n) for n in names})
+        ).distinct()
+        time_trials = time_trials.filter(competitor__in=profile_ids)
+        # Heat trees are keyed by rider, so only brackets they rode are read
+        if profile_ids:
+            knockouts = knockouts.filter(paths__has_any_keys=[str(pk) for pk in profile_ids])
+        else:
+            knockouts = knockouts.none()
+
+    careers = {}
+
+    def career(profile_id, name=''):
+        key = rider_key(profile_id, name)
+        if key not in careers:
+            careers[key] = _Career(profile_id, name.strip())
+        return careers[key]
+
+    for profile_id, name, event_id, start_date, position, points in brackets.values_list(
+        'competitor_profile', 'competitor_name', 'result__event', 'result__event__start_date',
+        'position', 'points'
+    ).iterator(chunk_size=2000):
+        career(profile_id, name).add(event_id, start_date, position, points)
+
+    for profile_id, event_id, start_date, position, points, time in time_trials.values_list(
+        'competitor', 'result__event', 'result__event__start_date', 'position', 'points', 'time'
+    ).iterator(chunk_size=2000):
+        rider = career(profile_id)
+        # Riders without a time are listed last but did not finish
+        rider.add(event_id, start_date, position if time is not None else None, points)
+        if time is not None and (rider.best_time is None or time < rider.best_time):
+            rider.best_time = time
+
+    # Knockout riders take their final place from the precomputed heat tree
+    for event_id, start_date, paths, placings in knockouts.values_list(
+        'result__event', 'result__event__start_date', 'paths', 'placings'
+    ).iterator(chunk_size=500):
+        for rider in paths:
+            profile_id = int(rider)
+            if rebuild or profile_id in profile_ids:
+                career(profile_id).add(event_id, start_date, placings.get(rider))
+
+    # Linked riders are shown under their profile's display name
+    linked = [c for c in careers.values() if c.profile_id]
+    for profile in UserProfile.objects.filter(
+        pk__in=[c.profile_id for c in linked]
+    ).select_related('user').only('display_name', 'user__username'):
+        careers[rider_key(profile.pk)].name = profile.get_display_name()
+
+    stats = [rider.as_stats(key) for key, rider in careers.items()]
+
+    with transaction.atomic():
+        if rebuild:
+            RiderStats.objects.all().delete()
+        else:
+            RiderStats.objects.filter(
+                rider_key__in={rider_key(pk) for pk in profile_ids}
+                | {rider_key(None, n) for n in names}
+                | careers.keys()
+            ).delete()
+        RiderStats.objects.bulk_create(stats, batch_size=1000)
+
+    return len(stats)
+
+
+def refresh_rider_stats_for_result(result):
+    """Refresh the stats of every rider in a result."""
+    profile_ids, names = riders_in_result(result)
+    return refresh_rider_stats(profile_ids, names)
@@ -0,0 +1,90 @@
+"""
+Background job handlers for result processing.
+
+Registered with the job queue in ``results.jobs`` when the app is ready.
+"""
+
+import io
+
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import Event
+
+from .head_to_head import record_result_head_to_head
+from .jobs import job_handler
+from .models import League, Result
+from .standings import rebuild_league_standings, update_league_standings_for_bracket
+from .stats import refresh_rider_stats_for_result
+from .views import process_knockout_results, process_time_trial_results, save_bracket_results
+
+
+def _mark_event_has_results(event):
+    # Also touches Event.updated, which invalidates the cached results page
+    Event.objects.filter(pk=event.pk).update(has_results=True, updated=timezone.now())
+
+
+@job_handler('PROCESS_RESULTS')
+def process_results_job(job, payload):
+    """Parse an uploaded time trial or knockout CSV into result rows."""
+    result = Result.objects.select_related('event').get(pk=payload['result_id'])
+    job.set_progress(10, f"Processing {result.get_result_type_display()} results")
+
+    try:
+        with transaction.atomic():
+            csv_data = io.StringIO(payload['csv_data'])
+            if result.result_type == 'TIME_TRIAL':
+                process_time_trial_results(csv_data, result)
+            elif result.result_type == 'KNOCKOUT':
+                process_knockout_results(csv_data, result)
+                if result.is_final:
+                    record_result_head_to_head(result)
+    except Exception:
+        # Nothing else references the result yet, so drop it like a rolled back upload
+        result.delete()
+        raise
+
+    _mark_event_has_results(result.event)
+    if result.is_final:
+        refresh_rider_stats_for_result(result)
+    job.message = f"{result.get_result_type_display()} results uploaded successfully."
+
+
+@job_handler('PROCESS_BRACKET')
+def process_bracket_job(job, payload):
+    """Save bracket results and update the league standings they affect."""
+    result = Result.objects.select_related('event').get(pk=payload['result_id'])
+    league = League.objects.get(pk=payload['league_id'])
+    job.set_progress(5, "Saving bracket results")
+
+    try:
+        with transaction.atomic():
+            disciplines = sorted(save_bracket_results(result, payload))
+    except Exception:
+        result.delete()
+        raise
+
+    _mark_event_has_results(result.event)
+    if result.is_final:
+        refresh_rider_stats_for_result(result)
+
+    # Each discipline commits on its own so progress is visible while polling
+    for index, discipline in enumerate(disciplines):
+        job.set_progress(
+            50 + 50 * index // len(disciplines),
+            f"Updating {discipline} standings ({index + 1}/{len(disciplines)})"
+        )
+        update_league_standings_for_bracket(league, discipline, result)
+
+    job.message = "Bracket results uploaded and league standings updated successfully!"
+
+
+@job_handler('RECALCULATE_LEAGUE')
+def recalculate_league_job(job, payload):
+    """Rebuild every standing in a league."""
+    league = League.objects.get(pk=payload['league_id'])
+    job.set_progress(10, f"Recalculating {league.name} standings")
+
+    standings_count = rebuild_league_standings(league)
+
+    job.message = f"League standings recalculated successfully ({standings_count} standings)."
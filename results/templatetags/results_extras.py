@@ -6,3 +6,21 @@ register = template.Library()
 def get_item(dictionary, key):
     """Get an item from a dictionary by key"""
     return dictionary.get(key, [])
+
+@register.filter
+def race_time(value):
+    """Format a duration as M:SS.fff, or SS.fff under a minute"""
+    if value is None or value == '':
+        return '-'
+    seconds = value.total_seconds()
+    minutes, seconds = divmod(seconds, 60)
+    if minutes:
+        return f"{int(minutes)}:{seconds:06.3f}"
+    return f"{seconds:.3f}"
+
+@register.filter
+def race_gap(value):
+    """Format a gap as +S.fff, empty for the leader"""
+    if not value:
+        return ''
+    return f"+{value.total_seconds():.3f}"
@@ -1,3 +1,1204 @@
-from django.test import TestCase
+"""
+Tests for results processing and league standings.
+"""
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.urls import reverse
+from datetime import date, timedelta
+from io import StringIO
+from unittest.mock import patch
+import json
+
+from events.models import RSVP, Event
+from profiles.models import UserProfile
+from .brackets import HeatTree
+from .competitors import link_competitor, resolve_competitors
+from .exports import export_rows
+from .head_to_head import get_head_to_head, heat_meetings
+from .jobs import claim_next_job, enqueue_job, requeue_stale_jobs
+from .matching import get_name_index, invalidate_name_index, normalize_name
+from .models import (
+    BracketResult, Competitor, Discipline, HeadToHead, KnockoutBracket, KnockoutResult, League,
+    LeagueEvent, LeagueStanding, PointsSystem, ProcessingJob, Result, RiderMatchReview, RiderStats,
+    StandingsSnapshot, TimeTrialResult
+)
+from .points import get_points_table, invalidate_points_tables, points_for_positions
+from .seeding import build_heat_sheet, seed_event_riders, write_heat_sheet_csv
+from .standings import (
+    SNAPSHOT_HISTORY, get_latest_snapshots, rebuild_league_standings,
+    update_league_standings_for_bracket
+)
+from .stats import refresh_rider_stats, refresh_rider_stats_for_result
+from .timing import RankedRider, parse_seconds, rank_field
+from .views import (
+    get_discipline_podiums, get_event_results_context, process_knockout_results,
+    process_time_trial_results, save_bracket_results
+)
+
+
+class LeagueStandingsTestCase(TestCase):
+    """Test cases for incremental league standings updates."""
+
+    def setUp(self):
+        """Set up a league with two events."""
+        self.organizer = User.objects.create_user('organizer', 'organizer@test.com', 'password')
+        self.league = League.objects.create(name='Test League', season=2025)
+        self.event_a = self.create_event('Event A')
+        self.event_b = self.create_event('Event B')
+
+    def create_event(self, title, multiplier=1.0):
+        """Create an event and link it to the league."""
+        event = Event.objects.create(
+            title=title,
+            organizer=self.organizer.profile,
+            event_type='Race',
+            skill_level='Advanced',
+        )
+        LeagueEvent.objects.create(league=self.league, event=event, multiplier=multiplier)
+        return event
+
+    def upload(self, event, rows, discipline='Open'):
+        """Simulate a bracket upload for an event."""
+        Result.objects.filter(event=event, result_type='BRACKET').delete()
+        result = Result.objects.create(
+            event=event,
+            result_type='BRACKET',
+            raw_data='results/test.csv',
+            is_final=True,
+        )
+        for position, (name, points) in enumerate(rows, start=1):
+            BracketResult.objects.create(
+                result=result,
+                competitor_name=name,
+                position=position,
+                discipline=discipline,
+                points=points,
+            )
+        update_league_standings_for_bracket(self.league, discipline, result)
+        return result
+
+    def standing(self, name):
+        return LeagueStanding.objects.get(league=self.league, competitor_name=name)
+
+    def test_reupload_replaces_event_contribution(self):
+        """Uploading the same event twice must not double-count points."""
+        rows = [('Alice', 1000), ('Bob', 961)]
+        self.upload(self.event_a, rows)
+        self.upload(self.event_a, rows)
+
+        alice = self.standing('Alice')
+        self.assertEqual(alice.points, 1000)
+        self.assertEqual(alice.events_competed, 1)
+        self.assertEqual(alice.position, 1)
+
+    def test_reupload_with_corrected_results(self):
+        """A corrected upload swaps the event contribution for each rider."""
+        self.upload(self.event_a, [('Alice', 1000), ('Bob', 961)])
+        self.upload(self.event_b, [('Bob', 1000), ('Alice', 961)])
+        self.upload(self.event_a, [('Bob', 1000), ('Alice', 961)])
+
+        self.assertEqual(self.standing('Alice').points, 1922)
+        self.assertEqual(self.standing('Bob').points, 2000)
+        self.assertEqual(self.standing('Bob').position, 1)
+
+    def test_reupload_drops_removed_riders(self):
+        """Riders missing from a re-upload lose that event's points."""
+        self.upload(self.event_a, [('Alice', 1000), ('Bob', 961)])
+        self.upload(self.event_b, [('Bob', 1000)])
+        self.upload(self.event_a, [('Alice', 1000)])
+
+        bob = self.standing('Bob')
+        self.assertEqual(bob.points, 1000)
+        self.assertEqual(bob.events_competed, 1)
+        self.assertNotIn(self.event_a.slug, bob.event_results)
+
+        self.upload(self.event_b, [('Alice', 1000)])
+        self.assertFalse(
+            LeagueStanding.objects.filter(league=self.league, competitor_name='Bob').exists()
+        )
+
+    def test_multiplier_applied_once(self):
+        """Event multipliers scale the contribution without compounding."""
+        LeagueEvent.objects.filter(event=self.event_a).update(multiplier=2.0)
+        self.upload(self.event_a, [('Alice', 1000)])
+        self.upload(self.event_a, [('Alice', 1000)])
+
+        self.assertEqual(self.standing('Alice').points, 2000)
+        self.assertTrue(Discipline.objects.filter(league=self.league, name='Open').exists())
+
+    def test_rebuild_matches_incremental_updates(self):
+        """A full rebuild reproduces the incrementally maintained standings."""
+        LeagueEvent.objects.filter(event=self.event_b).update(multiplier=1.5)
+        self.upload(self.event_a, [('Alice', 1000), ('Bob', 961), ('Cara', 943)])
+        self.upload(self.event_b, [('Cara', 1000), ('Alice', 961)])
+        self.upload(self.create_event('Event C'), [('Cara', 1000), ('Bob', 961)], discipline='Luge')
+
+        def snapshot():
+            return sorted(
+                LeagueStanding.objects.filter(league=self.league).values_list(
+                    'discipline__name', 'competitor_name', 'points', 'position',
+                    'events_competed', 'average_rank', 'event_results'
+                )
+            )
+
+        incremental = snapshot()
+        count = rebuild_league_standings(self.league)
+
+        self.assertEqual(count, len(incremental))
+        self.assertEqual(snapshot(), incremental)
+
+    def test_rebuild_ignores_provisional_results(self):
+        """Only final bracket results count towards a rebuild."""
+        self.upload(self.event_a, [('Alice', 1000)])
+        Result.objects.filter(event=self.event_a).update(is_final=False)
+
+        rebuild_league_standings(self.league)
+
+        self.assertFalse(LeagueStanding.objects.filter(league=self.league).exists())
+
+    def test_each_change_publishes_a_snapshot(self):
+        """Uploads and rebuilds publish new snapshot versions without editing old ones."""
+        self.upload(self.event_a, [('Alice', 1000), ('Bob', 961)])
+        first = get_latest_snapshots(self.league)[0]
+        self.assertEqual(first.version, 1)
+        self.assertEqual([row['competitor_name'] for row in first.standings], ['Alice', 'Bob'])
+
+        self.upload(self.event_b, [('Bob', 1000)])
+        rebuild_league_standings(self.league)
+
+        latest = get_latest_snapshots(self.league)[0]
+        self.assertEqual(latest.version, 3)
+        self.assertEqual([row['competitor_name'] for row in latest.standings], ['Bob', 'Alice'])
+        first.refresh_from_db()
+        self.assertEqual([row[1] for row in first.rows], ['Alice', 'Bob'])
+
+    def test_snapshot_history_is_pruned(self):
+        """Only the most recent snapshot versions are kept."""
+        for _ in range(SNAPSHOT_HISTORY + 2):
+            self.upload(self.event_a, [('Alice', 1000)])
+
+        versions = list(StandingsSnapshot.objects.values_list('version', flat=True))
+        self.assertEqual(len(versions), SNAPSHOT_HISTORY)
+        self.assertEqual(max(versions), SNAPSHOT_HISTORY + 2)
+
+    def test_standings_json_endpoint(self):
+        """The JSON endpoint serves the latest snapshot rows."""
+        self.upload(self.event_a, [('Alice', 1000), ('Bob', 961)])
+        self.upload(self.event_b, [('Cara', 1000)], discipline='Luge')
+
+        url = reverse('results:league_standings_json', args=[self.league.slug])
+        data = self.client.get(url, {'discipline': 'luge'}).json()
+
+        self.assertEqual(len(data['disciplines']), 1)
+        luge = data['disciplines'][0]
+        row = dict(zip(data['columns'], luge['rows'][0]))
+        self.assertEqual(row['competitor_name'], 'Cara')
+        self.assertEqual(row['points'], 1000)
+        self.assertEqual(row['position'], 1)
+
+
+class PointsTableTestCase(TestCase):
+    """Test cases for the cached points tables."""
+
+    def setUp(self):
+        invalidate_points_tables()
+
+    def test_standard_scale(self):
+        """Batch lookups match the standard formula, including past the table."""
+        positions = [1, 2, 10, 11, 46, 47, 1000]
+        self.assertEqual(
+            points_for_positions(positions),
+            [1000, 961, 846, int(1000 * 0.985 ** 10), int(1000 * 0.985 ** 45), 500, 500]
+        )
+
+    def test_table_is_cached_and_invalidated_on_save(self):
+        """The custom table loads once and reloads after PointsSystem changes."""
+        league = League.objects.create(name='Custom League', season=2025, points_system='CUSTOM')
+        PointsSystem.objects.create(position=1, points=1200)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(points_for_positions([1, 2], league), [1200, 961])
+            self.assertEqual(PointsSystem.get_points_for_position(1), 1200)
+
+        PointsSystem.objects.filter(position=1).update(points=1100)
+        self.assertEqual(get_points_table('CUSTOM').points_for(1), 1200)
+
+        points = PointsSystem.objects.get(position=1)
+        points.save()
+        self.assertEqual(get_points_table('CUSTOM').points_for(1), 1100)
+
+        points.delete()
+        self.assertEqual(get_points_table('CUSTOM').points_for(1), 1000)
+
+    def test_standard_league_ignores_custom_table(self):
+        """Leagues on the standard profile keep the built-in scale."""
+        league = League.objects.create(name='Standard League', season=2025)
+        PointsSystem.objects.create(position=1, points=1200)
+
+        self.assertEqual(points_for_positions([1], league), [1000])
+
+
+class ViewResultsTestCase(TestCase):
+    """Test cases for the event results page."""
+
+    def setUp(self):
+        """Set up an event with two bracket disciplines."""
+        cache.clear()
+        self.user = User.objects.create_user('organizer', 'organizer@test.com', 'password')
+        self.event = Event.objects.create(
+            title='Results Event',
+            organizer=self.user.profile,
+            event_type='Race',
+            skill_level='Advanced',
+        )
+        self.result = Result.objects.create(
+            event=self.event,
+            result_type='BRACKET',
+            raw_data='results/test.csv',
+            is_final=True,
+        )
+        for discipline in ['Open', 'Luge']:
+            for position, name in enumerate(['Alice', 'Bob', 'Cara'], start=1):
+                BracketResult.objects.create(
+                    result=self.result,
+                    competitor_name=f'{name} {discipline}',
+                    position=position,
+                    discipline=discipline,
+                    competitor_profile=self.user.profile if position == 1 else None,
+                )
+        self.url = reverse('results:view_results', args=[self.event.id])
+
+    def test_bracket_entries_grouped_by_discipline(self):
+        """Entries are grouped per discipline in position order."""
+        context = get_event_results_context(self.event)
+
+        self.assertEqual(sorted(context['bracket_results']), ['Luge', 'Open'])
+        entries = context['bracket_results']['Open'][0]['entries']
+        self.assertEqual([e.competitor_name for e in entries], ['Alice Open', 'Bob Open', 'Cara Open'])
+
+    def test_results_query_count_is_constant(self):
+        """Adding riders does not add queries."""
+        with self.assertNumQueries(4):
+            get_event_results_context(self.event)
+
+        BracketResult.objects.create(
+            result=self.result, competitor_name='Dan', position=4, discipline='Masters'
+        )
+        with self.assertNumQueries(4):
+            get_event_results_context(self.event)
+
+    def test_page_cached_until_next_upload(self):
+        """The rendered results are reused until a result for the event changes."""
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Alice Open')
+
+        # Rows written without touching the result are served from the cache
+        BracketResult.objects.filter(competitor_name='Alice Open').update(competitor_name='Alicia Open')
+        self.assertContains(self.client.get(self.url), 'Alice Open')
+
+        Result.objects.create(
+            event=self.event,
+            result_type='BRACKET',
+            raw_data='results/test.csv',
+            is_final=False,
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Alicia Open')
+        self.assertNotContains(response, '&lt;div')
+
+
+class LeagueListTestCase(TestCase):
+    """Test cases for the league list page."""
+
+    def create_league(self, name, riders=5):
+        """Create a league with two disciplines of standings."""
+        league = League.objects.create(name=name, season=2025)
+        for discipline_name in ['Open', 'Luge']:
+            discipline = Discipline.objects.create(league=league, name=discipline_name)
+            for position in range(1, riders + 1):
+                LeagueStanding.objects.create(
+                    league=league,
+                    discipline=discipline,
+                    competitor_name=f'{name} {discipline_name} {position}',
+                    points=1000 - position,
+                    position=position,
+                )
+        return league
+
+    def test_podiums_limited_to_top_three(self):
+        """Each discipline gets its top three standings in position order."""
+        league = self.create_league('Podium League')
+
+        podiums = get_discipline_podiums([league])
+
+        self.assertEqual(len(podiums), 2)
+        for standings in podiums.values():
+            self.assertEqual([s.position for s in standings], [1, 2, 3])
+
+    def test_query_count_independent_of_leagues(self):
+        """Adding leagues and disciplines does not add queries."""
+        url = reverse('results:league_list')
+        self.create_league('League A')
+
+        with CaptureQueriesContext(connection) as single:
+            response = self.client.get(url)
+        self.assertContains(response, 'League A Open 1')
+
+        self.create_league('League B')
+        self.create_league('League C')
+        with CaptureQueriesContext(connection) as several:
+            response = self.client.get(url)
+        self.assertContains(response, 'League C Open 3')
+        self.assertNotContains(response, 'League C Open 4')
+
+        self.assertEqual(len(single), len(several))
+
+
+class RiderStatsTestCase(TestCase):
+    """Test cases for rider career statistics."""
+
+    def setUp(self):
+        """Set up two events with linked and bracket-only riders."""
+        self.alice = User.objects.create_user('alice', 'alice@test.com', 'password').profile
+        self.bob = User.objects.create_user('bob', 'bob@test.com', 'password').profile
+        self.event_a = self.create_event('Stats A', date(2024, 6, 1))
+        self.event_b = self.create_event('Stats B', date(2025, 6, 1))
+
+    def create_event(self, title, start_date):
+        return Event.objects.create(
+            title=title,
+            organizer=self.alice,
+            event_type='Race',
+            skill_level='Advanced',
+            start_date=start_date,
+        )
+
+    def create_result(self, event, result_type, is_final=True):
+        return Result.objects.create(
+            event=event, result_type=result_type, raw_data='results/test.csv', is_final=is_final
+        )
+
+    def test_career_across_result_types(self):
+        """Bracket, time trial and knockout results all feed the same record."""
+        bracket = self.create_result(self.event_a, 'BRACKET')
+        BracketResult.objects.create(
+            result=bracket, competitor_name='Alice A', competitor_profile=self.alice,
+            position=1, discipline='Open', points=1000
+        )
+        BracketResult.objects.create(
+            result=bracket, competitor_name='Guest Rider', position=2, discipline='Open', points=961
+        )
+        trials = self.create_result(self.event_b, 'TIME_TRIAL')
+        TimeTrialResult.objects.create(
+            result=trials, competitor=self.alice, position=4, time=timedelta(seconds=61), points=926
+        )
+        knockout = self.create_result(self.event_b, 'KNOCKOUT')
+        process_knockout_results(StringIO("round,match_number,winner,loser\nFINAL,1,bob,alice\n"), knockout)
+
+        self.assertEqual(refresh_rider_stats(), 3)
+
+        alice = RiderStats.objects.get(profile=self.alice)
+        self.assertEqual(alice.competitor_name, 'alice')
+        self.assertEqual(alice.events_raced, 2)
+        self.assertEqual(alice.races, 3)
+        self.assertEqual(alice.wins, 1)
+        self.assertEqual(alice.podiums, 2)
+        self.assertEqual(alice.best_position, 1)
+        self.assertAlmostEqual(alice.average_position, 7 / 3)
+        self.assertEqual(alice.best_time, timedelta(seconds=61))
+        self.assertEqual(alice.season_points, {'2024': 1000, '2025': 926})
+        self.assertEqual(RiderStats.objects.get(rider_key='name:guest rider').podiums, 1)
+        self.assertEqual(RiderStats.objects.get(profile=self.bob).wins, 1)
+
+    def test_refreshed_when_results_land_and_are_deleted(self):
+        """Processing a result updates only its riders; deleting it rolls them back."""
+        bracket = self.create_result(self.event_a, 'BRACKET')
+        BracketResult.objects.create(
+            result=bracket, competitor_name='Alice A', competitor_profile=self.alice,
+            position=1, discipline='Open', points=1000
+        )
+        refresh_rider_stats_for_result(bracket)
+        self.assertEqual(RiderStats.objects.get(profile=self.alice).wins, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bracket.delete()
+        self.assertFalse(RiderStats.objects.filter(profile=self.alice).exists())
+
+    def test_partial_refresh_reads_riders_knockouts(self):
+        """A partial refresh only counts knockouts the refreshed riders rode."""
+        knockout = self.create_result(self.event_b, 'KNOCKOUT')
+        process_knockout_results(StringIO("round,match_number,winner,loser\nFINAL,1,bob,alice\n"), knockout)
+        other = self.create_result(self.event_a, 'KNOCKOUT')
+        carl = User.objects.create_user('carl', 'carl@test.com', 'password').profile
+        process_knockout_results(StringIO("round,match_number,winner,loser\nFINAL,1,carl,bob\n"), other)
+
+        self.assertEqual(refresh_rider_stats(profile_ids=[self.alice.pk]), 1)
+        self.assertEqual(RiderStats.objects.get(profile=self.alice).races, 1)
+        self.assertFalse(RiderStats.objects.filter(profile=carl).exists())
+        self.assertEqual(refresh_rider_stats(names=['Nobody']), 0)
+
+    def test_bracket_only_names_normalised(self):
+        """Spellings of one bracket-only name are a single career."""
+        first = self.create_result(self.event_a, 'BRACKET')
+        second = self.create_result(self.event_b, 'BRACKET')
+        for result, name in ((first, 'John Smith'), (second, 'JOHN  SMITH')):
+            BracketResult.objects.create(result=result, competitor_name=name, position=1, discipline='Open')
+        refresh_rider_stats()
+        self.assertEqual(RiderStats.objects.get().events_raced, 2)
+
+        # Refreshing by either spelling recounts both, through the shared competitor
+        competitor = Competitor.objects.create(name='John Smith')
+        competitor.aliases.create(alias='john smith', name='John Smith')
+        BracketResult.objects.update(rider=competitor)
+        refresh_rider_stats_for_result(first)
+        stats = RiderStats.objects.get()
+        self.assertEqual((stats.rider_key, stats.events_raced, stats.wins), ('name:john smith', 2, 2))
+
+    def test_provisional_results_ignored(self):
+        """Only final results count towards a career."""
+        bracket = self.create_result(self.event_a, 'BRACKET', is_final=False)
+        BracketResult.objects.create(result=bracket, competitor_name='Guest Rider', position=1, discipline='Open')
+
+        self.assertEqual(refresh_rider_stats(), 0)
+
+    def test_leaderboard(self):
+        """The leaderboard reads from the stats table."""
+        RiderStats.objects.create(rider_key='name:Fast', competitor_name='Fast', wins=3, podiums=3)
+        RiderStats.objects.create(rider_key='name:Steady', competitor_name='Steady', podiums=5, total_points=9000)
+
+        response = self.client.get(reverse('results:rider_leaderboard'), {'sort': 'podiums'})
+
+        self.assertEqual([r.competitor_name for r in response.context['page_obj']], ['Steady', 'Fast'])
+
+
+class TimeTrialTestCase(TestCase):
+    """Test cases for time trial parsing and ranking."""
+
+    def setUp(self):
+        """Set up an event and three riders."""
+        self.riders = [
+            User.objects.create_user(name, f'{name}@test.com', 'password').profile
+            for name in ['sarah', 'mike', 'lisa']
+        ]
+        self.event = Event.objects.create(
+            title='Time Trial Event',
+            organizer=self.riders[0],
+            event_type='Race',
+            skill_level='Advanced',
+        )
+        self.result = Result.objects.create(
+            event=self.event, result_type='TIME_TRIAL', raw_data='results/test.csv', is_final=True
+        )
+
+    def test_parse_seconds(self):
+        """Hours, minutes and plain seconds all parse; DNF has no time."""
+        self.assertAlmostEqual(parse_seconds('00:01:45.231'), 105.231)
+        self.assertAlmostEqual(parse_seconds('1:45.231'), 105.231)
+        self.assertAlmostEqual(parse_seconds('45.5'), 45.5)
+        self.assertIsNone(parse_seconds('DNF'))
+        self.assertIsNone(parse_seconds(''))
+        with self.assertRaises(ValueError):
+            parse_seconds('fast')
+
+    def test_field_ranked_from_runs(self):
+        """Positions come from the best run, not the CSV's position column."""
+        sarah, mike, lisa = self.riders
+        csv_data = StringIO(
+            "rider_id,first_name,last_name,run_1,run_2,run_3,best_time,final_position\n"
+            f"{sarah.pk},Sarah,Smith,00:01:45.231,00:01:47.123,00:01:46.892,00:01:45.231,3\n"
+            f"{mike.pk},Mike,Johnson,00:01:47.892,00:01:47.123,DNF,00:01:47.123,1\n"
+            f"{lisa.pk},Lisa,Wong,DNS,DNS,DNS,,2\n"
+        )
+
+        process_time_trial_results(csv_data, self.result)
+
+        trials = {t.competitor_id: t for t in TimeTrialResult.objects.filter(result=self.result)}
+        self.assertEqual([trials[r.pk].position for r in self.riders], [1, 2, 3])
+        self.assertEqual(trials[sarah.pk].time, timedelta(seconds=105.231))
+        self.assertEqual(trials[sarah.pk].gap_to_leader, timedelta(0))
+        self.assertEqual(trials[mike.pk].gap_to_leader, timedelta(seconds=1.892))
+        self.assertEqual(trials[mike.pk].gap_to_previous, timedelta(seconds=1.892))
+        self.assertIsNone(trials[mike.pk].run_3)
+        self.assertAlmostEqual(trials[mike.pk].consistency, 0.3845, places=4)
+        self.assertEqual(trials[sarah.pk].points, 1000)
+        self.assertIsNone(trials[lisa.pk].time)
+        self.assertEqual(trials[lisa.pk].points, 0)
+
+    def test_ties_share_position(self):
+        """Riders with the same best time share a position."""
+        riders = rank_field([
+            RankedRider({}, [60.0]), RankedRider({}, [59.5]), RankedRider({}, [60.0]), RankedRider({}, [61.0])
+        ])
+        self.assertEqual([r.position for r in riders], [1, 2, 2, 4])
+        self.assertEqual(riders[2].gap_to_previous, 0.0)
+
+    def test_legacy_single_time_format(self):
+        """The older competitor/time/points format still loads."""
+        csv_data = StringIO(
+            "competitor,position,time,points\n"
+            "mike,1,1:02.5,1000\n"
+            "sarah,2,59.75,961\n"
+        )
+
+        process_time_trial_results(csv_data, self.result)
+
+        first = TimeTrialResult.objects.filter(result=self.result).first()
+        self.assertEqual(first.competitor.user.username, 'sarah')
+        self.assertEqual(first.time, timedelta(seconds=59.75))
+        self.assertEqual(first.points, 961)
+
+    def test_unknown_rider_rejected(self):
+        """Unknown riders fail the whole upload."""
+        with self.assertRaises(ValueError):
+            process_time_trial_results(StringIO("competitor,time\nnobody,59.0\n"), self.result)
+
+
+class KnockoutBracketTestCase(TestCase):
+    """Test cases for the knockout bracket engine."""
+
+    def setUp(self):
+        """Set up an event with eight riders."""
+        self.riders = [
+            User.objects.create_user(f'rider{n}', f'rider{n}@test.com', 'password').profile
+            for n in range(1, 9)
+        ]
+        self.event = Event.objects.create(
+            title='Knockout Event',
+            organizer=self.riders[0],
+            event_type='Race',
+            skill_level='Advanced',
+        )
+        self.result = Result.objects.create(
+            event=self.event, result_type='KNOCKOUT', raw_data='results/test.csv', is_final=True
+        )
+
+    def test_seeding_keeps_top_seeds_apart(self):
+        """Seeds are snaked across first-round heats so 1 and 2 can only meet in the final."""
+        tree = HeatTree.from_seeds(list(range(1, 17)), heat_size=4)
+
+        self.assertEqual(len(tree.heats), 7)
+        self.assertEqual(tree.heats[3][0], [1, 8, 9, 16])
+        self.assertEqual(tree.heats[5][0], [2, 7, 10, 15])
+        self.assertEqual(tree.feeders(0), [1, 2])
+
+        tree.record_heat(3, [8, 1, 9, 16])
+        self.assertEqual(tree.heats[1][0], [8, 1])
+
+    def test_heat_file_builds_tree_with_paths_and_placings(self):
+        """Four-rider heats produce a stored tree with paths and final places."""
+        names = [p.user.username for p in self.riders]
+        rows = ["round,heat,position,rider"]
+        rows += [f"SEMI,1,{i + 1},{name}" for i, name in enumerate([names[0], names[3], names[4], names[7]])]
+        rows += [f"SEMI,2,{i + 1},{name}" for i, name in enumerate([names[1], names[2], names[5], names[6]])]
+        rows += [f"Final,1,{i + 1},{name}" for i, name in enumerate([names[1], names[0], names[2], names[3]])]
+
+        process_knockout_results(StringIO("\n".join(rows) + "\n"), self.result)
+
+        bracket = KnockoutBracket.objects.get(result=self.result)
+        self.assertEqual(bracket.heat_size, 4)
+        self.assertEqual(bracket.path_for(self.riders[0].pk), [1, 0])
+        self.assertEqual(bracket.path_for(self.riders[7].pk), [1])
+        self.assertEqual(
+            [bracket.placing_for(rider.pk) for rider in self.riders],
+            [2, 1, 3, 4, 5, 5, 7, 7]
+        )
+        self.assertEqual([r['name'] for r in bracket.rounds], ['Semi-Final', 'Final'])
+
+    def test_head_to_head_file(self):
+        """Winner/loser rows still load and link heats by the riders that advance."""
+        a, b, c, d = (p.user.username for p in self.riders[:4])
+        csv_data = StringIO(
+            "round,match_number,winner,loser\n"
+            f"SEMI,1,{a},{d}\n"
+            f"SEMI,2,{c},{b}\n"
+            f"FINAL,3,{c},{a}\n"
+        )
+
+        process_knockout_results(csv_data, self.result)
+
+        bracket = KnockoutBracket.objects.get(result=self.result)
+        self.assertEqual(KnockoutResult.objects.filter(result=self.result).count(), 3)
+        self.assertEqual(bracket.heats[0][1], [self.riders[2].pk, self.riders[0].pk])
+        self.assertEqual(bracket.placing_for(self.riders[2].pk), 1)
+        self.assertEqual(bracket.placing_for(self.riders[3].pk), 3)
+
+    def test_third_place_final_accepted(self):
+        """A bronze final between the semi-final losers places them 3rd and 4th."""
+        a, b, c, d = (p.user.username for p in self.riders[:4])
+        process_knockout_results(StringIO(
+            "round,match_number,winner,loser\n"
+            f"SEMI,1,{a},{d}\n"
+            f"SEMI,2,{c},{b}\n"
+            f"FINAL,3,{b},{d}\n"
+            f"FINAL,4,{c},{a}\n"
+        ), self.result)
+
+        bracket = KnockoutBracket.objects.get(result=self.result)
+        self.assertEqual(bracket.heats[0][1], [self.riders[2].pk, self.riders[0].pk])
+        self.assertEqual(
+            [bracket.placing_for(rider.pk) for rider in self.riders[:4]], [2, 3, 1, 4]
+        )
+        self.assertEqual([r['name'] for r in bracket.rounds], ['Semi-Final', 'Final', 'Placement Final'])
+
+    def test_disconnected_heats_rejected(self):
+        """Heats whose riders never advance are not a valid knockout."""
+        records = [(1, 1, [1, 2]), (1, 2, [3, 4]), (2, 1, [5, 6])]
+        with self.assertRaises(ValueError):
+            HeatTree.from_heats(records)
+
+    def test_bracket_renders_from_result_query(self):
+        """The results page renders the stored bracket."""
+        a, b = (p.user.username for p in self.riders[:2])
+        process_knockout_results(StringIO(f"round,match_number,winner,loser\nFINAL,1,{a},{b}\n"), self.result)
+
+        with self.assertNumQueries(4):
+            html = render_to_string('results/partials/_event_results.html', get_event_results_context(self.event))
+        self.assertIn('Heat #1', html)
+
+
+class HeadToHeadTestCase(TestCase):
+    """Test cases for rider head-to-head records."""
+
+    def setUp(self):
+        """Set up four riders and a knockout event."""
+        self.riders = [
+            User.objects.create_user(name, f'{name}@test.com', 'password').profile
+            for name in ('ana', 'ben', 'cat', 'dan')
+        ]
+        self.event = Event.objects.create(
+            title='Rivals Event',
+            organizer=self.riders[0],
+            event_type='Race',
+            skill_level='Advanced',
+            start_date=date(2025, 5, 1),
+        )
+
+    @override_settings(RESULTS_JOBS_EAGER=True)
+    def process_knockout(self, csv_text, is_final=True, event=None):
+        result = Result.objects.create(
+            event=event or self.event, result_type='KNOCKOUT', raw_data='results/test.csv',
+            is_final=is_final
+        )
+        enqueue_job('PROCESS_RESULTS', {'result_id': result.id, 'csv_data': csv_text})
+        return result
+
+    def test_heat_meetings_count_every_pair(self):
+        """Each rider beats everyone who finished behind them in a heat."""
+        meetings = heat_meetings([[[1, 2, 3, 4], [3, 1, 4, 2]], None])
+
+        self.assertEqual(len(meetings), 6)
+        self.assertEqual(meetings[(1, 3)], [0, 1])
+        self.assertEqual(meetings[(2, 4)], [0, 1])
+
+    def test_final_knockouts_update_records(self):
+        """Final knockouts add to the pair records; provisional ones do not."""
+        ana, ben, cat, dan = self.riders
+        self.process_knockout("round,match_number,winner,loser\nFINAL,1,ana,ben\n")
+        later = Event.objects.create(
+            title='Rivals Rematch', organizer=ana, event_type='Race', skill_level='Advanced',
+            start_date=date(2025, 8, 1),
+        )
+        self.process_knockout(
+            "round,heat,position,rider\nFINAL,1,1,ben\nFINAL,1,2,ana\nFINAL,1,3,cat\n", event=later
+        )
+        self.process_knockout("round,match_number,winner,loser\nFINAL,1,dan,ana\n", is_final=False)
+
+        with self.assertNumQueries(1):
+            record = get_head_to_head(ana.pk, ben.pk)
+        self.assertEqual(record['wins'], 1)
+        self.assertEqual(record['losses'], 1)
+        self.assertEqual(record['meetings'], 2)
+        self.assertEqual(record['last_met'], date(2025, 8, 1))
+
+        self.assertEqual(HeadToHead.objects.count(), 3)
+        self.assertEqual(get_head_to_head(cat.pk, ana.pk)['losses'], 1)
+        self.assertEqual(get_head_to_head(ana.pk, dan.pk)['meetings'], 0)
+
+    def test_deleting_knockout_removes_meetings(self):
+        """Deleting a final knockout takes its meetings back out."""
+        ana, ben, _, _ = self.riders
+        first = self.process_knockout("round,match_number,winner,loser\nFINAL,1,ana,ben\n")
+        self.assertEqual(get_head_to_head(ana.pk, ben.pk)['wins'], 1)
+
+        first.delete()
+
+        self.assertFalse(HeadToHead.objects.exists())
+
+    def test_api_and_profile_widget(self):
+        """The JSON endpoints and the profile page read the stored records."""
+        ana, ben, cat, _ = self.riders
+        self.process_knockout(
+            "round,match_number,winner,loser\nSEMI,1,ana,cat\nSEMI,2,ben,dan\nFINAL,3,ana,ben\n"
+        )
+
+        response = self.client.get(reverse('results:head_to_head_json', args=[ben.pk, ana.pk]))
+        self.assertEqual(response.json()['losses'], 1)
+        self.assertEqual(response.json()['last_met'], '2025-05-01')
+
+        response = self.client.get(reverse('results:rider_rivals_json', args=[ana.pk]))
+        self.assertEqual(
+            [rival['opponent']['username'] for rival in response.json()['rivals']], ['ben', 'cat']
+        )
+
+        response = self.client.get(reverse('results:head_to_head_json', args=[ana.pk, 9999]))
+        self.assertEqual(response.status_code, 404)
+
+        self.client.force_login(ana.user)
+        response = self.client.get(reverse('profiles:user_profile', args=['ana']))
+        self.assertContains(response, 'Head to Head')
+
+    def test_api_respects_profile_privacy(self):
+        """Hidden riders are 404s and hidden opponents are left out."""
+        ana, ben, cat, _ = self.riders
+        self.process_knockout(
+            "round,match_number,winner,loser\nSEMI,1,ana,cat\nSEMI,2,ben,dan\nFINAL,3,ana,ben\n"
+        )
+        UserProfile.objects.filter(pk=ben.pk).update(profile_visibility='PRIVATE')
+        UserProfile.objects.filter(pk=cat.pk).update(profile_visibility='COMMUNITY')
+
+        response = self.client.get(reverse('results:head_to_head_json', args=[ana.pk, ben.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('results:rider_rivals_json', args=[ben.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('results:rider_rivals_json', args=[ana.pk]))
+        self.assertEqual(response.json()['rivals'], [])
+
+        self.client.force_login(cat.user)
+        response = self.client.get(reverse('results:rider_rivals_json', args=[ana.pk]))
+        self.assertEqual([rival['opponent']['username'] for rival in response.json()['rivals']], ['cat'])
+        response = self.client.get(reverse('profiles:user_profile', args=['ana']))
+        self.assertNotIn('ben', [rival['opponent'].user.username for rival in response.context['rivals']])
+
+
+class SeedingTestCase(TestCase):
+    """Test cases for seeding an event from league standings."""
+
+    def setUp(self):
+        """Set up a league event with six going riders, four of them ranked."""
+        self.organizer = User.objects.create_user('organizer', 'organizer@test.com', 'password').profile
+        self.league = League.objects.create(name='Seed League', season=2025)
+        self.open = Discipline.objects.create(league=self.league, name='Open')
+        self.luge = Discipline.objects.create(league=self.league, name='Luge')
+        self.event = Event.objects.create(
+            title='Seed Event',
+            organizer=self.organizer,
+            event_type='Race',
+            skill_level='Advanced',
+        )
+        LeagueEvent.objects.create(league=self.league, event=self.event)
+
+        self.riders = []
+        for n, points in enumerate([500, 900, 0, 700, 0, 800], start=1):
+            rider = User.objects.create_user(f'seed{n}', f'seed{n}@test.com', 'password').profile
+            RSVP.objects.create(user=rider, event=self.event, status='Going')
+            if points:
+                LeagueStanding.objects.create(
+                    league=self.league, competitor=rider, competitor_name=rider.user.username,
+                    discipline=self.open, points=points
+                )
+            self.riders.append(rider)
+        LeagueStanding.objects.create(
+            league=self.league, competitor=self.riders[0], competitor_name='seed1',
+            discipline=self.luge, points=1000
+        )
+        watcher = User.objects.create_user('watcher', 'watcher@test.com', 'password').profile
+        RSVP.objects.create(user=watcher, event=self.event, status='Interested')
+
+    def test_riders_seeded_by_points_in_one_query(self):
+        """Going riders are ranked by league points, unranked riders last in signup order."""
+        with self.assertNumQueries(1):
+            seeds = seed_event_riders(self.event, 'open')
+
+        self.assertEqual(
+            [rider.username for rider in seeds], ['seed2', 'seed6', 'seed4', 'seed1', 'seed3', 'seed5']
+        )
+        self.assertEqual([rider.seed for rider in seeds], [1, 2, 3, 4, 5, 6])
+
+        # Across every discipline seed1's luge points count too
+        self.assertEqual(seed_event_riders(self.event)[0].username, 'seed1')
+
+    def test_heat_sheet_round_trips_through_upload(self):
+        """The exported CSV loads back as a knockout result."""
+        seeds = seed_event_riders(self.event, 'open')
+        round_code, round_name, heats = build_heat_sheet(seeds, heat_size=4)
+
+        self.assertEqual(round_code, 'SEMI')
+        self.assertEqual([len(heat['riders']) for heat in heats], [3, 3])
+        self.assertEqual([r.seed for r in heats[0]['riders']], [1, 4, 5])
+
+        output = write_heat_sheet_csv(StringIO(), round_code, heats)
+        output.seek(0)
+        rows = output.getvalue().splitlines()
+        self.assertEqual(rows[0], 'round,heat,position,rider,seed,name,points')
+
+        # Organisers add the final before uploading the raced heats
+        rows += ['FINAL,1,1,seed6,,,', 'FINAL,1,2,seed2,,,', 'FINAL,1,3,seed4,,,', 'FINAL,1,4,seed1,,,']
+        result = Result.objects.create(
+            event=self.event, result_type='KNOCKOUT', raw_data='results/test.csv', is_final=True
+        )
+        process_knockout_results(StringIO("\n".join(rows) + "\n"), result)
+        self.assertEqual(result.knockout_bracket.placing_for(self.riders[5].pk), 1)
+
+    def test_csv_download(self):
+        """Organisers can download the heat sheet; other users cannot."""
+        url = reverse('results:event_seeding', args=[self.event.id])
+        self.client.force_login(self.organizer.user)
+
+        response = self.client.get(url, {'heat_size': '2', 'discipline': 'open', 'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = response.content.decode().splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertTrue(lines[1].startswith('QUARTER,1,1,seed2,1,'))
+
+        response = self.client.get(url)
+        self.assertContains(response, 'Heat #2')
+
+        self.client.force_login(self.riders[0].user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class RiderMatchingTestCase(TestCase):
+    """Test cases for matching imported rider names to profiles."""
+
+    def setUp(self):
+        """Set up riders with accented, initialled and similar names."""
+        invalidate_name_index()
+        self.organizer = User.objects.create_user('organizer', 'organizer@test.com', 'password')
+        self.john = self.create_rider('jsmith', 'John', 'Smith')
+        self.jose = self.create_rider('jnunez', 'José', 'Núñez')
+        self.event = Event.objects.create(
+            title='Matching Event',
+            organizer=self.organizer.profile,
+            event_type='Race',
+            skill_level='Advanced',
+        )
+        self.result = Result.objects.create(
+            event=self.event, result_type='BRACKET', raw_data='results/test.csv', is_final=True
+        )
+
+    def create_rider(self, username, first_name, last_name):
+        return User.objects.create_user(
+            username, f'{username}@test.com', 'password', first_name=first_name, last_name=last_name
+        ).profile
+
+    def save(self, names):
+        save_bracket_results(self.result, {
+            'headers': ['Rank', 'Name'],
+            'rows': [[str(rank), name] for rank, name in enumerate(names, start=1)],
+            'mapping': {'Rank': 'RANK', 'Name': 'NAME'},
+            'disciplines': ['Open'],
+        })
+        return dict(self.result.bracket_results.values_list('competitor_name', 'competitor_profile'))
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name('  José  Núñez-Smith '), 'jose nunez smith')
+        self.assertEqual(normalize_name('J. SMITH'), 'j smith')
+
+    def test_import_links_confident_matches(self):
+        """Initials, accents and small typos link; unknown riders stay unlinked."""
+        linked = self.save(['J. Smith', 'Jose Nunez', 'John Smiht', 'Guest Rider'])
+
+        self.assertEqual(linked['J. Smith'], self.john.pk)
+        self.assertEqual(linked['Jose Nunez'], self.jose.pk)
+        self.assertEqual(linked['John Smiht'], self.john.pk)
+        self.assertIsNone(linked['Guest Rider'])
+        self.assertFalse(RiderMatchReview.objects.exists())
+
+    def test_uncertain_matches_queued_for_review(self):
+        """Near misses and names shared by two riders wait for the organiser."""
+        jane = self.create_rider('janes', 'Jane', 'Smith')
+        linked = self.save(['Jon Smyth', 'J Smith'])
+
+        self.assertIsNone(linked['Jon Smyth'])
+        self.assertIsNone(linked['J Smith'])
+        reviews = {r.competitor_name: r for r in RiderMatchReview.objects.filter(result=self.result)}
+        self.assertEqual(reviews['Jon Smyth'].candidates[0][0], self.john.pk)
+        self.assertEqual({pk for pk, _ in reviews['J Smith'].candidates}, {self.john.pk, jane.pk})
+
+        self.client.force_login(self.organizer)
+        url = reverse('results:review_rider_matches', args=[self.event.id])
+        self.assertContains(self.client.get(url), 'Jon Smyth')
+
+        self.client.post(url, {
+            'review_id': reviews['Jon Smyth'].id, 'action': 'link', 'profile_id': self.john.pk
+        })
+
+        self.assertEqual(
+            self.result.bracket_results.get(competitor_name='Jon Smyth').competitor_profile, self.john
+        )
+        self.assertEqual(RiderMatchReview.objects.get(competitor_name='Jon Smyth').status, 'LINKED')
+        self.assertEqual(RiderStats.objects.get(profile=self.john).races, 1)
+
+    def test_index_rebuilt_after_profile_change(self):
+        """Renaming a rider invalidates the cached index."""
+        get_name_index()
+        self.john.display_name = 'Johnny Downhill'
+        self.john.save()
+
+        self.assertEqual(get_name_index().match('johnny downhill').profile_id, self.john.pk)
+
+
+class CompetitorTestCase(TestCase):
+    """Test cases for competitor identities across imports."""
+
+    def setUp(self):
+        """Set up a league with two events and a registered rider."""
+        self.organizer = User.objects.create_user('organizer', 'organizer@test.com', 'password')
+        self.john = User.objects.create_user(
+            'jsmith', 'jsmith@test.com', 'password', first_name='John', last_name='Smith'
+        ).profile
+        self.league = League.objects.create(name='Competitor League', season=2025)
+        self.events = []
+        for title in ('Round 1', 'Round 2'):
+            event = Event.objects.create(
+                title=title, organizer=self.organizer.profile, event_type='Race', skill_level='Advanced'
+            )
+            LeagueEvent.objects.create(league=self.league, event=event)
+            self.events.append(event)
+
+    def upload(self, event, names):
+        result = Result.objects.create(
+            event=event, result_type='BRACKET', raw_data='results/test.csv', is_final=True
+        )
+        save_bracket_results(result, {
+            'headers': ['Rank', 'Name'],
+            'rows': [[str(rank), name] for rank, name in enumerate(names, start=1)],
+            'mapping': {'Rank': 'RANK', 'Name': 'NAME'},
+            'disciplines': ['Open'],
+        })
+        update_league_standings_for_bracket(self.league, 'Open', result)
+        return result
+
+    def test_name_variants_share_one_standing(self):
+        """Spellings that normalise alike add to the same competitor's standing."""
+        self.upload(self.events[0], ['Mårten Berg', 'Guest Rider'])
+        self.upload(self.events[1], ['Guest  rider', 'Marten Berg'])
+
+        standings = LeagueStanding.objects.filter(league=self.league)
+        self.assertEqual(standings.count(), 2)
+        guest = standings.get(competitor_name='Guest Rider')
+        self.assertEqual(guest.events_competed, 2)
+        self.assertEqual(guest.points, 961 + 1000)
+        self.assertEqual(Competitor.objects.count(), 2)
+
+    def test_known_names_skip_matching(self):
+        """Names seen before resolve from the alias map with one query."""
+        self.upload(self.events[0], ['J. Smith', 'Guest Rider'])
+
+        with self.assertNumQueries(1):
+            resolved, matches = resolve_competitors(['J Smith', 'guest rider'])
+
+        self.assertEqual(matches, {})
+        self.assertEqual(resolved['J Smith'][1], self.john.pk)
+        self.assertEqual(self.john.competitor.aliases.count(), 1)
+
+    def test_linking_merges_into_profile_competitor(self):
+        """Linking a bracket-only rider to a profile that already races merges their standings."""
+        self.upload(self.events[0], ['John Smith'])
+        self.upload(self.events[1], ['Johnny S'])
+        stray = Competitor.objects.get(name='Johnny S')
+
+        link_competitor(stray, self.john)
+
+        standing = LeagueStanding.objects.get(league=self.league)
+        self.assertEqual(standing.rider, self.john.competitor)
+        self.assertEqual(standing.competitor, self.john)
+        self.assertEqual(standing.events_competed, 2)
+        self.assertEqual(resolve_competitors(['Johnny S'])[0]['Johnny S'][1], self.john.pk)
+
+
+    def test_linking_republishes_snapshots(self):
+        """Linking a rider with no profile competitor publishes the linked standings."""
+        self.upload(self.events[0], ['Guest Rider'])
+        guest = User.objects.create_user('guest', 'guest@test.com', 'password').profile
+
+        link_competitor(Competitor.objects.get(name='Guest Rider'), guest)
+
+        snapshot, = get_latest_snapshots(self.league)
+        self.assertEqual(snapshot.standings[0]['competitor_id'], guest.pk)
+        self.assertEqual(snapshot.version, 2)
+
+
+class ExportTestCase(TestCase):
+    """Test cases for streaming league exports."""
+
+    def setUp(self):
+        """Set up a league with one final bracket result."""
+        self.organizer = User.objects.create_user('organizer', 'organizer@test.com', 'password')
+        self.league = League.objects.create(name='Export League', season=2025)
+        self.event = Event.objects.create(
+            title='Export Event', organizer=self.organizer.profile, event_type='Race',
+            skill_level='Advanced', start_date=date(2025, 7, 1),
+        )
+        LeagueEvent.objects.create(league=self.league, event=self.event, multiplier=1.5)
+        self.result = Result.objects.create(
+            event=self.event, result_type='BRACKET', raw_data='results/test.csv', is_final=True
+        )
+        for position, name in enumerate(['Alice', 'Bob'], start=1):
+            BracketResult.objects.create(
+                result=self.result, competitor_name=name, position=position, discipline='Open',
+                points=points_for_positions([position])[0]
+            )
+        update_league_standings_for_bracket(self.league, 'Open', self.result)
+        refresh_rider_stats()
+
+    def export(self, dataset, **params):
+        response = self.client.get(
+            reverse('results:export_league_data', args=[self.league.slug, dataset]), params
+        )
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_exports(self):
+        """Every dataset streams as CSV with a header row."""
+        response, content = self.export('results')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = content.splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['league', 'event', 'event_date', 'discipline'])
+        self.assertEqual(lines[1].split(',')[2], '2025-07-01')
+        self.assertEqual(len(lines), 3)
+
+        _, content = self.export('standings')
+        self.assertEqual(content.splitlines()[1].split(',')[6], '1500')
+
+        _, content = self.export('riders')
+        self.assertEqual(len(content.splitlines()), 3)
+
+    @patch('results.exports.pa', None)
+    def test_columnar_falls_back_to_ndjson(self):
+        """Without pyarrow the columnar export is newline-delimited JSON."""
+        response, content = self.export('standings', format='columnar')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['competitor_name'] for row in rows], ['Alice', 'Bob'])
+        self.assertEqual(rows[0]['league'], self.league.slug)
+
+    def test_rows_stream_in_chunks(self):
+        """Rows are read with a chunked iterator rather than loaded at once."""
+        with patch('results.exports.EXPORT_CHUNK_SIZE', 1):
+            names, rows = export_rows('results', League.objects.filter(pk=self.league.pk))
+            self.assertEqual(next(rows)[names.index('competitor_name')], 'Alice')
+
+    def test_unknown_dataset(self):
+        response = self.client.get(reverse('results:export_league_data', args=[self.league.slug, 'nope']))
+        self.assertEqual(response.status_code, 404)
+
+
+class ProcessingJobTestCase(TestCase):
+    """Test cases for the background job queue."""
+
+    def setUp(self):
+        """Set up a league with one uploaded bracket result."""
+        self.user = User.objects.create_user('organizer', 'organizer@test.com', 'password')
+        self.league = League.objects.create(name='Job League', season=2025)
+        self.event = Event.objects.create(
+            title='Job Event',
+            organizer=self.user.profile,
+            event_type='Race',
+            skill_level='Advanced',
+        )
+        LeagueEvent.objects.create(league=self.league, event=self.event)
+        self.result = Result.objects.create(
+            event=self.event,
+            result_type='BRACKET',
+            raw_data='results/test.csv',
+            is_final=True,
+        )
+        self.payload = {
+            'result_id': self.result.id,
+            'league_id': self.league.id,
+            'headers': ['Rank', 'Name', 'Discipline'],
+            'rows': [['1', 'Alice', 'Open'], ['2', 'Bob', 'Open'], ['1', 'Cara', 'Luge']],
+            'mapping': {'Rank': 'RANK', 'Name': 'NAME', 'Discipline': 'DISCIPLINE'},
+            'disciplines': ['Luge', 'Open'],
+        }
+
+    @override_settings(RESULTS_JOBS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        """Eager mode processes the job before enqueue_job returns."""
+        job = enqueue_job('PROCESS_BRACKET', self.payload, created_by=self.user.profile)
+
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(LeagueStanding.objects.filter(league=self.league).count(), 3)
+        self.event.refresh_from_db()
+        self.assertTrue(self.event.has_results)
+
+    @override_settings(RESULTS_JOBS_EAGER=False)
+    def test_worker_claims_and_runs_queued_jobs(self):
+        """Queued jobs wait for the worker, which runs them in order."""
+        job = enqueue_job('PROCESS_BRACKET', self.payload)
+        recalc = enqueue_job('RECALCULATE_LEAGUE', {'league_id': self.league.id})
+        self.assertEqual(job.status, 'PENDING')
+        self.assertFalse(BracketResult.objects.exists())
+
+        call_command('run_result_jobs', '--once', stdout=StringIO())
+
+        job.refresh_from_db()
+        recalc.refresh_from_db()
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertEqual(recalc.status, 'COMPLETED')
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(LeagueStanding.objects.filter(league=self.league).count(), 3)
+        self.assertIsNone(claim_next_job('test-worker'))
+
+    @override_settings(RESULTS_JOBS_EAGER=False, RESULTS_JOBS_MAX_ATTEMPTS=2)
+    def test_stale_jobs_requeued_until_out_of_attempts(self):
+        """Stale jobs go back to the queue until they run out of attempts."""
+        from django.utils import timezone
+
+        stale = timezone.now() - timedelta(hours=1)
+        retry = enqueue_job('RECALCULATE_LEAGUE', {'league_id': self.league.id})
+        poison = enqueue_job('RECALCULATE_LEAGUE', {'league_id': self.league.id})
+        busy = enqueue_job('RECALCULATE_LEAGUE', {'league_id': self.league.id})
+        ProcessingJob.objects.filter(pk=retry.pk).update(status='RUNNING', started_at=stale, attempts=1)
+        ProcessingJob.objects.filter(pk=poison.pk).update(status='RUNNING', started_at=stale, attempts=2)
+        ProcessingJob.objects.filter(pk=busy.pk).update(status='RUNNING', started_at=stale, attempts=2)
+        busy.refresh_from_db()
+        busy.set_progress(50, 'Still going')
+
+        self.assertEqual(requeue_stale_jobs(30), (1, 1))
+        retry.refresh_from_db()
+        poison.refresh_from_db()
+        busy.refresh_from_db()
+        self.assertEqual(retry.status, 'PENDING')
+        self.assertEqual(poison.status, 'FAILED')
+        self.assertIn('2 attempts', poison.error)
+        self.assertEqual(busy.status, 'RUNNING')
+
+    @override_settings(RESULTS_JOBS_EAGER=True)
+    def test_failed_bracket_job_discards_result(self):
+        """A job that cannot parse the upload fails and removes the empty result."""
+        self.payload['mapping'] = {'Rank': 'RANK'}
+        job = enqueue_job('PROCESS_BRACKET', self.payload)
+
+        self.assertEqual(job.status, 'FAILED')
+        self.assertTrue(job.error)
+        self.assertFalse(Result.objects.filter(id=self.result.id).exists())
+
+    @override_settings(RESULTS_JOBS_EAGER=False)
+    def test_job_status_endpoint(self):
+        """Only the requesting user can poll a job's progress."""
+        job = enqueue_job('RECALCULATE_LEAGUE', {'league_id': self.league.id}, created_by=self.user.profile)
+        url = reverse('results:job_status', args=[job.id])
+
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'PENDING')
+
+        other = User.objects.create_user('other', 'other@test.com', 'password')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        # The progress banner only shows the job to the user who started it
+        standings_url = f"{reverse('results:league_standings', args=[self.league.slug])}?job={job.id}"
+        self.assertIsNone(self.client.get(standings_url).context['job'])
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(standings_url).context['job'], job)
@@ -0,0 +1,104 @@
+"""
+Time trial timing: duration parsing and field ranking.
+
+Timing files carry up to three runs per rider as ``HH:MM:SS.fff``,
+``MM:SS.fff`` or plain seconds. The parser splits on ``:`` and does float
+arithmetic, with no ``strptime`` call per value. The whole field is then
+ranked in one pass by best run. The result has positions, the gap to the
+leader and to the rider ahead, and each rider's consistency (the population
+standard deviation of their runs, in seconds).
+"""
+
+from datetime import timedelta
+from statistics import pstdev
+
+RUN_COLUMNS = ['run_1', 'run_2', 'run_3']
+
+# Values timing software writes for a run without a time
+NO_TIME_VALUES = {'', 'DNF', 'DNS', 'DSQ', 'DQ', '-', 'N/A'}
+
+
+def parse_seconds(value):
+    """
+    Parse a race time into seconds.
+
+    Args:
+        value (str): ``HH:MM:SS.fff``, ``MM:SS.fff`` or ``SS.fff``
+
+    Returns:
+        float or None: Seconds, or None for blank and DNF-style values
+
+    Raises:
+        ValueError: If the value is not a time
+    """
+    value = value.strip() if value else ''
+    if value.upper() in NO_TIME_VALUES:
+        return None
+
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(f"Negative time: {value}")
+    return seconds
+
+
+def parse_column(rows, column):
+    """Parse one time column of every row into seconds (None where there is no time)."""
+    return [parse_seconds(row.get(column)) for row in rows]
+
+
+def to_duration(seconds):
+    """Convert seconds to a timedelta for a DurationField, keeping None."""
+    return None if seconds is None else timedelta(seconds=seconds)
+
+
+class RankedRider:
+    """One rider's runs and derived ranking figures."""
+
+    __slots__ = (
+        'row', 'runs', 'best', 'position', 'gap_to_leader', 'gap_to_previous', 'consistency'
+    )
+
+    def __init__(self, row, runs, best=None):
+        self.row = row
+        self.runs = runs
+        times = [run for run in runs if run is not None]
+        self.best = best if best is not None else (min(times) if times else None)
+        self.consistency = pstdev(times) if len(times) > 1 else None
+        self.position = None
+        self.gap_to_leader = None
+        self.gap_to_previous = None
+
+
+def rank_field(riders):
+    """
+    Rank a time trial field by best time, in place.
+
+    Riders with equal best times share a position (1, 2, 2, 4). Riders with
+    no time are placed after every finisher, in their original order.
+
+    Args:
+        riders (list): ``RankedRider`` objects with run times in seconds
+
+    Returns:
+        list: The riders in finishing order
+    """
+    finishers = sorted((r for r in riders if r.best is not None), key=lambda r: r.best)
+    non_finishers = [r for r in riders if r.best is None]
+
+    leader = finishers[0].best if finishers else None
+    previous = None
+    for index, rider in enumerate(finishers, start=1):
+        if previous is not None and rider.best == previous.best:
+            rider.position = previous.position
+        else:
+            rider.position = index
+        rider.gap_to_leader = rider.best - leader
+        rider.gap_to_previous = rider.best - previous.best if previous else 0.0
+        previous = rider
+
+    for index, rider in enumerate(non_finishers, start=len(finishers) + 1):
+        rider.position = index
+
+    return finishers + non_finishers
@@ -9,9 +9,19 @@ urlpatterns = [
     path('upload/<int:event_id>/', views.upload_results, name='upload_results'),
     path('upload/bracket/<int:event_id>/', views.upload_bracket_results, name='upload_bracket_results'),
     path('view/<int:event_id>/', views.view_results, name='view_results'),
+    path('seeding/<int:event_id>/', views.event_seeding, name='event_seeding'),
+    path('review/<int:event_id>/', views.review_rider_matches, name='review_rider_matches'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
     
     # League views
     path('leagues/', views.league_list, name='league_list'),
+    path('riders/', views.rider_leaderboard, name='rider_leaderboard'),
+    path('riders/<int:rider_id>/head-to-head.json', views.rider_rivals_json, name='rider_rivals_json'),
+    path(
+        'riders/<int:rider_id>/head-to-head/<int:opponent_id>.json',
+        views.head_to_head_json,
+        name='head_to_head_json'
+    ),
     
     # League management - these MUST come before the slug pattern
     path('league/create/', views.manage_league, name='create_league'),
@@ -20,6 +30,10 @@ urlpatterns = [
     path('league/<slug:slug>/disciplines/', views.manage_league_disciplines, name='manage_league_disciplines'),
     path('league/<slug:slug>/recalculate/', views.recalculate_league, name='recalculate_league'),
     
+    path('league/<slug:slug>/standings.json', views.league_standings_json, name='league_standings_json'),
+    path('league/<slug:slug>/export/<slug:dataset>/', views.export_league_data, name='export_league_data'),
+    path('season/<int:season>/export/<slug:dataset>/', views.export_season_data, name='export_season_data'),
+    
     # League detail view - this MUST come after specific paths
     path('league/<slug:slug>/', views.league_standings, name='league_standings'),
 ]
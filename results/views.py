@@ -1,29 +1,45 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 import csv
 import io
 import json
-from datetime import datetime
-from django.db.models import Q, Count, Avg, Min, Max, Sum
+from itertools import groupby
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count, Avg, Min, Max, Sum, F, Prefetch, Window
+from django.db.models.functions import RowNumber
 from django.db import transaction
 from django.urls import reverse
 from django.core.files.base import ContentFile
+from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.text import slugify
 from django_countries import countries
 
 from .models import (
-    Result, TimeTrialResult, KnockoutResult, BracketResult, 
+    Result, TimeTrialResult, KnockoutResult, KnockoutBracket, BracketResult, 
     League, LeagueStanding, Discipline, LeagueEvent, 
-    PointsSystem, CSVColumnMapping, EventDisciplineResult
+    CSVColumnMapping, EventDisciplineResult, ProcessingJob, RiderMatchReview, RiderStats, StandingsSnapshot
 )
 from events.models import Event
 from profiles.models import UserProfile
+from profiles.views import ProfilePrivacyManager
 from .forms import (
     ResultUploadForm, LeagueForm, CSVColumnMappingForm, 
     BracketResultUploadForm, LeagueEventForm, DisciplineForm
 )
+from .competitors import assign_competitors, link_competitor, resolve_competitors
+from .exports import DATASETS, EXPORT_FORMATS, resolve_export_format, stream_export
+from .jobs import enqueue_job
+from .brackets import HeatTree
+from .head_to_head import get_head_to_head, rivals_for
+from .points import get_points_table
+from .seeding import build_heat_sheet, seed_event_riders, write_heat_sheet_csv
+from .standings import get_latest_snapshots
+from .stats import refresh_rider_stats
+from .timing import RUN_COLUMNS, RankedRider, parse_column, rank_field, to_duration
 
 @login_required
 def upload_results(request, event_id):
@@ -58,20 +74,16 @@ def upload_results(request, event_id):
                 is_final=is_final
             )
             
-            # Process the CSV file
-            csv_data = io.StringIO(results_file.read().decode('utf-8'))
+            # Process the CSV file in the background
+            results_file.seek(0)
+            job = enqueue_job('PROCESS_RESULTS', {
+                'result_id': result.id,
+                'csv_data': results_file.read().decode('utf-8'),
+            }, created_by=request.user.profile)
             
-            if result_type == 'TIME_TRIAL':
-                process_time_trial_results(csv_data, result)
-            elif result_type == 'KNOCKOUT':
-                process_knockout_results(csv_data, result)
-            
-            # Update event status
-            event.has_results = True
-            event.save()
-            
-            messages.success(request, f'{result_type} results uploaded successfully.')
-            return redirect('results:view_results', event_id=event.id)
+            return redirect_to_job(
+                request, job, reverse('results:view_results', args=[event.id])
+            )
             
         except Exception as e:
             messages.error(request, f'Error processing results: {str(e)}')
@@ -79,59 +91,177 @@ def upload_results(request, event_id):
     
     return render(request, 'results/upload_results.html', {'event': event})
 
+@login_required
+def event_seeding(request, event_id):
+    """Seeded heat sheet for an event's registered riders, as a page or an upload-ready CSV"""
+    event = get_object_or_404(Event, id=event_id)
+    
+    # Only event organizers can seed the event
+    if request.user.profile != event.organizer:
+        messages.error(request, "You don't have permission to seed this event.")
+        return redirect('events:event_details', slug=event.slug)
+    
+    heat_size = 2 if request.GET.get('heat_size') == '2' else 4
+    discipline = request.GET.get('discipline') or None
+    
+    seeds = seed_event_riders(event, discipline)
+    try:
+        round_code, round_name, heats = build_heat_sheet(seeds, heat_size)
+    except ValueError as e:
+        messages.error(request, str(e))
+        round_code, round_name, heats = None, None, []
+    
+    if request.GET.get('format') == 'csv' and heats:
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{event.slug}-seeding.csv"'
+        return write_heat_sheet_csv(response, round_code, heats)
+    
+    return render(request, 'results/event_seeding.html', {
+        'event': event,
+        'seeds': seeds,
+        'heats': heats,
+        'round_name': round_name,
+        'heat_size': heat_size,
+        'discipline': discipline,
+        'disciplines': Discipline.objects.filter(
+            league__league_events__event=event
+        ).values_list('slug', 'name').distinct().order_by('name'),
+    })
+
 def process_time_trial_results(csv_data, result):
-    reader = csv.DictReader(csv_data)
-    for row in reader:
-        competitor_username = row['competitor']
-        position = int(row['position'])
-        
-        # Parse time - expected format: MM:SS.ms or SS.ms
-        time_str = row['time']
-        if ':' in time_str:
-            minutes, seconds = time_str.split(':')
-            time_obj = datetime.strptime(f"00:{minutes}:{seconds}", "%H:%M:%S.%f")
+    """
+    Rank a time trial field from its runs and save every rider in bulk.
+
+    Accepts timing files with ``run_1``..``run_3`` columns (riders identified by
+    ``rider_id`` or ``competitor`` username) as well as the older single
+    ``time`` column format. Positions are always recomputed from the times.
+    """
+    rows = list(csv.DictReader(csv_data))
+    if not rows:
+        return
+    columns = set(rows[0].keys())
+    
+    # Resolve every rider with one query
+    if 'competitor' in columns:
+        references = [row['competitor'].strip() for row in rows]
+        profiles = {
+            profile.user.username: profile
+            for profile in UserProfile.objects.filter(user__username__in=references).select_related('user')
+        }
+    elif 'rider_id' in columns:
+        references = [int(row['rider_id']) for row in rows]
+        profiles = UserProfile.objects.in_bulk(references)
+    else:
+        raise ValueError("Time trial CSV needs a 'competitor' or 'rider_id' column.")
+    
+    missing = [str(ref) for ref in references if ref not in profiles]
+    if missing:
+        raise ValueError(f"Riders not found: {', '.join(missing)}")
+    
+    # Parse whole columns at once, then rank the field in one pass
+    run_columns = [column for column in RUN_COLUMNS if column in columns]
+    runs_by_row = list(zip(*(parse_column(rows, column) for column in run_columns))) or [()] * len(rows)
+    time_column = 'best_time' if 'best_time' in columns else 'time'
+    fallback_times = parse_column(rows, time_column) if time_column in columns else [None] * len(rows)
+    
+    riders = [
+        RankedRider(row, list(runs), None if any(run is not None for run in runs) else fallback)
+        for row, runs, fallback in zip(rows, runs_by_row, fallback_times)
+    ]
+    rank_field(riders)
+    
+    points_table = get_points_table()
+    trials = []
+    for rider, reference in zip(riders, references):
+        if 'points' in columns and rider.row.get('points', '').strip():
+            points = int(rider.row['points'])
         else:
-            time_obj = datetime.strptime(f"00:00:{time_str}", "%H:%M:%S.%f")
+            points = points_table.points_for(rider.position) if rider.best is not None else 0
         
-        points = int(row['points'])
-        
-        # Get competitor profile
-        try:
-            competitor = UserProfile.objects.get(user__username=competitor_username)
-            
-            # Create time trial result
-            TimeTrialResult.objects.create(
-                result=result,
-                competitor=competitor,
-                position=position,
-                time=time_obj.time(),
-                points=points
-            )
-        except UserProfile.DoesNotExist:
-            raise ValueError(f"User {competitor_username} does not exist.")
+        runs = rider.runs + [None] * (len(RUN_COLUMNS) - len(rider.runs))
+        trials.append(TimeTrialResult(
+            result=result,
+            competitor=profiles[reference],
+            position=rider.position,
+            time=to_duration(rider.best),
+            points=points,
+            run_1=to_duration(runs[0]),
+            run_2=to_duration(runs[1]),
+            run_3=to_duration(runs[2]),
+            gap_to_leader=to_duration(rider.gap_to_leader),
+            gap_to_previous=to_duration(rider.gap_to_previous),
+            consistency=rider.consistency,
+        ))
+    
+    TimeTrialResult.objects.bulk_create(trials)
+
+def _knockout_round(value):
+    """Round code and its order (increasing towards the final) for a round code or name"""
+    value = value.strip()
+    for order, (code, name) in enumerate(reversed(KnockoutResult.ROUND_CHOICES)):
+        if value.upper() == code or value.lower() == name.lower():
+            return code, order
+    raise ValueError(f"Unknown knockout round: {value}")
+
 
 def process_knockout_results(csv_data, result):
-    reader = csv.DictReader(csv_data)
-    for row in reader:
-        round_name = row['round']
-        match_number = int(row['match_number'])
-        winner_username = row['winner']
-        loser_username = row['loser']
-        
-        try:
-            winner = UserProfile.objects.get(user__username=winner_username)
-            loser = UserProfile.objects.get(user__username=loser_username)
-            
-            # Create knockout result
-            KnockoutResult.objects.create(
+    """
+    Save knockout results and build the result's heat tree.
+
+    Accepts head-to-head rows (``round, match_number, winner, loser``) or
+    heat rows (``round, heat, position, rider``) for 2- or 4-rider heats.
+    """
+    rows = list(csv.DictReader(csv_data))
+    if not rows:
+        return
+    columns = set(rows[0].keys())
+    
+    if {'winner', 'loser'} <= columns:
+        usernames = {row[field].strip() for row in rows for field in ('winner', 'loser')}
+    elif {'heat', 'position', 'rider'} <= columns:
+        usernames = {row['rider'].strip() for row in rows}
+    else:
+        raise ValueError("Knockout CSV needs winner/loser columns or heat/position/rider columns.")
+    
+    # Resolve every rider with one query
+    profiles = {
+        profile.user.username: profile
+        for profile in UserProfile.objects.filter(user__username__in=usernames).select_related('user')
+    }
+    missing = sorted(usernames - profiles.keys())
+    if missing:
+        raise ValueError(f"User does not exist: {', '.join(missing)}")
+    
+    if 'winner' in columns:
+        matches = []
+        records = []
+        for row in rows:
+            winner = profiles[row['winner'].strip()]
+            loser = profiles[row['loser'].strip()]
+            round_code, round_order = _knockout_round(row['round'])
+            matches.append(KnockoutResult(
                 result=result,
-                round=round_name,
+                round=round_code,
                 winner=winner,
                 loser=loser,
-                match_number=match_number
-            )
-        except UserProfile.DoesNotExist as e:
-            raise ValueError(f"User does not exist: {str(e)}")
+                match_number=int(row['match_number'])
+            ))
+            records.append((round_order, int(row['match_number']), [winner.pk, loser.pk]))
+        KnockoutResult.objects.bulk_create(matches)
+        heat_size = 2
+    else:
+        heats = {}
+        for row in rows:
+            key = (_knockout_round(row['round'])[1], int(row['heat']))
+            heats.setdefault(key, []).append((int(row['position']), profiles[row['rider'].strip()].pk))
+        records = [
+            (round_order, number, [rider for _, rider in sorted(entries)])
+            for (round_order, number), entries in heats.items()
+        ]
+        heat_size = 4 if any(len(finish) > 2 for _, _, finish in records) else 2
+    
+    tree = HeatTree.from_heats(records, heat_size)
+    KnockoutBracket.from_tree(result, tree, profiles.values()).save()
 
 @login_required
 def upload_bracket_results(request, event_id):
@@ -264,35 +394,34 @@ def upload_bracket_results(request, event_id):
                 league = get_object_or_404(League, id=temp_data['league_id'])
                 
                 # Create result record
-                with transaction.atomic():
-                    result = Result.objects.create(
-                        event=event,
-                        result_type='BRACKET',
-                        uploaded_by=request.user.profile,
-                        raw_data=ContentFile(
-                            content=temp_data['csv_data'],
-                            name=f"{event.slug}_bracket_{league.slug}.csv"
-                        ),
-                        is_final=temp_data['is_final']
-                    )
-                    
-                    # Process the bracket results
-                    disciplines_processed = save_bracket_results(result, temp_data)
-                    
-                    # Update league standings
-                    for discipline in disciplines_processed:
-                        update_league_standings_for_bracket(league, discipline, result)
-                    
-                    # Update event status
-                    event.has_results = True
-                    event.save()
+                result = Result.objects.create(
+                    event=event,
+                    result_type='BRACKET',
+                    uploaded_by=request.user.profile,
+                    raw_data=ContentFile(
+                        content=temp_data['csv_data'],
+                        name=f"{event.slug}_bracket_{league.slug}.csv"
+                    ),
+                    is_final=temp_data['is_final']
+                )
+                
+                # Save the bracket results and update league standings in the background
+                job = enqueue_job('PROCESS_BRACKET', {
+                    'result_id': result.id,
+                    'league_id': league.id,
+                    'headers': temp_data['headers'],
+                    'rows': temp_data['rows'],
+                    'mapping': temp_data['mapping'],
+                    'disciplines': temp_data.get('disciplines', ['Open']),
+                }, created_by=request.user.profile)
                 
                 # Clear session data
                 del request.session['bracket_upload_step']
                 del request.session['bracket_temp_data']
                 
-                messages.success(request, "Bracket results uploaded and league standings updated successfully!")
-                return redirect('results:view_results', event_id=event.id)
+                return redirect_to_job(
+                    request, job, reverse('results:view_results', args=[event.id])
+                )
                 
             except Exception as e:
                 messages.error(request, f"Error saving results: {str(e)}")
@@ -358,6 +487,14 @@ def detect_disciplines(temp_data):
     return disciplines
 
 
+def _get_points_table_for_upload(temp_data):
+    """Get the points table for the league a bracket upload belongs to"""
+    points_system = League.objects.filter(
+        pk=temp_data.get('league_id')
+    ).values_list('points_system', flat=True).first()
+    return get_points_table(points_system or 'STANDARD')
+
+
 def process_bracket_preview(temp_data):
     """Process bracket data for preview"""
     mapping = temp_data['mapping']
@@ -380,6 +517,8 @@ def process_bracket_preview(temp_data):
     for discipline in disciplines:
         preview_data[discipline] = []
     
+    points_table = _get_points_table_for_upload(temp_data)
+    
     # Process each row
     for row in rows:
         if len(row) <= max(indices.values()):
@@ -398,9 +537,9 @@ def process_bracket_preview(temp_data):
             try:
                 points = int(row[indices['POINTS']])
             except ValueError:
-                points = PointsSystem.get_points_for_position(rank)
+                points = points_table.points_for(rank)
         else:
-            points = PointsSystem.get_points_for_position(rank)
+            points = points_table.points_for(rank)
         
         # Determine which discipline this row belongs to
         if use_discipline_column:
@@ -446,6 +585,14 @@ def save_bracket_results(result, temp_data):
     
     # Track which disciplines were processed
     processed_disciplines = set()
+    points_table = _get_points_table_for_upload(temp_data)
+    
+    # Resolve every rider name in the file to a competitor at once; only
+    # names never seen before are matched against profiles
+    name_column = indices['NAME']
+    competitors, matches = resolve_competitors(
+        row[name_column].strip() for row in rows if len(row) > name_column
+    )
     
     # Process each row
     for row in rows:
@@ -466,9 +613,9 @@ def save_bracket_results(result, temp_data):
                 try:
                     points = int(row[indices['POINTS']])
                 except ValueError:
-                    points = PointsSystem.get_points_for_position(rank)
+                    points = points_table.points_for(rank)
             else:
-                points = PointsSystem.get_points_for_position(rank)
+                points = points_table.points_for(rank)
             
             # Determine discipline
             if use_discipline_column:
@@ -483,26 +630,6 @@ def save_bracket_results(result, temp_data):
             # Record that this discipline was processed
             processed_disciplines.add(discipline)
             
-            # Try to find the user profile by name
-            user_profile = None
-            try:
-                # Try to match by username, first/last name, or full name
-                name_parts = name.split()
-                if len(name_parts) >= 2:
-                    user_profile = UserProfile.objects.filter(
-                        Q(user__username__iexact=name) |
-                        Q(user__first_name__iexact=name_parts[0], 
-                          user__last_name__iexact=' '.join(name_parts[1:]))
-                    ).first()
-                else:
-                    user_profile = UserProfile.objects.filter(
-                        Q(user__username__iexact=name) |
-                        Q(user__first_name__iexact=name) |
-                        Q(user__last_name__iexact=name)
-                    ).first()
-            except:
-                pass  # If error, continue without profile link
-            
             # Create the bracket result
             BracketResult.objects.create(
                 result=result,
@@ -510,7 +637,8 @@ def save_bracket_results(result, temp_data):
                 position=rank,
                 discipline=discipline,
                 points=points,
-                competitor_profile=user_profile
+                rider_id=competitors[name][0],
+                competitor_profile_id=competitors[name][1]
             )
             
             # Create or update discipline result record
@@ -524,140 +652,142 @@ def save_bracket_results(result, temp_data):
             # Log error but continue processing other rows
             print(f"Error processing row: {row}. Error: {e}")
     
+    # Names that might belong to a profile wait for the organiser to confirm
+    RiderMatchReview.objects.bulk_create([
+        RiderMatchReview(result=result, competitor_name=name, candidates=match.candidates)
+        for name, match in sorted(matches.items())
+        if name and match.profile_id is None and match.candidates
+    ])
+    
     return processed_disciplines
 
 
-def update_league_standings_for_bracket(league, discipline, result):
-    """Update league standings based on bracket results"""
-    # Get or create the discipline object
-    discipline_obj, created = Discipline.objects.get_or_create(
-        league=league,
-        name=discipline,
-        defaults={'slug': discipline.lower().replace(' ', '-')}
+@login_required
+def review_rider_matches(request, event_id):
+    """Confirm or dismiss imported rider names that were not linked automatically"""
+    event = get_object_or_404(Event, id=event_id)
+    
+    if request.user.profile != event.organizer:
+        messages.error(request, "You don't have permission to review results for this event.")
+        return redirect('events:event_details', slug=event.slug)
+    
+    reviews = RiderMatchReview.objects.filter(
+        result__event=event, status='PENDING'
+    ).select_related('result')
+    
+    if request.method == 'POST':
+        review = get_object_or_404(reviews, pk=request.POST.get('review_id'))
+        if request.POST.get('action') == 'dismiss':
+            review.status = 'DISMISSED'
+            review.resolved_by = request.user.profile
+            review.save(update_fields=['status', 'resolved_by'])
+            messages.info(request, f"'{review.competitor_name}' left unlinked.")
+        else:
+            profile = get_object_or_404(UserProfile, pk=request.POST.get('profile_id'))
+            entries = BracketResult.objects.filter(result=review.result, competitor_name=review.competitor_name)
+            # Rows imported before competitors existed get one, so the link republishes standings
+            assign_competitors(entries)
+            rider = entries.filter(rider__isnull=False).select_related('rider').first()
+            with transaction.atomic():
+                if rider:
+                    competitor = link_competitor(rider.rider, profile)
+                    names = set(competitor.bracket_results.values_list('competitor_name', flat=True))
+                else:
+                    names = {review.competitor_name}
+                    BracketResult.objects.filter(
+                        result=review.result, competitor_name=review.competitor_name
+                    ).update(competitor_profile=profile)
+                review.status = 'LINKED'
+                review.profile = profile
+                review.resolved_by = request.user.profile
+                review.save(update_fields=['status', 'profile', 'resolved_by'])
+            refresh_rider_stats([profile.pk], names)
+            invalidate_event_results(event.id)
+            messages.success(request, f"'{review.competitor_name}' linked to {profile.get_display_name()}.")
+        return redirect('results:review_rider_matches', event_id=event.id)
+    
+    reviews = list(reviews)
+    profiles = UserProfile.objects.select_related('user').in_bulk(
+        {profile_id for review in reviews for profile_id, _ in review.candidates}
     )
+    for review in reviews:
+        review.candidate_profiles = [
+            (profiles[profile_id], score)
+            for profile_id, score in review.candidates if profile_id in profiles
+        ]
     
-    # Get the event and league event relationship
-    event = result.event
-    try:
-        league_event = LeagueEvent.objects.get(league=league, event=event)
-        multiplier = league_event.multiplier
-    except LeagueEvent.DoesNotExist:
-        # If this event isn't part of the league, create the relationship
-        league_event = LeagueEvent.objects.create(
-            league=league, 
-            event=event,
-            multiplier=1.0,
-            weight=100
-        )
-        multiplier = 1.0
-    
-    # Get all bracket results for this discipline
-    bracket_results = BracketResult.objects.filter(
-        result=result,
-        discipline=discipline
-    ).order_by('position')
-    
-    # Process each result
-    with transaction.atomic():
-        for br in bracket_results:
-            # Calculate adjusted points based on multiplier
-            adjusted_points = int(br.points * multiplier)
-            
-            # Get or create standing
-            standing, created = LeagueStanding.objects.get_or_create(
-                league=league,
-                discipline=discipline_obj,
-                competitor_name=br.competitor_name,
-                defaults={
-                    'competitor': br.competitor_profile,
-                    'points': adjusted_points,
-                    'events_competed': 1,
-                    'position': br.position,  # Initial position same as event position
-                    'event_results': {
-                        event.slug: {
-                            'points': adjusted_points,
-                            'position': br.position
-                        }
-                    }
-                }
-            )
-            
-            if not created:
-                # Update existing standing
-                event_results = standing.event_results
-                event_results[event.slug] = {
-                    'points': adjusted_points,
-                    'position': br.position
-                }
-                
-                # Count events and calculate total points
-                standing.events_competed = len(event_results)
-                standing.points += adjusted_points
-                standing.event_results = event_results
-                standing.save()
-        
-        # Recalculate positions and average rank
-        recalculate_league_standings(league, discipline_obj)
+    return render(request, 'results/review_rider_matches.html', {
+        'event': event,
+        'reviews': reviews,
+    })
 
 
-def recalculate_league_standings(league, discipline):
-    """Recalculate positions and stats for league standings"""
-    standings = LeagueStanding.objects.filter(
-        league=league,
-        discipline=discipline
-    ).order_by('-points')
+# Rendered results are cached per event. The key includes Event.updated, which is
+# touched whenever the event's results change, so every process sees new uploads.
+EVENT_RESULTS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def event_results_cache_key(event):
+    """Cache key for an event's rendered results"""
+    return f"results:event:{event.pk}:{event.updated.timestamp()}"
+
+
+def invalidate_event_results(event_id):
+    """Touch the event so its cached results are rebuilt on the next view"""
+    Event.objects.filter(pk=event_id).update(updated=timezone.now())
+
+
+def get_event_results_context(event):
+    """Load every result for an event with a fixed number of queries"""
+    results = list(
+        Result.objects.filter(event=event)
+        .select_related('knockout_bracket')
+        .order_by('-is_final', '-uploaded_at')
+        .prefetch_related(
+            Prefetch('time_trials', queryset=TimeTrialResult.objects.select_related('competitor__user')),
+            Prefetch('knockouts', queryset=KnockoutResult.objects.select_related('winner__user', 'loser__user')),
+        )
+    )
     
-    # Update positions
-    position = 1
-    for standing in standings:
-        # Calculate average rank from event results
-        if standing.event_results and standing.events_competed > 0:
-            positions = [result.get('position', 0) for result in standing.event_results.values()]
-            standing.average_rank = sum(positions) / len(positions)
-        
-        standing.position = position
-        standing.save()
-        position += 1
+    # All bracket entries in one query, grouped by result then discipline
+    entries = BracketResult.objects.filter(
+        result__event=event
+    ).select_related(
+        'result', 'competitor_profile__user'
+    ).order_by('-result__is_final', '-result__uploaded_at', 'result', 'discipline', 'position')
+    
+    bracket_results = {}
+    for (result_id, discipline), group in groupby(entries, key=lambda e: (e.result_id, e.discipline)):
+        group = list(group)
+        bracket_results.setdefault(discipline, []).append({
+            'result': group[0].result,
+            'entries': group
+        })
+    
+    return {
+        'event': event,
+        'time_trial_results': [r for r in results if r.result_type == 'TIME_TRIAL'],
+        'knockout_results': [r for r in results if r.result_type == 'KNOCKOUT'],
+        'bracket_results': bracket_results,
+    }
 
 
 def view_results(request, event_id):
     event = get_object_or_404(Event, id=event_id)
     
-    # Get bracket results grouped by discipline
-    bracket_results = {}
-    bracket_result_records = Result.objects.filter(
-        event=event,
-        result_type='BRACKET'
-    ).order_by('-is_final', '-uploaded_at')
-    
-    for result in bracket_result_records:
-        disciplines = BracketResult.objects.filter(result=result).values_list(
-            'discipline', flat=True
-        ).distinct()
-        
-        for discipline in disciplines:
-            if discipline not in bracket_results:
-                bracket_results[discipline] = []
-            
-            discipline_results = BracketResult.objects.filter(
-                result=result,
-                discipline=discipline
-            ).order_by('position')
-            
-            bracket_results[discipline].append({
-                'result': result,
-                'entries': discipline_results
-            })
+    cache_key = event_results_cache_key(event)
+    results_html = cache.get(cache_key)
+    if results_html is None:
+        results_html = render_to_string(
+            'results/partials/_event_results.html',
+            get_event_results_context(event)
+        )
+        cache.set(cache_key, results_html, EVENT_RESULTS_CACHE_TIMEOUT)
     
     context = {
         'event': event,
-        'time_trial_results': event.results.filter(
-            result_type='TIME_TRIAL'
-        ).order_by('-is_final', '-uploaded_at'),
-        'knockout_results': event.results.filter(
-            result_type='KNOCKOUT'
-        ).order_by('-is_final', '-uploaded_at'),
-        'bracket_results': bracket_results
+        'results_html': results_html,
+        'job': get_job_from_request(request),
     }
     
     return render(request, 'results/view_results.html', context)
@@ -665,24 +795,11 @@ def view_results(request, event_id):
 def league_standings(request, slug):
     league = get_object_or_404(League, slug=slug)
     
-    # Get all disciplines for this league
-    disciplines = Discipline.objects.filter(league=league)
-    
-    # Get standings for each discipline
-    discipline_standings = {}
-    for discipline in disciplines:
-        discipline_standings[discipline] = LeagueStanding.objects.filter(
-            league=league,
-            discipline=discipline
-        ).order_by('position')
-    
-    # If no disciplines found, get all standings grouped by discipline name
-    if not disciplines:
-        raw_standings = LeagueStanding.objects.filter(league=league).order_by('position')
-        discipline_names = raw_standings.values_list('discipline__name', flat=True).distinct()
-        
-        for name in discipline_names:
-            discipline_standings[name] = raw_standings.filter(discipline__name=name)
+    # Standings come from the latest published snapshot of each discipline
+    discipline_standings = {
+        snapshot.discipline: snapshot.standings
+        for snapshot in get_latest_snapshots(league)
+    }
     
     # Get all events in this league
     events = Event.objects.filter(league_links__league=league).order_by('start_date')
@@ -691,10 +808,66 @@ def league_standings(request, slug):
         'league': league,
         'discipline_standings': discipline_standings,
         'events': events,
+        'job': get_job_from_request(request),
     }
     
     return render(request, 'results/league_standings.html', context)
 
+
+def league_standings_json(request, slug):
+    """JSON endpoint serving the latest standings snapshot of each discipline"""
+    league = get_object_or_404(League, slug=slug)
+    
+    snapshots = get_latest_snapshots(league)
+    discipline_slug = request.GET.get('discipline')
+    if discipline_slug:
+        snapshots = [s for s in snapshots if s.discipline.slug == discipline_slug]
+    
+    return JsonResponse({
+        'league': league.slug,
+        'season': league.season,
+        'columns': StandingsSnapshot.COLUMNS,
+        'disciplines': [
+            {
+                'name': snapshot.discipline.name,
+                'slug': snapshot.discipline.slug,
+                'version': snapshot.version,
+                'published_at': snapshot.created_at.isoformat(),
+                'rows': snapshot.rows,
+            }
+            for snapshot in snapshots
+        ],
+    })
+
+
+def _export_response(leagues, dataset, filename, requested_format):
+    if dataset not in DATASETS:
+        raise Http404("Unknown export")
+    export_format = resolve_export_format(requested_format)
+    content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        stream_export(dataset, leagues, export_format), content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{dataset}.{extension}"'
+    return response
+
+
+def export_league_data(request, slug, dataset):
+    """Stream a league's results, standings or rider stats as CSV or a columnar file"""
+    league = get_object_or_404(League, slug=slug)
+    return _export_response(
+        League.objects.filter(pk=league.pk), dataset, league.slug, request.GET.get('format', 'csv')
+    )
+
+
+def export_season_data(request, season, dataset):
+    """Stream a dataset for every league in a season"""
+    leagues = League.objects.filter(season=season)
+    if not leagues.exists():
+        raise Http404("No leagues in this season")
+    return _export_response(leagues, dataset, f"season-{season}", request.GET.get('format', 'csv'))
+
+
 def results_list(request):
     time_trial_results = Result.objects.filter(
         result_type='TIME_TRIAL',
@@ -719,6 +892,101 @@ def results_list(request):
     
     return render(request, 'results/results_list.html', context)
 
+RIDER_LEADERBOARD_ORDERING = {
+    'wins': ['-wins', '-podiums', 'competitor_name'],
+    'podiums': ['-podiums', '-wins', 'competitor_name'],
+    'points': ['-total_points', 'competitor_name'],
+    'events': ['-events_raced', 'competitor_name'],
+}
+
+
+def rider_leaderboard(request):
+    """Career leaderboard read straight from the rider stats table"""
+    sort = request.GET.get('sort', 'wins')
+    if sort not in RIDER_LEADERBOARD_ORDERING:
+        sort = 'wins'
+    
+    riders = RiderStats.objects.select_related('profile__user').order_by(
+        *RIDER_LEADERBOARD_ORDERING[sort]
+    )
+    
+    paginator = Paginator(riders, 50)
+    page_obj = paginator.get_page(request.GET.get('page', 1))
+    
+    return render(request, 'results/rider_leaderboard.html', {
+        'page_obj': page_obj,
+        'sort': sort,
+    })
+
+
+def _rider_json(profile):
+    return {'id': profile.pk, 'username': profile.user.username, 'name': profile.get_display_name()}
+
+
+def head_to_head_json(request, rider_id, opponent_id):
+    """JSON record between two riders, read from the rider's side"""
+    profiles = UserProfile.objects.select_related('user').in_bulk([rider_id, opponent_id])
+    if rider_id == opponent_id or len(profiles) != 2 or not all(
+        ProfilePrivacyManager(profile, request.user).can_view_profile() for profile in profiles.values()
+    ):
+        return JsonResponse({'error': 'Rider not found'}, status=404)
+    
+    record = get_head_to_head(rider_id, opponent_id)
+    return JsonResponse({
+        'rider': _rider_json(profiles[rider_id]),
+        'opponent': _rider_json(profiles[opponent_id]),
+        'wins': record['wins'],
+        'losses': record['losses'],
+        'meetings': record['meetings'],
+        'last_met': record['last_met'].isoformat() if record['last_met'] else None,
+    })
+
+
+def rider_rivals_json(request, rider_id):
+    """JSON list of a rider's most frequent knockout opponents"""
+    profile = get_object_or_404(UserProfile.objects.select_related('user'), pk=rider_id)
+    if not ProfilePrivacyManager(profile, request.user).can_view_profile():
+        raise Http404("Rider not found")
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    
+    return JsonResponse({
+        'rider': _rider_json(profile),
+        'rivals': [
+            {
+                'opponent': _rider_json(rival['opponent']),
+                'wins': rival['wins'],
+                'losses': rival['losses'],
+                'meetings': rival['meetings'],
+                'last_met': rival['last_met'].isoformat() if rival['last_met'] else None,
+            }
+            for rival in rivals_for(
+                profile.pk, limit, ProfilePrivacyManager.visible_profiles(UserProfile.objects.all(), request.user)
+            )
+        ],
+    })
+
+
+def get_discipline_podiums(leagues, size=3):
+    """Top standings of every discipline in the given leagues, in one window query"""
+    standings = LeagueStanding.objects.filter(
+        league__in=leagues
+    ).annotate(
+        podium_rank=Window(
+            RowNumber(),
+            partition_by=[F('discipline')],
+            order_by=[F('position').asc(nulls_last=True), F('competitor_name').asc()]
+        )
+    ).filter(podium_rank__lte=size).order_by('discipline', 'podium_rank')
+    
+    podiums = {}
+    for standing in standings:
+        podiums.setdefault(standing.discipline_id, []).append(standing)
+    return podiums
+
+
 def league_list(request):
     # Start with all leagues
     leagues_queryset = League.objects.all()
@@ -747,25 +1015,31 @@ def league_list(request):
         ).filter(total_events__gte=int(events_count_filter))
     
     # Order by name and season
-    leagues = leagues_queryset.order_by('-season', 'name')
+    leagues_queryset = leagues_queryset.annotate(
+        event_count=Count('league_events', distinct=True)
+    ).prefetch_related(
+        Prefetch('disciplines', queryset=Discipline.objects.order_by('id'), to_attr='discipline_list')
+    ).order_by('-season', 'name')
+    
+    # Paginate results
+    paginator = Paginator(leagues_queryset, 12)
+    page_obj = paginator.get_page(request.GET.get('page', 1))
+    leagues = list(page_obj)
     
-    # Get disciplines and top standings for each league
+    # Top three riders of every discipline on the page
+    podiums = get_discipline_podiums(leagues)
     for league in leagues:
-        # Create new attribute for the template rather than trying to assign to the reverse relation
-        league.discipline_list = Discipline.objects.filter(league=league)
-        league.top_standings = {}
-        
-        for discipline in league.discipline_list:
-            league.top_standings[discipline] = LeagueStanding.objects.filter(
-                league=league, 
-                discipline=discipline
-            ).order_by('position')[:3]
+        league.top_standings = {
+            discipline: podiums.get(discipline.id, [])
+            for discipline in league.discipline_list
+        }
     
     # Get all countries for the filter dropdown
     countries_list = list(countries)
     
     return render(request, 'results/league_list.html', {
-        'leagues': leagues,
+        'leagues': page_obj,
+        'page_obj': page_obj,
         'countries': countries_list,
         'continents': League.CONTINENT_CHOICES
     })
@@ -933,50 +1207,14 @@ def recalculate_league(request, slug):
     
     if request.method == 'POST':
         try:
-            with transaction.atomic():
-                # Delete existing standings
-                LeagueStanding.objects.filter(league=league).delete()
-                
-                # Get all disciplines
-                disciplines = Discipline.objects.filter(league=league)
-                
-                # Get all events in this league
-                league_events = LeagueEvent.objects.filter(league=league)
-                
-                # For each event and discipline, recalculate standings
-                for league_event in league_events:
-                    event = league_event.event
-                    multiplier = league_event.multiplier
-                    
-                    # Get all bracket results for this event
-                    bracket_results = Result.objects.filter(
-                        event=event,
-                        result_type='BRACKET',
-                        is_final=True
-                    )
-                    
-                    for result in bracket_results:
-                        # Get disciplines from results
-                        result_disciplines = BracketResult.objects.filter(
-                            result=result
-                        ).values_list('discipline', flat=True).distinct()
-                        
-                        for discipline_name in result_disciplines:
-                            # Get or create discipline object
-                            discipline, created = Discipline.objects.get_or_create(
-                                league=league,
-                                name=discipline_name,
-                                defaults={'slug': slugify(discipline_name)}
-                            )
-                            
-                            # Update league standings for this discipline
-                            update_league_standings_for_bracket(
-                                league, discipline_name, result
-                            )
-                
-                messages.success(request, "League standings recalculated successfully.")
-                
-            return redirect('results:league_standings', slug=league.slug)
+            job = enqueue_job(
+                'RECALCULATE_LEAGUE',
+                {'league_id': league.id},
+                created_by=request.user.profile
+            )
+            return redirect_to_job(
+                request, job, reverse('results:league_standings', args=[league.slug])
+            )
             
         except Exception as e:
             messages.error(request, f"Error recalculating standings: {str(e)}")
@@ -986,3 +1224,48 @@ def recalculate_league(request, slug):
     return render(request, 'results/manage/recalculate_confirmation.html', {
         'league': league
     })
+
+
+# --- BACKGROUND JOBS ---
+
+def redirect_to_job(request, job, next_url):
+    """Redirect to a page that follows the job's progress until it finishes."""
+    if job.status == 'COMPLETED':
+        messages.success(request, job.message)
+        return redirect(next_url)
+    if job.status == 'FAILED':
+        messages.error(request, f"Error processing job: {job.error}")
+        return redirect(next_url)
+
+    messages.info(request, f"{job.get_job_type_display()} has been queued.")
+    return redirect(f"{next_url}?job={job.id}")
+
+
+def get_job_from_request(request):
+    """Return the job referenced by ?job=<id> for the progress banner, if any."""
+    job_id = request.GET.get('job')
+    if not job_id or not job_id.isdigit() or not request.user.is_authenticated:
+        return None
+    jobs = ProcessingJob.objects.filter(id=job_id)
+    if not request.user.is_superuser:
+        jobs = jobs.filter(created_by_id=request.user.profile.id)
+    return jobs.first()
+
+
+@login_required
+def job_status(request, job_id):
+    """JSON endpoint for polling the progress of a background job"""
+    job = get_object_or_404(ProcessingJob, id=job_id)
+    
+    if not request.user.is_superuser and job.created_by_id != request.user.profile.id:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    return JsonResponse({
+        'id': job.id,
+        'job_type': job.job_type,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'error': job.error,
+        'finished': job.is_finished,
+    })